@@ -1,57 +1,373 @@
+import json
 import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from indice_codigo import IndiceCodigo
+
+# Carpeta raíz del repositorio (la de este archivo es EjemplosMundoReal_POO), independiente del directorio actual
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Carpetas que no se recorren al buscar scripts
+CARPETAS_IGNORADAS = {"__pycache__", ".git", ".venv", "venv", "node_modules"}
+
+
+# Función que busca los scripts .py de forma recursiva
+def descubrir_scripts(raiz=RAIZ):
+    """
+    Recorre `raiz` con os.scandir (sin volver a pedir el tipo de cada entrada al sistema)
+    y devuelve las rutas relativas de los .py encontrados, ordenadas por carpeta y nombre.
+    """
+    scripts = []
+    pendientes = [raiz]
+    while pendientes:
+        carpeta = pendientes.pop()
+        try:
+            with os.scandir(carpeta) as entradas:
+                for entrada in entradas:
+                    if entrada.is_dir(follow_symlinks=False):
+                        if entrada.name not in CARPETAS_IGNORADAS and not entrada.name.startswith("."):
+                            pendientes.append(entrada.path)
+                    elif entrada.name.endswith(".py") and entrada.is_file():
+                        scripts.append(os.path.relpath(entrada.path, raiz))
+        except OSError:
+            continue  # carpeta sin permisos o borrada mientras se recorría
+    # Primero los de la raíz, luego los de cada carpeta
+    scripts.sort(key=lambda ruta: (os.path.dirname(ruta), ruta.casefold()))
+    return scripts
+
+
+# Caché LRU con el contenido de los archivos ya vistos
+class CacheArchivos:
+    """
+    Guarda las líneas de cada archivo con la clave (ruta, mtime, tamaño): si el archivo no ha
+    cambiado, volver a verlo solo cuesta un os.stat, sin leerlo. Al modificarse, la clave
+    cambia y se vuelve a leer; la versión vieja sale de la caché por antigüedad.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()  # (ruta, mtime_ns, tamaño) -> lista de líneas
+        self._bytes = 0
+        self.aciertos = 0
+        self.lecturas = 0
+
+    def lineas(self, ruta):
+        info = os.stat(ruta)
+        clave = (ruta, info.st_mtime_ns, info.st_size)
+        lineas = self._entradas.get(clave)
+        if lineas is not None:
+            self._entradas.move_to_end(clave)  # usado recientemente
+            self.aciertos += 1
+            return lineas
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            lineas = archivo.read().splitlines()
+        self.lecturas += 1
+        self._entradas[clave] = lineas
+        self._bytes += info.st_size
+        # Se descartan los menos usados hasta volver al límite (siempre queda el último)
+        while self._bytes > self.max_bytes and len(self._entradas) > 1:
+            (_, _, tamano), _ = self._entradas.popitem(last=False)
+            self._bytes -= tamano
+        return lineas
+
+
+cache = CacheArchivos()
+
+
+# Función que muestra un texto largo por páginas
+def paginar(lineas, alto=None, desde=1):
+    """
+    Muestra las líneas de `alto` en `alto` (por defecto, lo que cabe en la terminal),
+    empezando por la línea `desde`. Enter avanza, 'q' vuelve al menú.
+    """
+    if alto is None:
+        alto = max(5, shutil.get_terminal_size().lines - 3)
+    ancho = len(str(len(lineas)))
+    for inicio in range(max(0, desde - 1), len(lineas), alto):
+        pagina = lineas[inicio:inicio + alto]
+        print("\n".join(f"{inicio + i + 1:>{ancho}} | {linea}" for i, linea in enumerate(pagina)))
+        if inicio + alto < len(lineas):
+            fin = inicio + len(pagina)
+            respuesta = input(f"-- líneas {inicio + 1}-{fin} de {len(lineas)}: [Enter] seguir, [q] volver -- ")
+            if respuesta.strip().lower() == 'q':
+                break
+
 
 # Función que muestra el contenido de un archivo .py seleccionado
-def mostrar_codigo(ruta_script):
+def mostrar_codigo(ruta_script, alto=None, desde=1):
     """
-    Muestra el contenido del archivo .py seleccionado.
+    Muestra el contenido del archivo .py seleccionado (ruta relativa a la raíz del repositorio).
     """
-    ruta_script_absoluta = os.path.abspath(ruta_script)  # Convierte la ruta relativa en absoluta
+    ruta_script_absoluta = os.path.join(RAIZ, ruta_script)
 
     try:
-        # Intenta abrir el archivo en modo lectura con codificación UTF-8
-        with open(ruta_script_absoluta, 'r', encoding='utf-8') as archivo:
-            print(f"\n📄 --- Código de {ruta_script} ---\n")
-            print(archivo.read())  # Muestra el contenido del archivo
+        lineas = cache.lineas(ruta_script_absoluta)  # Sin leer el disco si ya se vio y no cambió
+        print(f"\n📄 --- Código de {ruta_script} ---\n")
+        paginar(lineas, alto, desde)
     except FileNotFoundError:
         print("❌ El archivo no se encontró.")  # Si no se encuentra el archivo
     except Exception as e:
         print(f"⚠️ Ocurrió un error al intentar leer el archivo: {e}")  # Otros errores
 
+
+# Función que busca una definición en el índice de código
+def buscar_definicion(indice, scripts):
+    """
+    Pregunta un nombre (clase, método, función o atributo), lista dónde se define y
+    permite abrir el código en esa línea.
+    """
+    indice.actualizar(scripts)  # Solo vuelve a analizar los archivos que cambiaron
+    nombre = input("Nombre a buscar (clase, método, función o atributo): ").strip()
+    definiciones = indice.buscar(nombre) if nombre else []
+    if not definiciones:
+        print("🔎 No se encontró ninguna definición con ese nombre.")
+        return
+    for numero, d in enumerate(definiciones, start=1):
+        dentro = f" (en {d.clase})" if d.clase else ""
+        print(f"{numero}. {d.ruta}:{d.linea}  {d.tipo}{dentro}")
+    opcion = input("Número para ver el código (Enter para volver): ").strip()
+    if opcion.isdigit() and 1 <= int(opcion) <= len(definiciones):
+        elegida = definiciones[int(opcion) - 1]
+        mostrar_codigo(elegida.ruta, desde=elegida.linea)
+
+
 # Función que muestra el menú principal de opciones
 def mostrar_menu():
     """
-    Muestra el menú principal con los temas disponibles.
+    Muestra el menú principal con los scripts encontrados en el repositorio.
     """
-    opciones = {
-        '1': 'Programacion tradicional.py',
-        '2': 'Programacion orientada a objetos.py',
-        '3': 'Técnicas de Programación (POO).py',
-        '4': 'Tipos de datos, identificadores.py',
-        '5': 'Clases, objetos, herencia, encapsulamiento y polimorfismo.py',
-        '6': 'Implementación de Constructores y Destructores en Python.py'
-    }
+    scripts = descubrir_scripts()
+    indice = None  # Se crea la primera vez que se busca
 
     # Bucle para mostrar el menú hasta que el usuario elija salir
     while True:
         print("\n📘 MENÚ DE OPCIONES:")
-        print("1. Programación Tradicional")
-        print("2. Programación Orientada a Objetos")
-        print("3. Técnicas de Programación (POO)")
-        print("4. Tipos de Datos e Identificadores")
-        print("5. Clases, Objetos, Herencia, Encapsulamiento y Polimorfismo")
-        print("6. Constructores y Destructores en Python")
+        carpeta_actual = None
+        for numero, ruta in enumerate(scripts, start=1):
+            carpeta = os.path.dirname(ruta)
+            if carpeta != carpeta_actual:
+                carpeta_actual = carpeta
+                if carpeta:
+                    print(f"  📁 {carpeta}")
+            print(f"{numero}. {os.path.basename(ruta)[:-3]}")
+        print("b. Buscar una clase, método o atributo")
+        print("r. Volver a buscar scripts")
         print("0. Salir")
 
-        opcion = input("Selecciona una opción: ")
+        opcion = input("Selecciona una opción: ").strip()
 
         if opcion == '0':
             print("👋 Saliendo del programa...")
             break  # Sale del bucle y finaliza el programa
-        elif opcion in opciones:
-            mostrar_codigo(opciones[opcion])  # Llama a la función para mostrar el código seleccionado
+        elif opcion.lower() == 'b':
+            if indice is None:
+                indice = IndiceCodigo(RAIZ)
+            buscar_definicion(indice, scripts)
+        elif opcion.lower() == 'r':
+            scripts = descubrir_scripts()
+        elif opcion.isdigit() and 1 <= int(opcion) <= len(scripts):
+            mostrar_codigo(scripts[int(opcion) - 1])  # Llama a la función para mostrar el código seleccionado
         else:
             print("⚠️ Opción inválida. Intenta nuevamente.")  # Mensaje de error si se escribe una opción inválida
 
+# ====== MODO EJECUCIÓN: correr y medir todos los scripts ======
+
+# Entrada por teclado que recibe cada script interactivo (el resto recibe una entrada vacía)
+ENTRADAS = {
+    "Tipos de datos, identificadores.py": "5\n3\n",
+    "Programacion tradicional.py": "21\n23.5\n19\n25\n22\n20\n24\n",
+    "Programacion orientada a objetos.py": "21\n23.5\n19\n25\n22\n20\n24\n",
+    os.path.join("Unidad III", "Sistemainventario.py"): "1\nP1\nLápiz\n10\n0.5\n5\n4\nLáp\n6\n",
+    os.path.join("Unidad III", "Sistema de Gestión de Inventarios Mejorado.py"):
+        "1\nP1\nLápiz\n10\n0.5\n5\n4\nLáp\n6\n",
+    os.path.join("Unidad III", "Sistema Avanzado de Gestión de Inventario.py"):
+        "1\nP1\nLápiz\n10\n0.5\n5\n4\nLáp\n7\n",
+    os.path.join("EjemplosMundoReal_POO", "Dashboard.py"): "1\nq\n0\n",
+}
+
+# Scripts que se quedan sirviendo hasta Ctrl+C: se detienen tras estos segundos y no cuenta como error
+SERVIDORES = {
+    os.path.join("Unidad III", "biblioteca_servicio.py"): 2,
+}
+
+MARCA_INICIO = "##dashboard-inicio##"
+MARCA_RESULTADO = "##dashboard-resultado##"
+
+# Se ejecuta en el proceso hijo: corre el script como __main__ y al final informa por stderr
+# del tiempo, la CPU y la memoria máxima. Las ventanas Tk se cierran solas tras `cierre_ms`.
+_ARRANQUE = r"""
+import runpy, sys, time
+ruta, cierre_ms, marca_inicio, marca_resultado = sys.argv[1], int(sys.argv[2]), sys.argv[3], sys.argv[4]
+sys.argv = [ruta]
+sys.path.insert(0, __import__("os").path.dirname(ruta))
+sys.stderr.write(marca_inicio + "\n")
+sys.stderr.flush()
+inicio = time.perf_counter()
+try:
+    if "tkinter" in open(ruta, encoding="utf-8").read():
+        import tkinter
+        _mainloop = tkinter.Misc.mainloop
+        def mainloop(self, n=0):
+            self.after(cierre_ms, self.quit)
+            _mainloop(self, n)
+        tkinter.Misc.mainloop = mainloop
+    runpy.run_path(ruta, run_name="__main__")
+finally:
+    pared = time.perf_counter() - inicio
+    import json
+    try:
+        import resource
+        propio = resource.getrusage(resource.RUSAGE_SELF)
+        hijos = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = propio.ru_utime + propio.ru_stime + hijos.ru_utime + hijos.ru_stime
+        rss = propio.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    except ImportError:  # Windows: sin resource
+        cpu, rss = time.process_time(), None
+    sys.stderr.write(marca_resultado + " " + json.dumps({"pared": pared, "cpu": cpu, "rss": rss}) + "\n")
+    sys.stderr.flush()
+"""
+
+
+def _tiempo_importacion(lineas):
+    """
+    Suma el tiempo acumulado (ms) de las importaciones de primer nivel que informa
+    `python -X importtime` (las anidadas ya están incluidas en su padre).
+    """
+    total_us = 0
+    for linea in lineas:
+        if not linea.startswith("import time:"):
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) == 3 and partes[1].strip().isdigit() and not partes[2].startswith("  "):
+            total_us += int(partes[1])
+    return total_us / 1000
+
+
+def _detener(proceso, gracia=2):
+    """Ctrl+C al grupo del proceso (el hijo aún informa de sus medidas) y, si no basta, SIGKILL."""
+    if os.name != "posix":
+        proceso.kill()
+        return
+    os.killpg(proceso.pid, signal.SIGINT)
+    try:
+        proceso.wait(gracia)
+    except subprocess.TimeoutExpired:
+        os.killpg(proceso.pid, signal.SIGKILL)
+
+
+def ejecutar_script(ruta_script, timeout=60, cierre_ms=1000):
+    """
+    Ejecuta un script (ruta relativa a la raíz) en su propio proceso, con su entrada de ENTRADAS,
+    dentro de una carpeta temporal (para que no deje archivos en el repositorio) y devuelve sus
+    medidas: estado, tiempo de pared, CPU, memoria máxima (RSS) e importaciones.
+    """
+    ruta_absoluta = os.path.join(RAIZ, ruta_script)
+    comando = [sys.executable, "-X", "importtime", "-c", _ARRANQUE,
+               ruta_absoluta, str(cierre_ms), MARCA_INICIO, MARCA_RESULTADO]
+    with open(ruta_absoluta, encoding="utf-8") as archivo:  # se llama desde varios hilos: sin la caché
+        usa_tk = "tkinter" in archivo.read()
+    if usa_tk and not os.environ.get("DISPLAY") and os.name == "posix" and shutil.which("xvfb-run"):
+        comando = ["xvfb-run", "-a"] + comando  # pantalla virtual para las ventanas Tk
+    resultado = {"script": ruta_script, "estado": "ok", "codigo": None, "proceso_s": None,
+                 "pared_s": None, "cpu_s": None, "rss_mib": None, "importacion_ms": None, "detalle": ""}
+    with tempfile.TemporaryDirectory() as carpeta:
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen(comando, cwd=carpeta, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace",
+                                   start_new_session=(os.name == "posix"))
+        es_servidor = ruta_script in SERVIDORES
+        try:
+            _, errores = proceso.communicate(ENTRADAS.get(ruta_script, ""),
+                                             timeout=SERVIDORES.get(ruta_script, timeout))
+        except subprocess.TimeoutExpired:
+            # Se detiene el grupo entero (xvfb-run, procesos hijos del script...)
+            _detener(proceso)
+            _, errores = proceso.communicate()
+            if not es_servidor:
+                resultado["estado"] = "tiempo agotado"
+        resultado["proceso_s"] = round(time.perf_counter() - inicio, 3)
+    resultado["codigo"] = proceso.returncode
+
+    lineas = errores.splitlines()
+    propias = lineas[lineas.index(MARCA_INICIO) + 1:] if MARCA_INICIO in lineas else []
+    medidas = None
+    for i, linea in enumerate(propias):
+        if linea.startswith(MARCA_RESULTADO):
+            medidas = json.loads(linea[len(MARCA_RESULTADO):])
+            propias = propias[:i]
+            break
+    resultado["importacion_ms"] = round(_tiempo_importacion(propias), 1)
+    if medidas is not None:
+        resultado["pared_s"] = round(medidas["pared"], 3)
+        resultado["cpu_s"] = round(medidas["cpu"], 3)
+        if medidas["rss"] is not None:
+            resultado["rss_mib"] = round(medidas["rss"] / 2 ** 20, 1)
+    if resultado["estado"] == "ok" and proceso.returncode != 0 and not es_servidor:
+        texto = [l for l in lineas if not l.startswith(("import time:", MARCA_INICIO, MARCA_RESULTADO))]
+        resultado["estado"] = "sin pantalla" if usa_tk and "display" in errores.lower() else "error"
+        resultado["detalle"] = texto[-1] if texto else ""
+    return resultado
+
+
+def ejecutar_todos(scripts=None, procesos=None, timeout=60, cierre_ms=1000):
+    """
+    Ejecuta los scripts en paralelo. Cada script corre en su propio proceso (así la CPU y la
+    memoria medidas son solo suyas); un hilo por proceso en marcha basta para esperarlos.
+    Devuelve los resultados en el orden del menú.
+    """
+    if scripts is None:
+        scripts = descubrir_scripts()
+    procesos = procesos or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=procesos) as pool:
+        return list(pool.map(lambda ruta: ejecutar_script(ruta, timeout, cierre_ms), scripts))
+
+
+def imprimir_tabla(resultados):
+    columnas = [("script", "Script"), ("estado", "Estado"), ("pared_s", "Pared s"), ("cpu_s", "CPU s"),
+                ("rss_mib", "RSS MiB"), ("importacion_ms", "Import ms")]
+    filas = [[("" if r[clave] is None else str(r[clave])) for clave, _ in columnas] for r in resultados]
+    anchos = [max(len(titulo), *(len(f[i]) for f in filas)) for i, (_, titulo) in enumerate(columnas)]
+    print("  ".join(titulo.ljust(ancho) for (_, titulo), ancho in zip(columnas, anchos)))
+    print("  ".join("-" * ancho for ancho in anchos))
+    for fila in filas:
+        print("  ".join(celda.ljust(ancho) for celda, ancho in zip(fila, anchos)))
+    for r in resultados:
+        if r["detalle"]:
+            print(f"⚠️ {r['script']}: {r['detalle']}")
+
+
+def modo_ejecucion(argumentos):
+    """python Dashboard.py --ejecutar [--json archivo] [--timeout s] [--procesos n] [--filtro texto]"""
+    import argparse
+
+    analizador = argparse.ArgumentParser(description="Ejecuta y mide todos los scripts del repositorio.")
+    analizador.add_argument("--ejecutar", action="store_true")
+    analizador.add_argument("--json", help="guardar los resultados en este archivo JSON")
+    analizador.add_argument("--timeout", type=float, default=60, help="segundos máximos por script")
+    analizador.add_argument("--procesos", type=int, default=None, help="scripts en paralelo")
+    analizador.add_argument("--cierre-ms", type=int, default=1000, help="tiempo antes de cerrar las ventanas Tk")
+    analizador.add_argument("--filtro", default="", help="solo los scripts cuya ruta contenga este texto")
+    opciones = analizador.parse_args(argumentos)
+
+    scripts = [r for r in descubrir_scripts() if opciones.filtro.casefold() in r.casefold()]
+    resultados = ejecutar_todos(scripts, opciones.procesos, opciones.timeout, opciones.cierre_ms)
+    imprimir_tabla(resultados)
+    if opciones.json:
+        with open(opciones.json, "w", encoding="utf-8") as archivo:
+            json.dump({"python": sys.version.split()[0], "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "resultados": resultados}, archivo, ensure_ascii=False, indent=2)
+    return 0 if all(r["estado"] == "ok" for r in resultados) else 1
+
+
 # Punto de entrada principal del programa
 if __name__ == '__main__':
+    if "--ejecutar" in sys.argv:
+        sys.exit(modo_ejecucion(sys.argv[1:]))
     mostrar_menu()
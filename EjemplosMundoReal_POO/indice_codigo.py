@@ -0,0 +1,286 @@
+"""
+indice_codigo.py
+Índice de clases, métodos, funciones y atributos de los scripts del repositorio (con `ast`).
+
+- Cada archivo se analiza con ast.parse en un pool de procesos; de cada clase se guardan sus
+  bases, métodos y atributos (los de clase y los `self.x = ...` de sus métodos) con su línea.
+- El índice se guarda en JSON en la caché del usuario (~/.cache/indice_codigo/, uno por
+  carpeta raíz, fuera del repositorio) con el mtime y el tamaño de cada script: al actualizar
+  solo se vuelven a analizar los que cambiaron, y se quitan los borrados.
+- Las búsquedas van a un diccionario nombre -> definiciones (sin distinguir mayúsculas), así
+  que "¿qué archivos definen agregar_producto?" es una consulta O(1).
+
+Ejecutar `python indice_codigo.py Inventario agregar_producto` actualiza el índice y busca;
+`python indice_codigo.py --bench` mide el análisis completo, la actualización sin cambios y
+las búsquedas.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+# Caché del usuario (XDG_CACHE_HOME en Linux, LOCALAPPDATA en Windows, si no ~/.cache)
+CARPETA_CACHE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    or os.path.join(os.path.expanduser("~"), ".cache"),
+    "indice_codigo",
+)
+VERSION = 1
+
+# tipo: "clase", "metodo", "funcion" o "atributo"; clase: la que lo contiene (o None)
+Definicion = namedtuple("Definicion", "nombre tipo ruta linea clase")
+
+
+def ruta_cache(raiz):
+    """Archivo del índice de `raiz` en la caché del usuario: uno por carpeta, así no se pisan."""
+    clave = hashlib.sha1(os.path.abspath(raiz).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CARPETA_CACHE, f"{clave}.json")
+
+
+def _atributos_de_metodo(metodo):
+    """Atributos asignados como `self.x = ...` (o con el nombre del primer parámetro) en un método."""
+    if not metodo.args.args:
+        return []
+    propio = metodo.args.args[0].arg
+    encontrados = []
+    for nodo in ast.walk(metodo):
+        if isinstance(nodo, ast.Assign):
+            objetivos = nodo.targets
+        elif isinstance(nodo, (ast.AnnAssign, ast.AugAssign)):
+            objetivos = [nodo.target]
+        else:
+            continue
+        for objetivo in objetivos:
+            for parte in ast.walk(objetivo):  # también `self.a, self.b = ...`
+                if (isinstance(parte, ast.Attribute) and isinstance(parte.value, ast.Name)
+                        and parte.value.id == propio):
+                    encontrados.append((parte.attr, parte.lineno))
+    return encontrados
+
+
+def _describir_clase(nodo):
+    metodos, atributos = [], {}
+    for hijo in nodo.body:
+        if isinstance(hijo, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            metodos.append([hijo.name, hijo.lineno])
+            for nombre, linea in _atributos_de_metodo(hijo):
+                atributos.setdefault(nombre, linea)
+        elif isinstance(hijo, ast.Assign):
+            for objetivo in hijo.targets:
+                if isinstance(objetivo, ast.Name):
+                    atributos.setdefault(objetivo.id, hijo.lineno)
+        elif isinstance(hijo, ast.AnnAssign) and isinstance(hijo.target, ast.Name):
+            atributos.setdefault(hijo.target.id, hijo.lineno)  # campos de @dataclass
+    return {
+        "nombre": nodo.name,
+        "linea": nodo.lineno,
+        "bases": [ast.unparse(base) for base in nodo.bases],
+        "metodos": metodos,
+        "atributos": sorted(([n, l] for n, l in atributos.items()), key=lambda a: a[1]),
+    }
+
+
+def analizar_archivo(ruta):
+    """
+    Analiza un .py (se ejecuta en los procesos del pool) y devuelve sus clases (también las
+    anidadas en funciones o en otras clases) y sus funciones de primer nivel.
+    """
+    try:
+        with open(ruta, "rb") as archivo:
+            arbol = ast.parse(archivo.read(), filename=ruta)
+    except (SyntaxError, ValueError, OSError) as e:
+        return {"clases": [], "funciones": [], "error": f"{type(e).__name__}: {e}"}
+    clases = [_describir_clase(nodo) for nodo in ast.walk(arbol) if isinstance(nodo, ast.ClassDef)]
+    funciones = [[nodo.name, nodo.lineno] for nodo in arbol.body
+                 if isinstance(nodo, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    return {"clases": clases, "funciones": funciones, "error": None}
+
+
+class IndiceCodigo:
+    """Índice persistente de definiciones, invalidado por archivo según su mtime y tamaño."""
+
+    def __init__(self, raiz, ruta_indice=None):
+        self.raiz = raiz
+        self.ruta_indice = ruta_indice or ruta_cache(raiz)
+        self._archivos = {}  # ruta relativa -> {"mtime_ns", "tamano", "clases", "funciones", "error"}
+        self._nombres = {}  # nombre en minúsculas -> [Definicion]
+        self.cargar()
+
+    # ---------- Persistencia ----------
+    def cargar(self):
+        try:
+            with open(self.ruta_indice, "r", encoding="utf-8") as archivo:
+                datos = json.load(archivo)
+        except (OSError, ValueError):
+            datos = {}
+        # Un índice de otra versión o de otra raíz no sirve: se empieza de cero
+        if datos.get("version") == VERSION and datos.get("raiz") == os.path.abspath(self.raiz):
+            self._archivos = datos["archivos"]
+        else:
+            self._archivos = {}
+        self._reconstruir_nombres()
+
+    def guardar(self):
+        datos = {"version": VERSION, "raiz": os.path.abspath(self.raiz), "archivos": self._archivos}
+        os.makedirs(os.path.dirname(self.ruta_indice) or ".", exist_ok=True)
+        temporal = self.ruta_indice + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+        os.replace(temporal, self.ruta_indice)
+
+    # ---------- Actualización ----------
+    def actualizar(self, scripts, procesos=None):
+        """
+        Sincroniza el índice con `scripts` (rutas relativas a la raíz): analiza los nuevos o
+        modificados, quita los que ya no están y guarda si hubo cambios.
+        Devuelve (analizados, eliminados).
+        """
+        cambiados = {}
+        for ruta in scripts:
+            try:
+                info = os.stat(os.path.join(self.raiz, ruta))
+            except OSError:
+                continue
+            previo = self._archivos.get(ruta)
+            if previo is None or previo["mtime_ns"] != info.st_mtime_ns or previo["tamano"] != info.st_size:
+                cambiados[ruta] = info
+        vigentes = set(scripts)
+        eliminados = [ruta for ruta in self._archivos if ruta not in vigentes]
+        for ruta in eliminados:
+            del self._archivos[ruta]
+        if not cambiados and not eliminados:
+            return 0, 0
+
+        rutas = list(cambiados)
+        absolutas = [os.path.join(self.raiz, ruta) for ruta in rutas]
+        procesos = procesos or os.cpu_count() or 1
+        if procesos == 1 or len(rutas) < 4:
+            # Con un núcleo o pocos archivos el pool solo añadiría el coste de arrancar procesos
+            resultados = map(analizar_archivo, absolutas)
+        else:
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                resultados = list(pool.map(analizar_archivo, absolutas,
+                                           chunksize=max(1, len(rutas) // (4 * procesos))))
+        for ruta, resultado in zip(rutas, resultados):
+            info = cambiados[ruta]
+            self._archivos[ruta] = dict(resultado, mtime_ns=info.st_mtime_ns, tamano=info.st_size)
+        self._reconstruir_nombres()
+        try:
+            self.guardar()
+        except OSError:
+            pass  # sin caché escribible el índice sigue sirviendo en memoria; se rehará la próxima vez
+        return len(rutas), len(eliminados)
+
+    def _reconstruir_nombres(self):
+        nombres = {}
+
+        def anotar(nombre, tipo, ruta, linea, clase=None):
+            nombres.setdefault(nombre.casefold(), []).append(Definicion(nombre, tipo, ruta, linea, clase))
+
+        for ruta, datos in sorted(self._archivos.items()):
+            for nombre, linea in datos["funciones"]:
+                anotar(nombre, "funcion", ruta, linea)
+            for clase in datos["clases"]:
+                anotar(clase["nombre"], "clase", ruta, clase["linea"])
+                for nombre, linea in clase["metodos"]:
+                    anotar(nombre, "metodo", ruta, linea, clase["nombre"])
+                for nombre, linea in clase["atributos"]:
+                    anotar(nombre, "atributo", ruta, linea, clase["nombre"])
+        self._nombres = nombres
+
+    # ---------- Consultas ----------
+    def __len__(self):
+        return len(self._archivos)
+
+    def buscar(self, nombre, tipo=None):
+        """Definiciones con ese nombre (sin distinguir mayúsculas), opcionalmente de un solo tipo."""
+        definiciones = self._nombres.get(nombre.casefold(), [])
+        return [d for d in definiciones if tipo is None or d.tipo == tipo]
+
+    def archivos_que_definen(self, nombre, tipo=None):
+        """Rutas (ordenadas) de los archivos que definen `nombre`."""
+        return sorted({d.ruta for d in self.buscar(nombre, tipo)})
+
+    def clases(self, nombre):
+        """Cada definición de la clase `nombre`: [(ruta, descripción con bases, métodos y atributos)]."""
+        return [(d.ruta, clase) for d in self.buscar(nombre, "clase")
+                for clase in self._archivos[d.ruta]["clases"]
+                if clase["nombre"] == d.nombre and clase["linea"] == d.linea]
+
+    def errores(self):
+        """Archivos que no se pudieron analizar: {ruta: motivo}."""
+        return {ruta: datos["error"] for ruta, datos in self._archivos.items() if datos["error"]}
+
+
+# ====== MEDICIÓN ======
+def medir_indice(copias=40):
+    """
+    Indexa `copias` copias de los scripts del repositorio (para tener algo más de volumen) en una
+    carpeta temporal: análisis completo en serie y con el pool, actualización sin cambios y
+    con un archivo modificado, y coste de una búsqueda.
+    """
+    import shutil
+    import tempfile
+
+    from Dashboard import RAIZ, descubrir_scripts
+
+    originales = descubrir_scripts(RAIZ)
+    with tempfile.TemporaryDirectory() as tmp:
+        scripts = []
+        for i in range(copias):
+            for ruta in originales:
+                destino = os.path.join(f"copia{i}", ruta)
+                os.makedirs(os.path.join(tmp, os.path.dirname(destino)), exist_ok=True)
+                shutil.copyfile(os.path.join(RAIZ, ruta), os.path.join(tmp, destino))
+                scripts.append(destino)
+        resultados = {"archivos": len(scripts), "procesos": os.cpu_count()}
+        for modo, procesos in (("serie", 1), ("pool", None)):
+            ruta_indice = os.path.join(tmp, f"indice_{modo}.json")
+            inicio = time.perf_counter()
+            IndiceCodigo(tmp, ruta_indice).actualizar(scripts, procesos)
+            resultados[f"completo_{modo}_s"] = round(time.perf_counter() - inicio, 3)
+
+        inicio = time.perf_counter()
+        indice = IndiceCodigo(tmp, ruta_indice)
+        resultados["cargar_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        inicio = time.perf_counter()
+        indice.actualizar(scripts)
+        resultados["sin_cambios_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        with open(os.path.join(tmp, scripts[0]), "a", encoding="utf-8") as archivo:
+            archivo.write("\n\nclass Agregada:\n    pass\n")
+        inicio = time.perf_counter()
+        analizados, _ = indice.actualizar(scripts)
+        resultados["un_cambio_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        resultados["un_cambio_analizados"] = analizados
+
+        n = 100_000
+        inicio = time.perf_counter()
+        for _ in range(n):
+            indice.archivos_que_definen("agregar_producto")
+        resultados["busqueda_us"] = round((time.perf_counter() - inicio) / n * 1e6, 2)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_indice())
+        sys.exit(0)
+
+    from Dashboard import RAIZ, descubrir_scripts
+
+    indice = IndiceCodigo(RAIZ)
+    analizados, eliminados = indice.actualizar(descubrir_scripts(RAIZ))
+    print(f"Índice: {len(indice)} archivos ({analizados} analizados, {eliminados} eliminados)")
+    for ruta, motivo in indice.errores().items():
+        print(f"⚠️ {ruta}: {motivo}")
+    for nombre in sys.argv[1:]:
+        print(f"\n🔎 {nombre}")
+        for d in indice.buscar(nombre):
+            dentro = f" (en {d.clase})" if d.clase else ""
+            print(f"  {d.ruta}:{d.linea}  {d.tipo}{dentro}")
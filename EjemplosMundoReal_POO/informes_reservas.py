@@ -0,0 +1,221 @@
+"""
+informes_reservas.py
+Informes de ocupación e ingresos de SistemaReservas por tipo de habitación y periodo.
+
+InformeReservas copia el sistema a columnas (una fila por habitación: tipo y precio; una fila
+por reserva: habitación, día de entrada y de salida) y calcula, para cada tipo y cada día,
+en pasadas vectorizadas con NumPy:
+
+- noches ocupadas e ingresos: cada reserva suma +1 (y +precio) el día de entrada y -1 el de
+  salida en una rejilla tipo x día (np.bincount); la suma acumulada por días da las
+  habitaciones ocupadas cada noche, sin expandir las reservas noche a noche;
+- después se agrupa por periodo (día, semana o mes) con np.add.reduceat.
+
+De ahí salen la ocupación (noches ocupadas / noches disponibles), los ingresos, la tarifa
+media (ADR = ingresos / noches ocupadas) y el RevPAR (ingresos / noches disponibles).
+Solo cuentan las reservas por fechas; el precio de cada noche es el de la habitación.
+
+NumPy es opcional: sin él se usa un bucle equivalente (mucho más lento).
+Ejecutar `python informes_reservas.py --bench` compara ambos con 10.000 habitaciones y un año.
+"""
+
+import time
+from datetime import date, timedelta
+
+from sistema_reservas import Cliente, Habitacion, SistemaReservas
+
+# NumPy es opcional: solo acelera los informes.
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    NUMPY_DISPONIBLE = False
+
+PERIODOS = ("dia", "semana", "mes")
+
+
+def _inicio_periodo(dia, periodo):
+    """Primer día del periodo (lunes de la semana, día 1 del mes) que contiene `dia`."""
+    if periodo == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if periodo == "mes":
+        return dia.replace(day=1)
+    return dia
+
+
+class InformeReservas:
+    """Copia en columnas de un SistemaReservas para calcular informes en pasadas vectorizadas."""
+
+    def __init__(self, sistema, usar_numpy=True):
+        self.sistema = sistema
+        self.usar_numpy = usar_numpy and NUMPY_DISPONIBLE
+        self.actualizar()
+
+    def actualizar(self):
+        """Vuelve a copiar habitaciones y reservas del sistema (tras cambios en las reservas)."""
+        habitaciones = list(self.sistema.habitaciones)
+        self.tipos = self.sistema.tipos()
+        codigo = {tipo: i for i, tipo in enumerate(self.tipos)}
+        fila_de = {h.numero: i for i, h in enumerate(habitaciones)}
+        reservas = list(self.sistema.estancias.values())
+        tipo_fila = [codigo[h.tipo] for h in habitaciones]
+        precio_fila = [h.precio for h in habitaciones]
+        filas = [fila_de[r.numero] for r in reservas]
+        entradas = [r.entrada.toordinal() for r in reservas]
+        salidas = [r.salida.toordinal() for r in reservas]
+        if self.usar_numpy:
+            self._tipo_fila = np.array(tipo_fila, dtype=np.int16)
+            self._precio_fila = np.array(precio_fila, dtype=np.float64)
+            self._filas = np.array(filas, dtype=np.int32)
+            self._entradas = np.array(entradas, dtype=np.int32)
+            self._salidas = np.array(salidas, dtype=np.int32)
+        else:
+            self._tipo_fila, self._precio_fila = tipo_fila, precio_fila
+            self._filas, self._entradas, self._salidas = filas, entradas, salidas
+
+    # ---------- Rejilla tipo x día ----------
+    def _rejilla_numpy(self, d0, dias):
+        n_tipos = len(self.tipos)
+        a = np.clip(self._entradas - d0, 0, dias)
+        b = np.clip(self._salidas - d0, 0, dias)
+        dentro = a < b  # reservas con alguna noche dentro del rango
+        filas = self._filas[dentro]
+        tipo = self._tipo_fila[filas].astype(np.int64)
+        precio = self._precio_fila[filas]
+        a, b = a[dentro], b[dentro]
+        # +1 en la entrada y -1 en la salida de cada reserva; la suma acumulada da la ocupación
+        ancho = dias + 1
+        tamano = n_tipos * ancho
+        delta = (np.bincount(tipo * ancho + a, minlength=tamano)
+                 - np.bincount(tipo * ancho + b, minlength=tamano))
+        delta_ingresos = (np.bincount(tipo * ancho + a, weights=precio, minlength=tamano)
+                          - np.bincount(tipo * ancho + b, weights=precio, minlength=tamano))
+        ocupadas = np.cumsum(delta.reshape(n_tipos, ancho), axis=1)[:, :dias]
+        ingresos = np.cumsum(delta_ingresos.reshape(n_tipos, ancho), axis=1)[:, :dias]
+        habitaciones = np.bincount(self._tipo_fila, minlength=n_tipos)
+        return ocupadas, ingresos, habitaciones
+
+    def _rejilla_python(self, d0, dias):
+        n_tipos = len(self.tipos)
+        ocupadas = [[0] * dias for _ in range(n_tipos)]
+        ingresos = [[0.0] * dias for _ in range(n_tipos)]
+        for fila, entrada, salida in zip(self._filas, self._entradas, self._salidas):
+            tipo, precio = self._tipo_fila[fila], self._precio_fila[fila]
+            fila_ocupadas, fila_ingresos = ocupadas[tipo], ingresos[tipo]
+            for dia in range(max(entrada - d0, 0), min(salida - d0, dias)):
+                fila_ocupadas[dia] += 1
+                fila_ingresos[dia] += precio
+        habitaciones = [0] * n_tipos
+        for tipo in self._tipo_fila:
+            habitaciones[tipo] += 1
+        return ocupadas, ingresos, habitaciones
+
+    # ---------- Informe ----------
+    def informe(self, desde, hasta, periodo="mes"):
+        """
+        Filas {tipo, periodo, noches_disponibles, noches_ocupadas, ocupacion, ingresos, adr,
+        revpar} para las noches desde `desde` hasta `hasta` (sin incluirla), agrupadas por
+        "dia", "semana" o "mes" (el periodo se identifica por su primer día).
+        """
+        if periodo not in PERIODOS:
+            raise ValueError(f"Periodo desconocido: {periodo!r} (use {', '.join(PERIODOS)})")
+        d0, dias = desde.toordinal(), (hasta - desde).days
+        if dias <= 0:
+            return []
+        # Primer día de cada periodo y cuántos días del rango caen en él
+        claves = [_inicio_periodo(date.fromordinal(d0 + i), periodo) for i in range(dias)]
+        cortes = [i for i in range(dias) if i == 0 or claves[i] != claves[i - 1]]
+        longitudes = [fin - inicio for inicio, fin in zip(cortes, cortes[1:] + [dias])]
+
+        if self.usar_numpy:
+            ocupadas, ingresos, habitaciones = self._rejilla_numpy(d0, dias)
+            ocupadas = np.add.reduceat(ocupadas, cortes, axis=1).tolist()
+            ingresos = np.add.reduceat(ingresos, cortes, axis=1).tolist()
+            habitaciones = habitaciones.tolist()
+        else:
+            ocupadas, ingresos, habitaciones = self._rejilla_python(d0, dias)
+            limites = list(zip(cortes, cortes[1:] + [dias]))
+            ocupadas = [[sum(fila[i:j]) for i, j in limites] for fila in ocupadas]
+            ingresos = [[sum(fila[i:j]) for i, j in limites] for fila in ingresos]
+
+        filas = []
+        for t, tipo in enumerate(self.tipos):
+            for k, inicio in enumerate(cortes):
+                disponibles = habitaciones[t] * longitudes[k]
+                noches, dinero = int(ocupadas[t][k]), float(ingresos[t][k])
+                filas.append({
+                    "tipo": tipo,
+                    "periodo": claves[inicio],
+                    "noches_disponibles": disponibles,
+                    "noches_ocupadas": noches,
+                    "ocupacion": noches / disponibles if disponibles else 0.0,
+                    "ingresos": round(dinero, 2),
+                    "adr": round(dinero / noches, 2) if noches else 0.0,
+                    "revpar": round(dinero / disponibles, 2) if disponibles else 0.0,
+                })
+        return filas
+
+
+def imprimir_informe(filas):
+    print(f"{'Tipo':<12}{'Periodo':<12}{'Ocupación':>10}{'Ingresos':>14}{'ADR':>10}{'RevPAR':>10}")
+    for f in filas:
+        print(f"{f['tipo']:<12}{f['periodo'].isoformat():<12}{f['ocupacion']:>10.1%}"
+              f"{f['ingresos']:>14,.2f}{f['adr']:>10.2f}{f['revpar']:>10.2f}")
+
+
+# ====== MEDICIÓN ======
+def _cadena_sintetica(n, dias, ocupacion=0.65, seed=13):
+    import random
+
+    azar = random.Random(seed)
+    tipos = {"Individual": (40, 90), "Doble": (70, 160), "Suite": (150, 600)}
+    sistema = SistemaReservas()
+    for numero in range(1, n + 1):
+        tipo = azar.choice(list(tipos))
+        sistema.agregar_habitacion(Habitacion(numero, tipo, azar.randint(*tipos[tipo])))
+    cliente = Cliente("Cadena", "0")
+    inicio = date(2026, 1, 1)
+    for numero in range(1, n + 1):
+        dia = azar.randint(0, 3)
+        while True:
+            noches = azar.randint(1, 7)
+            if dia + noches > dias:
+                break
+            entrada = inicio + timedelta(days=dia)
+            sistema.reservar_fechas(cliente, numero, entrada, entrada + timedelta(days=noches))
+            dia += noches + azar.randint(0, round(2 * noches * (1 / ocupacion - 1)))
+    return sistema, inicio
+
+
+def medir_informes(n=10_000, dias=365):
+    """Copia a columnas e informe diario, semanal y mensual, con NumPy y con el bucle."""
+    sistema, inicio = _cadena_sintetica(n, dias)
+    fin = inicio + timedelta(days=dias)
+    resultados = {"habitaciones": n, "dias": dias, "reservas": len(sistema.estancias)}
+    referencia = None
+    for usar_numpy in ((True, False) if NUMPY_DISPONIBLE else (False,)):
+        modo = "numpy" if usar_numpy else "python"
+        t = time.perf_counter()
+        informe = InformeReservas(sistema, usar_numpy)
+        resultados[f"{modo}_copia_s"] = round(time.perf_counter() - t, 3)
+        for periodo in PERIODOS:
+            t = time.perf_counter()
+            filas = informe.informe(inicio, fin, periodo)
+            resultados[f"{modo}_{periodo}_s"] = round(time.perf_counter() - t, 3)
+        if referencia is None:
+            referencia = filas
+        else:  # los dos caminos dan el mismo informe mensual
+            assert [(f["noches_ocupadas"], f["ingresos"]) for f in filas] == \
+                   [(f["noches_ocupadas"], f["ingresos"]) for f in referencia]
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_informes())
+        sys.exit(0)
+
+    sistema, inicio = _cadena_sintetica(300, 90)
+    imprimir_informe(InformeReservas(sistema).informe(inicio, inicio + timedelta(days=90), "mes"))
@@ -0,0 +1,348 @@
+"""
+reservas_concurrentes.py
+Núcleo de reservas por fechas seguro con muchas peticiones a la vez, y prueba de carga.
+
+`Habitacion.reservar` comprueba `disponible` y luego lo cambia: con dos hilos a la vez ambos
+pueden ver la habitación libre y reservarla dos veces. MotorReservas envuelve un
+SistemaReservas con cerrojos repartidos (striped locks):
+
+- Cerrojos de habitación: `franjas` cerrojos y cada habitación usa el de su número módulo
+  `franjas`. Bajo él se comprueba que las noches estén libres y se apartan en el índice de la
+  habitación (SistemaReservas._apartar): comprobar y apartar es atómico, así que dos peticiones
+  sobre la misma habitación nunca pueden pasar las dos. Peticiones sobre habitaciones de
+  franjas distintas no se esperan entre sí.
+- Cerrojo de tipo: las máscaras por noche son compartidas por todas las habitaciones del tipo
+  (son enteros que se reemplazan: leer-OR-escribir), así que se actualizan bajo un cerrojo
+  por tipo, que solo cubre ese paso corto. Se toma sin soltar el de la habitación (siempre
+  primero el de habitación y después el de tipo, así no hay bloqueos mutuos): si no, una
+  cancelación y una nueva reserva de las mismas noches podrían tocar las máscaras en
+  distinto orden que el índice de la habitación.
+- Las reservas sin fechas (`hacer_reserva`, `liberar`) pasan por los mismos dos cerrojos:
+  el de habitación hace atómico comprobar y cambiar `disponible` (y que una reserva por
+  fechas no la reserve a la vez), y el de tipo protege los índices de libres del tipo.
+  Llamar directamente a Habitacion.reservar o SistemaReservas.hacer_reserva desde varios
+  hilos no es seguro.
+
+Los cerrojos cuentan cuántas veces hubo que esperar (contención). `comprobar_sin_solapes`
+revisa, desde cero, que ninguna habitación tenga dos reservas en la misma noche y que las
+máscaras y los índices de libres cuadren con las reservas.
+
+Ejecutar `python reservas_concurrentes.py --bench` lanza la carga (reservas, cancelaciones y
+reservas sin fechas mezcladas) con un pool de hilos y con asyncio, y también sin cerrojos
+para comparar.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sistema_reservas import Cliente, Habitacion, SistemaReservas
+
+
+class _Cerrojo:
+    """threading.Lock que cuenta adquisiciones y esperas (los contadores se tocan con el cerrojo tomado)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.adquisiciones = 0
+        self.esperas = 0
+
+    def __enter__(self):
+        if not self._lock.acquire(blocking=False):
+            self._lock.acquire()
+            self.esperas += 1
+        self.adquisiciones += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class MotorReservas:
+    """Reservas y cancelaciones por fechas con cerrojos por franja de habitaciones y por tipo."""
+
+    def __init__(self, sistema, franjas=64):
+        self.sistema = sistema
+        self._franjas = [_Cerrojo() for _ in range(franjas)]
+        self._por_tipo = {tipo: _Cerrojo() for tipo in sistema.tipos()}
+
+    def _franja(self, numero):
+        return self._franjas[hash(numero) % len(self._franjas)]
+
+    def reservar(self, cliente, numero_habitacion, entrada, salida):
+        """Como SistemaReservas.reservar_fechas, pero se puede llamar desde varios hilos a la vez."""
+        if salida <= entrada:
+            raise ValueError("La fecha de salida debe ser posterior a la de entrada.")
+        sistema = self.sistema
+        h = sistema.habitacion(numero_habitacion)
+        if h is None:
+            return None
+        with self._franja(h.numero):
+            if not h.disponible or not h.libre_entre(entrada, salida):
+                return None
+            reserva = sistema._apartar(h, cliente, entrada, salida)
+            with self._por_tipo[h.tipo]:
+                sistema._anotar_noches(reserva)
+        return reserva
+
+    def cancelar(self, id_reserva):
+        sistema = self.sistema
+        reserva = sistema.estancias.get(id_reserva)
+        if reserva is None:
+            return None
+        with self._franja(reserva.numero):
+            if id_reserva not in sistema.estancias:  # otro hilo la canceló mientras esperábamos
+                return None
+            sistema._soltar(id_reserva)
+            with self._por_tipo[sistema.habitacion(reserva.numero).tipo]:
+                sistema._borrar_noches(reserva)
+        return reserva
+
+    def hacer_reserva(self, cliente, numero_habitacion):
+        """Como SistemaReservas.hacer_reserva (sin fechas), bajo el cerrojo de la habitación y el del tipo."""
+        h = self.sistema.habitacion(numero_habitacion)
+        if h is None:
+            return False
+        with self._franja(h.numero), self._por_tipo[h.tipo]:
+            return self.sistema.hacer_reserva(cliente, numero_habitacion)
+
+    def liberar(self, numero_habitacion):
+        """Como Habitacion.liberar, bajo el cerrojo de la habitación y el del tipo."""
+        h = self.sistema.habitacion(numero_habitacion)
+        if h is None:
+            return False
+        with self._franja(h.numero), self._por_tipo[h.tipo]:
+            if h.disponible:
+                return False
+            h.liberar()
+            return True
+
+    def contencion(self):
+        """Fracción de adquisiciones de cerrojo que tuvieron que esperar a otro hilo."""
+        cerrojos = self._franjas + list(self._por_tipo.values())
+        adquisiciones = sum(c.adquisiciones for c in cerrojos)
+        return sum(c.esperas for c in cerrojos) / adquisiciones if adquisiciones else 0.0
+
+
+def comprobar_sin_solapes(sistema):
+    """
+    Revisa desde cero (a partir de `sistema.estancias`) que ninguna habitación esté reservada
+    dos veces la misma noche y que los índices coincidan. Devuelve la lista de problemas.
+    """
+    problemas = []
+    por_habitacion = {}
+    for reserva in sistema.estancias.values():
+        por_habitacion.setdefault(reserva.numero, []).append(reserva)
+    mascaras = {tipo: {} for tipo in sistema.tipos()}
+    for numero, reservas in por_habitacion.items():
+        reservas.sort(key=lambda r: r.entrada)
+        for anterior, siguiente in zip(reservas, reservas[1:]):
+            if siguiente.entrada < anterior.salida:
+                problemas.append(f"Habitación {numero}: reservas {anterior.id} y {siguiente.id} se solapan")
+        h = sistema.habitacion(numero)
+        if h._ids_estancia != [r.id for r in reservas]:
+            problemas.append(f"Habitación {numero}: su índice de estancias no coincide con las reservas")
+        bit = 1 << sistema._posicion[numero]
+        dias = mascaras[h.tipo]
+        for reserva in reservas:
+            for dia in range(reserva.entrada.toordinal(), reserva.salida.toordinal()):
+                dias[dia] = dias.get(dia, 0) | bit
+    for tipo, dias in mascaras.items():
+        if dias != sistema._ocupadas_por_dia[tipo]:
+            problemas.append(f"Tipo {tipo}: las máscaras por noche no coinciden con las reservas")
+    # Reservas sin fechas: los índices de libres y la máscara de bloqueadas deben cuadrar con `disponible`
+    for tipo in sistema.tipos():
+        habitaciones = [h for h in sistema.habitaciones if h.tipo == tipo]
+        libres = {h.numero for h in habitaciones if h.disponible}
+        bloqueadas = sum(1 << sistema._posicion[h.numero] for h in habitaciones if not h.disponible)
+        if (libres != sistema._libres[tipo] or bloqueadas != sistema._bloqueadas[tipo]
+                or sorted((h.precio, h.numero) for h in habitaciones if h.disponible)
+                != sistema._libres_por_precio[tipo]):
+            problemas.append(f"Tipo {tipo}: los índices de habitaciones libres no coinciden con `disponible`")
+    return problemas
+
+
+# ====== PRUEBA DE CARGA ======
+def generar_peticiones(sistema, n, dias=90, calientes=0.2, cancelaciones=0.3, sin_fechas=0.02, seed=3):
+    """
+    `n` peticiones (operación, argumentos):
+    - ("reservar", (cliente, número, entrada, salida)): de 1 a 7 noches dentro de `dias` días;
+      una fracción `calientes` va al 1 % de las habitaciones, para provocar choques;
+    - ("cancelar", (id,)): una fracción `cancelaciones`, con ids de reservas probablemente ya
+      hechas (puede que ya no existan o que otro hilo las cancele a la vez);
+    - ("hacer_reserva", (cliente, número)) y ("liberar", (número,)): una fracción `sin_fechas`,
+      reservas sin fechas de habitaciones calientes y su liberación.
+    """
+    import random
+    from datetime import date, timedelta
+
+    azar = random.Random(seed)
+    numeros = [h.numero for h in sistema.habitaciones]
+    populares = numeros[:max(1, len(numeros) // 100)]
+    hoy = date(2026, 12, 1)
+    peticiones = []
+    reservadas_sin_fechas = []
+    for i in range(n):
+        cliente = Cliente(f"Cliente {i}", str(i))
+        tirada = azar.random()
+        if tirada < sin_fechas:
+            if reservadas_sin_fechas and tirada < sin_fechas / 2:
+                peticiones.append(("liberar", (reservadas_sin_fechas.pop(),)))
+            else:
+                numero = azar.choice(populares)
+                reservadas_sin_fechas.append(numero)
+                peticiones.append(("hacer_reserva", (cliente, numero)))
+        elif tirada < sin_fechas + cancelaciones:
+            peticiones.append(("cancelar", (azar.randint(1, max(1, i // 2)),)))
+        else:
+            numero = azar.choice(populares if azar.random() < calientes else numeros)
+            entrada = hoy + timedelta(days=azar.randrange(dias))
+            peticiones.append(("reservar", (cliente, numero, entrada,
+                                            entrada + timedelta(days=azar.randint(1, 7)))))
+    return peticiones
+
+
+def _resumen(nombre, latencias, exitos, segundos):
+    latencias.sort()
+    return {
+        "modo": nombre,
+        "peticiones": len(latencias),
+        "reservas": exitos.get("reservar", 0),
+        "cancelaciones": exitos.get("cancelar", 0),
+        "sin_fechas": exitos.get("hacer_reserva", 0),
+        "reservas_por_s": round(exitos.get("reservar", 0) / segundos),
+        "peticiones_por_s": round(len(latencias) / segundos),
+        "p50_us": round(latencias[len(latencias) // 2] * 1e6, 1),
+        "p99_us": round(latencias[int(len(latencias) * 0.99)] * 1e6, 1),
+    }
+
+
+def carga_hilos(operaciones, peticiones, hilos=8):
+    """
+    Reparte las peticiones entre `hilos` hilos; cada uno mide la latencia de las suyas.
+    `operaciones` da la función de cada operación ("reservar", "cancelar", ...).
+    """
+    def trabajar(parte):
+        latencias, exitos = [], {}
+        for operacion, argumentos in parte:
+            inicio = time.perf_counter()
+            resultado = operaciones[operacion](*argumentos)
+            latencias.append(time.perf_counter() - inicio)
+            if resultado:
+                exitos[operacion] = exitos.get(operacion, 0) + 1
+        return latencias, exitos
+
+    partes = [peticiones[i::hilos] for i in range(hilos)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        resultados = list(pool.map(trabajar, partes))
+    segundos = time.perf_counter() - inicio
+    latencias = [l for parte, _ in resultados for l in parte]
+    exitos = {}
+    for _, parte in resultados:
+        for operacion, cuantas in parte.items():
+            exitos[operacion] = exitos.get(operacion, 0) + cuantas
+    return _resumen(f"hilos x{hilos}", latencias, exitos, segundos)
+
+
+async def _carga_asyncio(operaciones, peticiones, concurrencia, hilos):
+    bucle = asyncio.get_running_loop()
+    limite = asyncio.Semaphore(concurrencia)
+    latencias = []
+    exitos = {}
+
+    async def pedir(operacion, argumentos):
+        async with limite:
+            inicio = time.perf_counter()  # incluye la espera en la cola del pool, como vería un cliente
+            resultado = await bucle.run_in_executor(pool, operaciones[operacion], *argumentos)
+            latencias.append(time.perf_counter() - inicio)
+            if resultado:
+                exitos[operacion] = exitos.get(operacion, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(pedir(*p) for p in peticiones))
+        segundos = time.perf_counter() - inicio
+    return _resumen(f"asyncio c{concurrencia}", latencias, exitos, segundos)
+
+
+def carga_asyncio(operaciones, peticiones, concurrencia=100, hilos=8):
+    """Clientes asyncio (como mucho `concurrencia` en vuelo) que llaman a las operaciones en un pool de hilos."""
+    return asyncio.run(_carga_asyncio(operaciones, peticiones, concurrencia, hilos))
+
+
+def _operaciones(motor):
+    return {"reservar": motor.reservar, "cancelar": motor.cancelar,
+            "hacer_reserva": motor.hacer_reserva, "liberar": motor.liberar}
+
+
+def _operaciones_sin_cerrojos(sistema):
+    """Las mismas operaciones directamente sobre SistemaReservas; una carrera puede hacerlas fallar a medias."""
+    def sin_excepciones(funcion):
+        def llamar(*argumentos):
+            try:
+                return funcion(*argumentos)
+            except (KeyError, ValueError, IndexError):
+                return None
+        return llamar
+
+    def liberar(numero):
+        sistema.habitacion(numero).liberar()
+        return True
+
+    return {"reservar": sistema.reservar_fechas, "cancelar": sin_excepciones(sistema.cancelar_reserva),
+            "hacer_reserva": sistema.hacer_reserva, "liberar": sin_excepciones(liberar)}
+
+
+def _sistema_de_prueba(n):
+    sistema = SistemaReservas()
+    for numero in range(1, n + 1):
+        tipo = ("Individual", "Doble", "Suite")[numero % 3]
+        sistema.agregar_habitacion(Habitacion(numero, tipo, 50 + numero % 200))
+    return sistema
+
+
+def medir_concurrencia(habitaciones=2_000, peticiones=100_000, hilos=8):
+    """
+    Lanza la misma carga (reservas, cancelaciones y reservas sin fechas) con el pool de hilos y
+    con asyncio sobre MotorReservas, y con hilos llamando directamente a SistemaReservas (sin
+    cerrojos). El intervalo de cambio de hilo se baja a 1 µs para que los hilos se intercalen
+    todo lo posible. Los mensajes que imprimen las reservas sin fechas se descartan.
+    """
+    import contextlib
+    import io
+    import sys
+
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    resultados = []
+    try:
+        for modo in ("hilos", "asyncio", "sin cerrojos"):
+            sistema = _sistema_de_prueba(habitaciones)
+            carga = generar_peticiones(sistema, peticiones)
+            motor = MotorReservas(sistema)
+            with contextlib.redirect_stdout(io.StringIO()):
+                if modo == "hilos":
+                    fila = carga_hilos(_operaciones(motor), carga, hilos)
+                elif modo == "asyncio":
+                    fila = carga_asyncio(_operaciones(motor), carga, hilos=hilos)
+                else:
+                    fila = carga_hilos(_operaciones_sin_cerrojos(sistema), carga, hilos)
+                    fila["modo"] += " sin cerrojos"
+            fila["contencion_pct"] = round(100 * motor.contencion(), 2)
+            fila["problemas"] = len(comprobar_sin_solapes(sistema))
+            resultados.append(fila)
+    finally:
+        sys.setswitchinterval(intervalo)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        for fila in medir_concurrencia():
+            print(fila)
+        sys.exit(0)
+    print(__doc__)
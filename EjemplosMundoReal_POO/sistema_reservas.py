@@ -0,0 +1,449 @@
+# sistema_reservas.py
+"""
+Modelo del sistema de reservas de hotel (Habitacion, Cliente, SistemaReservas) con índices:
+
+- `_por_numero`: número -> Habitacion, para encontrar una habitación en O(1) en vez de
+  recorrer la lista.
+- Por cada tipo, el conjunto de números libres y una lista ordenada (precio, número) de las
+  habitaciones libres. La habitación avisa a su sistema al reservarse o liberarse, así que los
+  índices siempre están al día sin recorrer nada.
+- "La primera Suite libre por menos de $X" es la primera de la lista ordenada por precio:
+  bisect en O(log n).
+
+Reservas por fechas (`reservar_fechas`, `cancelar_reserva`, `libres_entre`): además del
+`disponible` de siempre (reservada sin fechas), cada habitación guarda sus estancias ordenadas
+por fecha de entrada (índice de intervalos: comprobar un choque es un bisect), y cada tipo
+guarda, por noche, una máscara de bits con las habitaciones ocupadas (un bit por habitación
+del tipo). "¿Qué Dobles están libres del 20/12 al 03/01?" es el OR de las máscaras de esas
+noches: unas pocas operaciones sobre enteros, sin recorrer las habitaciones.
+
+SistemaReservas no usa cerrojos: con varios hilos, tanto las reservas por fechas como las
+de siempre (`hacer_reserva`, `Habitacion.reservar`/`liberar`) deben pasar por MotorReservas
+(reservas_concurrentes.py).
+
+Ejecutar `python sistema_reservas.py --bench` compara con los recorridos lineales para 100.000
+habitaciones, y `--bench-fechas` mide las consultas por fechas con 2 años de reservas.
+"""
+
+import itertools
+from bisect import bisect_left, bisect_right, insort
+
+
+def _posiciones(mascara):
+    """Posiciones de los bits a 1 de `mascara`, de menor a mayor (las busca str.find, en C)."""
+    bits = format(mascara, "b")[::-1]
+    posiciones = []
+    i = bits.find("1")
+    while i >= 0:
+        posiciones.append(i)
+        i = bits.find("1", i + 1)
+    return posiciones
+
+
+# Clase que representa una habitación de hotel
+class Habitacion:
+    def __init__(self, numero, tipo, precio):
+        self.numero = numero
+        self.tipo = tipo
+        self.precio = precio
+        self.disponible = True
+        self._sistema = None  # El sistema al que pertenece (mantiene sus índices de disponibilidad)
+        # Estancias por fechas, ordenadas por entrada (los días son date.toordinal()).
+        # No se solapan, así que las salidas también quedan ordenadas.
+        self._entradas = []
+        self._salidas = []
+        self._ids_estancia = []
+
+    def reservar(self):
+        if self.disponible:
+            self.disponible = False
+            if self._sistema is not None:
+                self._sistema._al_cambiar_disponibilidad(self)
+            print(f"Habitación {self.numero} reservada con éxito.")
+            return True
+        print(f"La habitación {self.numero} no está disponible.")
+        return False
+
+    def liberar(self):
+        if not self.disponible:
+            self.disponible = True
+            if self._sistema is not None:
+                self._sistema._al_cambiar_disponibilidad(self)
+        print(f"Habitación {self.numero} ahora está disponible.")
+
+    def libre_entre(self, entrada, salida):
+        """¿Está libre todas las noches desde `entrada` hasta `salida` (sin incluirla)? O(log k)."""
+        a, b = entrada.toordinal(), salida.toordinal()
+        i = bisect_right(self._entradas, a)
+        # La estancia anterior no debe seguir después de `a` ni la siguiente empezar antes de `b`
+        if i > 0 and self._salidas[i - 1] > a:
+            return False
+        return i == len(self._entradas) or self._entradas[i] >= b
+
+    def _agregar_estancia(self, a, b, id_reserva):
+        i = bisect_right(self._entradas, a)
+        self._entradas.insert(i, a)
+        self._salidas.insert(i, b)
+        self._ids_estancia.insert(i, id_reserva)
+
+    def _quitar_estancia(self, a):
+        i = bisect_left(self._entradas, a)
+        del self._entradas[i], self._salidas[i], self._ids_estancia[i]
+
+
+# Reserva de una habitación para unas fechas
+class Reserva:
+    """Estancia de un cliente: las noches desde `entrada` hasta `salida` (el día de salida no cuenta)."""
+
+    def __init__(self, id, cliente, numero, entrada, salida):
+        self.id = id
+        self.cliente = cliente  # identificación del cliente
+        self.numero = numero
+        self.entrada = entrada
+        self.salida = salida
+
+    @property
+    def noches(self):
+        return (self.salida - self.entrada).days
+
+
+# Clase que representa un cliente
+class Cliente:
+    def __init__(self, nombre, identificacion):
+        self.nombre = nombre
+        self.identificacion = identificacion
+
+
+# Clase que gestiona el sistema de reservas
+class SistemaReservas:
+    def __init__(self):
+        self._por_numero = {}  # número -> Habitacion
+        self._libres = {}  # tipo -> {números libres}
+        self._libres_por_precio = {}  # tipo -> [(precio, número)] ordenada, solo las libres
+        self.reservas = {}
+        # --- Reservas por fechas ---
+        self._posicion = {}  # número -> posición (bit) de la habitación dentro de su tipo
+        self._numeros_por_tipo = {}  # tipo -> [número de la habitación en cada posición]
+        self._ocupadas_por_dia = {}  # tipo -> {día: máscara de las habitaciones ocupadas esa noche}
+        self._bloqueadas = {}  # tipo -> máscara de las habitaciones no disponibles (reservadas sin fechas)
+        self.estancias = {}  # id -> Reserva
+        self.reservas_por_cliente = {}  # identificación -> {id: Reserva}, en orden de reserva
+        self._ids = itertools.count(1)  # next() es atómico: sirve también con varios hilos
+
+    @property
+    def habitaciones(self):
+        """Todas las habitaciones, en orden de alta."""
+        return self._por_numero.values()
+
+    def agregar_habitacion(self, habitacion):
+        if habitacion.numero in self._por_numero:
+            raise ValueError(f"Ya existe la habitación {habitacion.numero}.")
+        habitacion._sistema = self
+        self._por_numero[habitacion.numero] = habitacion
+        self._libres.setdefault(habitacion.tipo, set())
+        self._libres_por_precio.setdefault(habitacion.tipo, [])
+        numeros = self._numeros_por_tipo.setdefault(habitacion.tipo, [])
+        self._posicion[habitacion.numero] = len(numeros)
+        numeros.append(habitacion.numero)
+        self._ocupadas_por_dia.setdefault(habitacion.tipo, {})
+        self._bloqueadas.setdefault(habitacion.tipo, 0)
+        if habitacion.disponible:
+            self._marcar_libre(habitacion)
+        else:
+            self._bloqueadas[habitacion.tipo] |= 1 << self._posicion[habitacion.numero]
+
+    def habitacion(self, numero):
+        """La habitación con ese número, o None."""
+        return self._por_numero.get(numero)
+
+    # --- Índices de disponibilidad ---
+    def _marcar_libre(self, habitacion):
+        self._libres[habitacion.tipo].add(habitacion.numero)
+        insort(self._libres_por_precio[habitacion.tipo], (habitacion.precio, habitacion.numero))
+
+    def _marcar_ocupada(self, habitacion):
+        self._libres[habitacion.tipo].discard(habitacion.numero)
+        por_precio = self._libres_por_precio[habitacion.tipo]
+        i = bisect_left(por_precio, (habitacion.precio, habitacion.numero))
+        if i < len(por_precio) and por_precio[i] == (habitacion.precio, habitacion.numero):
+            del por_precio[i]
+
+    def _al_cambiar_disponibilidad(self, habitacion):
+        bit = 1 << self._posicion[habitacion.numero]
+        if habitacion.disponible:
+            self._marcar_libre(habitacion)
+            self._bloqueadas[habitacion.tipo] &= ~bit
+        else:
+            self._marcar_ocupada(habitacion)
+            self._bloqueadas[habitacion.tipo] |= bit
+
+    # --- Consultas ---
+    def tipos(self):
+        return sorted(self._libres)
+
+    def cuantas_libres(self, tipo):
+        return len(self._libres.get(tipo, ()))
+
+    def esta_libre(self, numero):
+        habitacion = self._por_numero.get(numero)
+        return habitacion is not None and habitacion.numero in self._libres[habitacion.tipo]
+
+    def libres_hasta(self, tipo, precio_maximo):
+        """Habitaciones libres de `tipo` con precio <= precio_maximo, de la más barata a la más cara."""
+        por_precio = self._libres_por_precio.get(tipo, [])
+        fin = bisect_right(por_precio, (precio_maximo, float("inf")))
+        return [self._por_numero[numero] for _, numero in por_precio[:fin]]
+
+    def primera_libre(self, tipo, precio_maximo=None):
+        """La habitación libre más barata de `tipo` (si no pasa de precio_maximo), o None. O(log n)."""
+        por_precio = self._libres_por_precio.get(tipo)
+        if not por_precio:
+            return None
+        precio, numero = por_precio[0]
+        if precio_maximo is not None and precio > precio_maximo:
+            return None
+        return self._por_numero[numero]
+
+    def mostrar_disponibles(self):
+        print("Habitaciones disponibles:")
+        for tipo in self.tipos():
+            for precio, numero in self._libres_por_precio[tipo]:
+                print(f"  - Habitación {numero} ({tipo}) - ${precio}")
+
+    def hacer_reserva(self, cliente, numero_habitacion):
+        h = self._por_numero.get(numero_habitacion)
+        if h is not None and h.disponible:
+            h.reservar()
+            self.reservas[cliente.identificacion] = h.numero
+            return True
+        print("No se pudo hacer la reserva. Verifica si la habitación está disponible.")
+        return False
+
+    # --- Reservas por fechas ---
+    def reservar_fechas(self, cliente, numero_habitacion, entrada, salida):
+        """
+        Reserva la habitación las noches desde `entrada` hasta `salida` (objetos date).
+        Devuelve la Reserva, o None si la habitación no existe o alguna noche está ocupada.
+        """
+        if salida <= entrada:
+            raise ValueError("La fecha de salida debe ser posterior a la de entrada.")
+        h = self._por_numero.get(numero_habitacion)
+        if h is None or not h.disponible or not h.libre_entre(entrada, salida):
+            return None
+        reserva = self._apartar(h, cliente, entrada, salida)
+        self._anotar_noches(reserva)
+        return reserva
+
+    def cancelar_reserva(self, id_reserva):
+        """Anula una reserva por fechas y devuelve la Reserva cancelada."""
+        reserva = self._soltar(id_reserva)
+        self._borrar_noches(reserva)
+        return reserva
+
+    # Las reservas por fechas se hacen en dos pasos: lo que toca a la habitación (_apartar,
+    # _soltar) y las máscaras por noche, compartidas por todo el tipo (_anotar_noches,
+    # _borrar_noches). Así MotorReservas (reservas_concurrentes.py) protege cada paso con su
+    # propio cerrojo.
+    def _apartar(self, h, cliente, entrada, salida):
+        """Crea la reserva y la guarda en la habitación y en los diccionarios (no en las máscaras)."""
+        reserva = Reserva(next(self._ids), cliente.identificacion, h.numero, entrada, salida)
+        h._agregar_estancia(entrada.toordinal(), salida.toordinal(), reserva.id)
+        self.estancias[reserva.id] = reserva
+        self.reservas_por_cliente.setdefault(cliente.identificacion, {})[reserva.id] = reserva
+        return reserva
+
+    def _soltar(self, id_reserva):
+        reserva = self.estancias.pop(id_reserva)
+        self._por_numero[reserva.numero]._quitar_estancia(reserva.entrada.toordinal())
+        del self.reservas_por_cliente[reserva.cliente][id_reserva]
+        return reserva
+
+    def _anotar_noches(self, reserva):
+        tipo = self._por_numero[reserva.numero].tipo
+        bit = 1 << self._posicion[reserva.numero]
+        dias = self._ocupadas_por_dia[tipo]
+        for dia in range(reserva.entrada.toordinal(), reserva.salida.toordinal()):
+            dias[dia] = dias.get(dia, 0) | bit
+
+    def _borrar_noches(self, reserva):
+        tipo = self._por_numero[reserva.numero].tipo
+        bit = 1 << self._posicion[reserva.numero]
+        dias = self._ocupadas_por_dia[tipo]
+        for dia in range(reserva.entrada.toordinal(), reserva.salida.toordinal()):
+            mascara = dias[dia] & ~bit
+            if mascara:
+                dias[dia] = mascara
+            else:
+                del dias[dia]
+
+    def _mascara_libres(self, tipo, entrada, salida):
+        """Máscara de las habitaciones de `tipo` libres todas las noches del intervalo."""
+        dias = self._ocupadas_por_dia.get(tipo)
+        if dias is None:
+            return 0
+        ocupadas = self._bloqueadas[tipo]
+        for dia in range(entrada.toordinal(), salida.toordinal()):
+            ocupadas |= dias.get(dia, 0)
+        todas = (1 << len(self._numeros_por_tipo[tipo])) - 1
+        return todas & ~ocupadas
+
+    def libres_entre(self, tipo, entrada, salida, precio_maximo=None):
+        """Habitaciones de `tipo` libres desde `entrada` hasta `salida`, de la más barata a la más cara."""
+        numeros = self._numeros_por_tipo.get(tipo, [])
+        habitaciones = [self._por_numero[numeros[i]] for i in _posiciones(self._mascara_libres(tipo, entrada, salida))]
+        if precio_maximo is not None:
+            habitaciones = [h for h in habitaciones if h.precio <= precio_maximo]
+        habitaciones.sort(key=lambda h: (h.precio, h.numero))
+        return habitaciones
+
+    def cuantas_libres_entre(self, tipo, entrada, salida):
+        return self._mascara_libres(tipo, entrada, salida).bit_count()
+
+
+# ====== MEDICIÓN ======
+def medir_reservas(n=100_000, consultas=2_000):
+    """
+    Con `n` habitaciones, compara los recorridos de la versión con lista (buscar por número,
+    buscar la Suite libre más barata por debajo de un precio) con los índices, y mide cuánto
+    cuesta mantenerlos al reservar y liberar.
+    """
+    import contextlib
+    import io
+    import random
+    import time
+
+    azar = random.Random(7)
+    tipos = {"Individual": (40, 90), "Doble": (70, 160), "Suite": (150, 600)}
+    sistema = SistemaReservas()
+    inicio = time.perf_counter()
+    for numero in range(1, n + 1):
+        tipo = azar.choice(list(tipos))
+        sistema.agregar_habitacion(Habitacion(numero, tipo, azar.randint(*tipos[tipo])))
+    t_alta = time.perf_counter() - inicio
+    lista = list(sistema.habitaciones)  # lo que había antes: una lista que se recorre
+    with contextlib.redirect_stdout(io.StringIO()):
+        for numero in azar.sample(range(1, n + 1), n // 2):
+            sistema.habitacion(numero).reservar()
+
+    numeros = [azar.randint(1, n) for _ in range(consultas)]
+    maximos = [azar.randint(150, 300) for _ in range(consultas)]
+
+    def medir(funcion, argumentos):
+        inicio = time.perf_counter()
+        for argumento in argumentos:
+            funcion(argumento)
+        return (time.perf_counter() - inicio) / len(argumentos) * 1e6
+
+    def buscar_lineal(numero):
+        for h in lista:
+            if h.numero == numero:
+                return h
+
+    def suite_lineal(maximo):
+        libres = [h for h in lista if h.tipo == "Suite" and h.disponible and h.precio <= maximo]
+        return min(libres, key=lambda h: (h.precio, h.numero)) if libres else None
+
+    resultados = {"habitaciones": n, "alta_us": round(t_alta / n * 1e6, 2)}
+    # Los recorridos son lentos: se miden con menos consultas
+    resultados["buscar_lineal_us"] = round(medir(buscar_lineal, numeros[:200]), 1)
+    resultados["buscar_indice_us"] = round(medir(sistema.habitacion, numeros), 3)
+    resultados["suite_lineal_us"] = round(medir(suite_lineal, maximos[:20]), 1)
+    resultados["suite_indice_us"] = round(medir(lambda m: sistema.primera_libre("Suite", m), maximos), 3)
+    # Los índices dan lo mismo que los recorridos
+    assert all(suite_lineal(m) is sistema.primera_libre("Suite", m) for m in maximos[:20])
+    # Coste de mantener los índices: reservar y liberar la misma habitación
+    habitaciones = [sistema.habitacion(numero) for numero in numeros]
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        for h in habitaciones:
+            h.liberar()
+            h.reservar()
+        resultados["liberar_y_reservar_us"] = round((time.perf_counter() - inicio) / consultas * 1e6, 2)
+    return resultados
+
+
+def medir_fechas(n=5_000, dias=730, ocupacion=0.6, consultas=2_000):
+    """
+    `n` habitaciones con `dias` de reservas (ocupación media `ocupacion`, estancias de 1 a 7
+    noches): coste de reservar y cancelar, y consultas "¿qué habitaciones de este tipo están
+    libres estas noches?" recorriendo las habitaciones (con su índice de intervalos) frente a
+    las máscaras por noche.
+    """
+    import random
+    import time
+    from datetime import date, timedelta
+
+    azar = random.Random(11)
+    tipos = {"Individual": (40, 90), "Doble": (70, 160), "Suite": (150, 600)}
+    sistema = SistemaReservas()
+    for numero in range(1, n + 1):
+        tipo = azar.choice(list(tipos))
+        sistema.agregar_habitacion(Habitacion(numero, tipo, azar.randint(*tipos[tipo])))
+    cliente = Cliente("Cadena", "0")
+    hoy = date(2026, 1, 1)
+    inicio = time.perf_counter()
+    for numero in range(1, n + 1):
+        dia = azar.randint(0, 3)
+        while True:
+            noches = azar.randint(1, 7)
+            if dia + noches > dias:
+                break
+            entrada = hoy + timedelta(days=dia)
+            sistema.reservar_fechas(cliente, numero, entrada, entrada + timedelta(days=noches))
+            dia += noches + azar.randint(0, round(2 * noches * (1 / ocupacion - 1)))
+    t_reservar = time.perf_counter() - inicio
+    reservas = len(sistema.estancias)
+
+    preguntas = []
+    for _ in range(consultas):
+        entrada = hoy + timedelta(days=azar.randint(0, dias - 15))
+        preguntas.append((azar.choice(list(tipos)), entrada, entrada + timedelta(days=azar.randint(1, 14))))
+    por_tipo = {tipo: [h for h in sistema.habitaciones if h.tipo == tipo] for tipo in tipos}
+
+    def recorriendo(tipo, entrada, salida):
+        libres = [h for h in por_tipo[tipo] if h.disponible and h.libre_entre(entrada, salida)]
+        libres.sort(key=lambda h: (h.precio, h.numero))
+        return libres
+
+    inicio = time.perf_counter()
+    for pregunta in preguntas[:200]:
+        recorriendo(*pregunta)
+    t_recorrido = (time.perf_counter() - inicio) / 200
+    inicio = time.perf_counter()
+    for pregunta in preguntas:
+        sistema.libres_entre(*pregunta)
+    t_mascaras = (time.perf_counter() - inicio) / consultas
+    inicio = time.perf_counter()
+    for pregunta in preguntas:
+        sistema.cuantas_libres_entre(*pregunta)
+    t_contar = (time.perf_counter() - inicio) / consultas
+    assert all(recorriendo(*p) == sistema.libres_entre(*p) for p in preguntas[:50])
+
+    ids = azar.sample(list(sistema.estancias), 1000)
+    inicio = time.perf_counter()
+    for id_reserva in ids:
+        sistema.cancelar_reserva(id_reserva)
+    t_cancelar = (time.perf_counter() - inicio) / len(ids)
+    return {
+        "habitaciones": n,
+        "dias": dias,
+        "reservas": reservas,
+        "reservar_us": round(t_reservar / reservas * 1e6, 2),
+        "cancelar_us": round(t_cancelar * 1e6, 2),
+        "consulta_recorriendo_ms": round(t_recorrido * 1000, 3),
+        "consulta_mascaras_ms": round(t_mascaras * 1000, 3),
+        "contar_libres_us": round(t_contar * 1e6, 2),
+        "consultas_por_s": round(1 / t_mascaras),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench-fechas" in sys.argv:
+        print(medir_fechas())
+        sys.exit(0)
+    if "--bench" in sys.argv:
+        print(medir_reservas())
+        sys.exit(0)
+    print(__doc__)
@@ -1,21 +1,35 @@
 # Programa con Programación Orientada a Objetos para calcular el promedio semanal del clima
 
+import sys
+
+from estadisticas_clima import EstadisticasEnLinea, cargar_archivo
+
+
 class ClimaDiario:
     """Clase que representa la temperatura diaria."""
-    def __init__(self):
-        self.temperaturas = []
+    def __init__(self, ventana=0):
+        # Las lecturas no se guardan: solo sus estadísticas (sirve igual para 7 que para millones)
+        self.estadisticas = EstadisticasEnLinea(ventana)
 
-    def ingresar_temperaturas(self):
+    def ingresar_temperaturas(self, dias=7):
         """Método para ingresar temperaturas diarias."""
-        for dia in range(1, 8):  # 7 días
+        for dia in range(1, dias + 1):
             temp = float(input(f"Ingrese la temperatura del día {dia}: "))
-            self.temperaturas.append(temp)
+            self.estadisticas.agregar(temp)
+
+    def cargar_temperaturas(self, lecturas):
+        """Método para añadir lecturas de un iterable (por ejemplo, un sensor)."""
+        self.estadisticas.agregar_varios(lecturas)
+
+    def cargar_archivo(self, ruta, columna=None):
+        """Método para añadir todas las lecturas de un archivo de texto o CSV."""
+        cargar_archivo(ruta, self.estadisticas, columna)
 
     def calcular_promedio(self):
-        """Método que calcula el promedio semanal."""
-        if not self.temperaturas:
+        """Método que calcula el promedio (se mantiene al día con cada lectura)."""
+        if not self.estadisticas.cuenta:
             return 0
-        return sum(self.temperaturas) / len(self.temperaturas)
+        return self.estadisticas.media
 
 class ClimaConDetalles(ClimaDiario):
     """Clase que hereda de ClimaDiario y muestra detalles adicionales."""
@@ -23,13 +37,18 @@ class ClimaConDetalles(ClimaDiario):
     def mostrar_resultado(self):
         """Método para mostrar el promedio calculado."""
         promedio = self.calcular_promedio()
+        e = self.estadisticas
         print(f"El promedio semanal de temperatura es: {promedio:.2f}°C")
+        print(f"Mínima: {e.minimo:.2f}°C, máxima: {e.maximo:.2f}°C, desviación: {e.desviacion:.2f}°C")
 
 def main():
     """Función principal del programa POO."""
     print("=== Programa Orientado a Objetos ===")
     clima = ClimaConDetalles()
-    clima.ingresar_temperaturas()
+    if len(sys.argv) > 1:
+        clima.cargar_archivo(sys.argv[1])  # python "Programacion orientada a objetos.py" lecturas.txt
+    else:
+        clima.ingresar_temperaturas()
     clima.mostrar_resultado()
 
 # Ejecutar el programa
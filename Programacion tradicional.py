@@ -1,17 +1,21 @@
 # Programa Tradicional para calcular el promedio semanal del clima
 
-def ingresar_temperaturas():
-    """Función para ingresar las temperaturas diarias."""
-    temperaturas = []
-    for dia in range(1, 8):  # 7 días de la semana
+def ingresar_temperaturas(dias=7):
+    """Función para ingresar las temperaturas diarias (las va entregando una a una)."""
+    for dia in range(1, dias + 1):  # 7 días de la semana por defecto
         temp = float(input(f"Ingrese la temperatura del día {dia}: "))
-        temperaturas.append(temp)
-    return temperaturas
+        yield temp
 
 def calcular_promedio(temperaturas):
-    """Calcula el promedio de la lista de temperaturas."""
-    total = sum(temperaturas)
-    promedio = total / len(temperaturas)
+    """Calcula el promedio en una sola pasada (sirve con listas, generadores o archivos)."""
+    total = 0.0
+    cantidad = 0
+    for temp in temperaturas:
+        total += temp
+        cantidad += 1
+    if cantidad == 0:
+        return 0
+    promedio = total / cantidad
     return promedio
 
 def main():
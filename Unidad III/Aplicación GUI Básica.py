@@ -1,12 +1,43 @@
+import os
+import time
 import tkinter as tk
-from tkinter import messagebox
+from itertools import islice
+from tkinter import messagebox, filedialog, ttk
+
+
+# --- Estado de una carga masiva (pegar o importar archivo) ---
+class Ingesta:
+    """Carga en curso: se consume por tandas desde after() para no congelar la ventana."""
+
+    def __init__(self, lineas, progreso, archivo=None):
+        self.lineas = lineas        # iterador de líneas (se lee a medida que se procesa)
+        self.progreso = progreso    # función que devuelve el avance entre 0 y 1
+        self.archivo = archivo      # archivo a cerrar al terminar, si lo hay
+        self.leidas = 0
+        self.nuevas = 0
+        self.duplicadas = 0
+        self.cancelada = False
+        self.inicio = time.perf_counter()
+
+    def cerrar(self):
+        if self.archivo is not None:
+            self.archivo.close()
+
 
 # --- Clase principal de la aplicación ---
 class GestorDatosApp:
+    # Cada tanda de la carga masiva trabaja como mucho este tiempo y luego devuelve el control a Tk
+    TIEMPO_TANDA_MS = 20
+    FILAS_POR_TANDA = 20_000
+
     def __init__(self, root):
         self.root = root
         self.root.title("Gestor de Datos")
-        self.root.geometry("400x300")  # Tamaño de la ventana
+        self.root.geometry("420x400")  # Tamaño de la ventana
+
+        # Datos ya presentes en la lista, para descartar duplicados en O(1)
+        self.datos = set()
+        self._ingesta = None
 
         # --- Etiqueta ---
         self.label = tk.Label(root, text="Ingrese un dato:")
@@ -28,12 +59,32 @@ class GestorDatosApp:
         self.btn_limpiar = tk.Button(root, text="Limpiar", command=self.limpiar_lista)
         self.btn_limpiar.pack(pady=5)
 
+        # --- Carga masiva: pegar / importar archivo / cancelar ---
+        frame_carga = tk.Frame(root)
+        frame_carga.pack(pady=5)
+        self.btn_pegar = tk.Button(frame_carga, text="Pegar", command=self.pegar_datos)
+        self.btn_pegar.grid(row=0, column=0, padx=4)
+        self.btn_importar = tk.Button(frame_carga, text="Importar archivo...", command=self.importar_archivo)
+        self.btn_importar.grid(row=0, column=1, padx=4)
+        self.btn_cancelar = tk.Button(frame_carga, text="Cancelar", command=self.cancelar_ingesta, state=tk.DISABLED)
+        self.btn_cancelar.grid(row=0, column=2, padx=4)
+
+        # --- Progreso de la carga ---
+        self.progreso = ttk.Progressbar(root, length=300, maximum=100)
+        self.progreso.pack(pady=5)
+        self.estado = tk.StringVar(value=f"{self.lista.size()} dato(s)")
+        tk.Label(root, textvariable=self.estado).pack()
+
     # --- Función para agregar dato ---
     def agregar_dato(self):
         dato = self.entry.get().strip()
-        if dato:
+        if dato in self.datos:
+            messagebox.showwarning("Atención", "Ese dato ya está en la lista.")
+        elif dato:
+            self.datos.add(dato)
             self.lista.insert(tk.END, dato)  # Agrega al final de la lista
             self.entry.delete(0, tk.END)     # Limpia el campo de texto
+            self.estado.set(f"{self.lista.size()} dato(s)")
         else:
             messagebox.showwarning("Atención", "Debe ingresar un dato antes de agregar.")
 
@@ -41,12 +92,162 @@ class GestorDatosApp:
     def limpiar_lista(self):
         seleccion = self.lista.curselection()
         if seleccion:  # Si el usuario seleccionó un elemento
+            self.datos.discard(self.lista.get(seleccion[0]))
             self.lista.delete(seleccion)
         else:  # Si no hay selección, limpiar toda la lista
+            self.datos.clear()
             self.lista.delete(0, tk.END)
+        self.estado.set(f"{self.lista.size()} dato(s)")
+
+    # --- Carga masiva ---
+    def pegar_datos(self):
+        """Agrega cada línea del portapapeles (sin duplicados)."""
+        try:
+            texto = self.root.clipboard_get()
+        except tk.TclError:
+            messagebox.showwarning("Atención", "El portapapeles está vacío.")
+            return
+        lineas = texto.splitlines()
+        ingesta = Ingesta(iter(lineas), lambda: ingesta.leidas / max(1, len(lineas)))
+        self._iniciar_ingesta(ingesta)
+
+    def importar_archivo(self):
+        """Agrega cada línea de un archivo de texto, leyéndolo por partes (sin duplicados)."""
+        ruta = filedialog.askopenfilename(title="Importar datos",
+                                          filetypes=[("Texto", "*.txt *.csv"), ("Todos los archivos", "*.*")])
+        if not ruta:
+            return
+        try:
+            archivo = open(ruta, "rb")
+            tamano = max(1, os.path.getsize(ruta))
+        except OSError as e:
+            messagebox.showerror("Error", f"No se pudo abrir el archivo:\n{e}")
+            return
+        # En binario tell() es exacto aunque se itere por líneas: sirve para la barra de progreso
+        lineas = (linea.decode("utf-8", "replace") for linea in archivo)
+        self._iniciar_ingesta(Ingesta(lineas, lambda: archivo.tell() / tamano, archivo))
+
+    def cancelar_ingesta(self):
+        if self._ingesta is not None:
+            self._ingesta.cancelada = True
+
+    def _iniciar_ingesta(self, ingesta):
+        if self._ingesta is not None:
+            ingesta.cerrar()
+            messagebox.showinfo("Atención", "Ya hay una carga en curso.")
+            return
+        self._ingesta = ingesta
+        for boton in (self.btn_pegar, self.btn_importar):
+            boton.config(state=tk.DISABLED)
+        self.btn_cancelar.config(state=tk.NORMAL)
+        self.progreso["value"] = 0
+        self.root.after(1, self._procesar_tanda)
+
+    def _procesar_tanda(self):
+        """Procesa líneas durante TIEMPO_TANDA_MS, las inserta en una sola llamada y cede el control."""
+        ingesta = self._ingesta
+        if ingesta.cancelada:
+            self._terminar_ingesta("Carga cancelada")
+            return
+        datos, nuevas = self.datos, []
+        limite = time.perf_counter() + self.TIEMPO_TANDA_MS / 1000
+        agotada = False
+        try:
+            while time.perf_counter() < limite and len(nuevas) < self.FILAS_POR_TANDA:
+                bloque = list(islice(ingesta.lineas, 2000))
+                if not bloque:
+                    agotada = True
+                    break
+                ingesta.leidas += len(bloque)
+                for linea in bloque:
+                    dato = linea.strip()
+                    if not dato:
+                        continue
+                    if dato in datos:
+                        ingesta.duplicadas += 1
+                    else:
+                        datos.add(dato)
+                        nuevas.append(dato)
+        except OSError as e:
+            messagebox.showerror("Error", f"Error leyendo el archivo:\n{e}")
+            agotada = True
+        if nuevas:
+            self.lista.insert(tk.END, *nuevas)
+            ingesta.nuevas += len(nuevas)
+        self.progreso["value"] = 100 * min(1.0, ingesta.progreso())
+        self.estado.set(f"Cargando... {ingesta.nuevas} nuevo(s), {ingesta.duplicadas} duplicado(s)")
+        if agotada:
+            self._terminar_ingesta("Carga terminada")
+        else:
+            self.root.after(1, self._procesar_tanda)
+
+    def _terminar_ingesta(self, titulo):
+        ingesta, self._ingesta = self._ingesta, None
+        ingesta.cerrar()
+        for boton in (self.btn_pegar, self.btn_importar):
+            boton.config(state=tk.NORMAL)
+        self.btn_cancelar.config(state=tk.DISABLED)
+        segundos = time.perf_counter() - ingesta.inicio
+        self.estado.set(f"{titulo} en {segundos:.1f} s: {ingesta.nuevas} nuevo(s), "
+                        f"{ingesta.duplicadas} duplicado(s). Total: {self.lista.size()}")
+
+
+# --- Medición ---
+def medir_ingesta(n=1_000_000, duplicados=0.1, tic_ms=10):
+    """
+    Importa un archivo de n líneas (con una fracción de duplicados) y mide el tiempo total y
+    cuánto llega a retrasarse un temporizador de tic_ms del bucle de Tk durante la carga.
+    Necesita una pantalla; en un servidor ejecutar con Xvfb: xvfb-run python <este archivo> --bench
+    """
+    import random
+    import tempfile
+
+    azar = random.Random(4)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "datos.txt")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            for i in range(n):
+                archivo.write(f"Dato {azar.randrange(i) if i and azar.random() < duplicados else i}\n")
+        root = tk.Tk()
+        app = GestorDatosApp(root)
+        archivo = open(ruta, "rb")
+        tamano = os.path.getsize(ruta)
+        app._iniciar_ingesta(Ingesta((l.decode("utf-8") for l in archivo), lambda: archivo.tell() / tamano, archivo))
+        retrasos = []
+
+        def tic(esperado):
+            ahora = time.perf_counter()
+            retrasos.append((ahora - esperado) * 1000)
+            if app._ingesta is None:
+                root.quit()
+            else:
+                root.after(tic_ms, tic, time.perf_counter() + tic_ms / 1000)
+
+        inicio = time.perf_counter()
+        root.after(tic_ms, tic, time.perf_counter() + tic_ms / 1000)
+        root.mainloop()
+        total = time.perf_counter() - inicio
+        filas = app.lista.size()
+        root.destroy()
+    retrasos.sort()
+    return {
+        "lineas": n,
+        "filas": filas,
+        "segundos": round(total, 2),
+        "lineas_por_s": round(n / total),
+        "retraso_p50_ms": round(retrasos[len(retrasos) // 2], 1),
+        "retraso_p99_ms": round(retrasos[int(len(retrasos) * 0.99)], 1),
+        "retraso_max_ms": round(retrasos[-1], 1),
+    }
 
 # --- Programa principal ---
 if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_ingesta())
+        sys.exit(0)
+
     root = tk.Tk()
     app = GestorDatosApp(root)
     root.mainloop()
@@ -1,15 +1,44 @@
+import json
+import os
 import tkinter as tk
+from bisect import bisect_left
 from tkinter import messagebox
 
+from guardado_segundo_plano import GuardadoEnSegundoPlano, apartar_corrupto, ruta_datos
+from tareas_modelo import ListaTareas, diferencia_filas, normalizar
+
+RUTA_TAREAS = ruta_datos("tareas.json")
+
+
+def escribir_tareas(tareas, archivo):
+    """Serializa una copia de la lista de tareas (se llama desde el hilo de guardado)."""
+    json.dump([{"id": id_tarea, "texto": texto, "completada": completada} for id_tarea, texto, completada in tareas],
+              archivo, ensure_ascii=False)
+
+
+def texto_fila(tarea):
+    return "✔ " + tarea.texto if tarea.completada else tarea.texto
+
 
 class TodoApp:
-    def __init__(self, root):
+    # Espera tras la última tecla antes de filtrar (antirrebote)
+    RETARDO_BUSQUEDA_MS = 120
+
+    def __init__(self, root, ruta=RUTA_TAREAS):
         self.root = root
         self.root.title("Lista de Tareas")
-        self.root.geometry("400x400")
+        self.root.geometry("400x440")
 
-        # Lista interna para guardar las tareas
-        self.tasks = []
+        # Modelo de tareas (ids estables, marca de completada); el Listbox es solo su vista
+        self.tareas = ListaTareas()
+        # Filtro aplicado (normalizado) e ids que muestra el Listbox, en el mismo orden que sus filas
+        self.consulta = ""
+        self._visibles = []
+        self._temporizador_busqueda = None
+        self.ruta = ruta
+        # Guardado automático en segundo plano: teclear y añadir tareas no espera al disco
+        self.guardado = GuardadoEnSegundoPlano(root, al_terminar=self._al_guardar)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         # ====== Entrada de texto ======
         self.entry_task = tk.Entry(root, width=35)
@@ -30,55 +59,232 @@ class TodoApp:
         btn_delete = tk.Button(frame_buttons, text="Eliminar Tarea", width=15, command=self.delete_task)
         btn_delete.grid(row=0, column=2, padx=5)
 
+        # ====== Búsqueda (filtra mientras se escribe) ======
+        frame_search = tk.Frame(root)
+        frame_search.pack(pady=(5, 0))
+        tk.Label(frame_search, text="Buscar:").pack(side=tk.LEFT)
+        self.entry_search = tk.Entry(frame_search, width=35)
+        self.entry_search.pack(side=tk.LEFT, padx=5)
+        self.entry_search.bind("<KeyRelease>", self._al_teclear_busqueda)
+
         # ====== Listbox para mostrar las tareas ======
         self.listbox_tasks = tk.Listbox(root, width=50, height=15, selectmode=tk.SINGLE)
         self.listbox_tasks.pack(pady=10)
         # Evento opcional: doble clic para marcar completada
         self.listbox_tasks.bind("<Double-Button-1>", lambda event: self.mark_completed())
 
+        self._cargar()
+        self.tareas.suscribir(self._sincronizar_fila)
+
+    # ====== Persistencia ======
+    def _cargar(self):
+        """Lee las tareas guardadas (una sola vez, al arrancar)."""
+        if not self.ruta or not os.path.exists(self.ruta):
+            return
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as archivo:
+                self.tareas.cargar(json.load(archivo))
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            # Se aparta el archivo antes de que el primer guardado lo pise con la lista vacía
+            self.tareas = ListaTareas()
+            respaldo = apartar_corrupto(self.ruta)
+            if respaldo:
+                detalle = f"Se empieza con una lista vacía; el archivo original se conservó como:\n{respaldo}"
+            else:
+                detalle = f"Los cambios de esta sesión no se guardarán para no sobrescribir:\n{self.ruta}"
+                self.ruta = None
+            messagebox.showwarning("Aviso", f"No se pudieron leer las tareas guardadas:\n{e}\n\n{detalle}")
+            return
+        # Una sola llamada a Tk para todas las filas; luego solo se colorean las completadas
+        self._visibles = [t.id for t in self.tareas]
+        self.listbox_tasks.insert(tk.END, *(texto_fila(t) for t in self.tareas))
+        for index, tarea in enumerate(self.tareas):
+            if tarea.completada:
+                self.listbox_tasks.itemconfig(index, fg="gray")
+
+    def _guardar(self):
+        if self.ruta:
+            # La copia de la lista se toma en el hilo de Tk cuando vence el antirrebote
+            self.guardado.marcar_cambio(self.ruta, self.tareas.instantanea, escribir_tareas)
+
+    def _al_guardar(self, rutas, error):
+        if error is not None:
+            messagebox.showerror("Error", f"No se pudieron guardar las tareas:\n{error}")
+
+    def on_close(self):
+        self.guardado.cerrar()  # escribe lo pendiente antes de cerrar
+        self.root.destroy()
+
+    # ====== Vista ======
+    def _sincronizar_fila(self, evento, posicion, tarea):
+        """Aplica al Listbox solo el cambio de una fila que avisa el modelo (si pasa el filtro)."""
+        if evento == "alta":
+            if self.consulta and not self.tareas.coincide(tarea.id, self.consulta):
+                return
+            # Los ids crecen: una tarea nueva siempre va al final de las visibles
+            self._visibles.append(tarea.id)
+            index = len(self._visibles) - 1
+            self.listbox_tasks.insert(tk.END, texto_fila(tarea))
+        else:
+            index = bisect_left(self._visibles, tarea.id)
+            if index == len(self._visibles) or self._visibles[index] != tarea.id:
+                return  # la fila no se está mostrando
+        if evento == "baja":
+            del self._visibles[index]
+            self.listbox_tasks.delete(index)
+        elif evento == "cambio":  # el Listbox no permite editar una fila, se sustituye esa sola
+            seleccionada = self.listbox_tasks.selection_includes(index)
+            self.listbox_tasks.delete(index)
+            self.listbox_tasks.insert(index, texto_fila(tarea))
+            if seleccionada:
+                self.listbox_tasks.selection_set(index)
+        if tarea.completada and evento != "baja":
+            self.listbox_tasks.itemconfig(index, fg="gray")
+
+    def _id_seleccionado(self):
+        selection = self.listbox_tasks.curselection()
+        return self._visibles[selection[0]] if selection else None
+
+    # ====== Filtro ======
+    def _al_teclear_busqueda(self, event=None):
+        if self._temporizador_busqueda is not None:
+            self.root.after_cancel(self._temporizador_busqueda)
+        self._temporizador_busqueda = self.root.after(self.RETARDO_BUSQUEDA_MS, self._filtrar)
+
+    def _filtrar(self):
+        self._temporizador_busqueda = None
+        consulta = normalizar(self.entry_search.get().strip())
+        if consulta == self.consulta:
+            return
+        # Si la consulta amplía la anterior ("lla" -> "llam"), el resultado está dentro del actual
+        candidatos = self._visibles if consulta.startswith(self.consulta) else None
+        nuevos = self.tareas.buscar(consulta, candidatos)
+        self._mostrar_ids(nuevos)
+        self.consulta = consulta
+
+    def _mostrar_ids(self, nuevos):
+        """Lleva el Listbox de las filas actuales a `nuevos` con el mínimo de borrados e inserciones."""
+        borrados, insertados = diferencia_filas(self._visibles, nuevos)
+        for primera, ultima in borrados:
+            self.listbox_tasks.delete(primera, ultima)
+        for posicion, ids in insertados:
+            tareas = [self.tareas.obtener(i) for i in ids]
+            self.listbox_tasks.insert(posicion, *(texto_fila(t) for t in tareas))
+            for desplazamiento, tarea in enumerate(tareas):
+                if tarea.completada:
+                    self.listbox_tasks.itemconfig(posicion + desplazamiento, fg="gray")
+        self._visibles = nuevos
+
     def add_task(self):
         """Añade una nueva tarea a la lista."""
         task = self.entry_task.get().strip()
         if task:
-            self.tasks.append(task)
-            self.listbox_tasks.insert(tk.END, task)
+            self.tareas.agregar(task)
             self.entry_task.delete(0, tk.END)
+            self._guardar()
         else:
             messagebox.showwarning("Aviso", "No puedes añadir una tarea vacía.")
 
     def mark_completed(self):
         """Marca la tarea seleccionada como completada (cambia su estilo)."""
-        selection = self.listbox_tasks.curselection()
-        if not selection:
+        task_id = self._id_seleccionado()
+        if task_id is None:
             messagebox.showinfo("Info", "Selecciona una tarea para marcarla como completada.")
             return
-        index = selection[0]
-        task_text = self.listbox_tasks.get(index)
 
-        # Si ya está marcada, no la marcamos otra vez
-        if task_text.startswith("✔ "):
+        # Si ya está marcada, no la marcamos otra vez (la marca vive en el modelo, no en el texto)
+        if not self.tareas.completar(task_id):
             messagebox.showinfo("Info", "Esta tarea ya está completada.")
             return
-
-        # Actualizar texto con una marca
-        self.listbox_tasks.delete(index)
-        self.listbox_tasks.insert(index, "✔ " + task_text)
-        # Mantener selección
-        self.listbox_tasks.itemconfig(index, fg="gray")
+        self._guardar()
 
     def delete_task(self):
         """Elimina la tarea seleccionada de la lista."""
-        selection = self.listbox_tasks.curselection()
-        if not selection:
+        task_id = self._id_seleccionado()
+        if task_id is None:
             messagebox.showinfo("Info", "Selecciona una tarea para eliminarla.")
             return
-        index = selection[0]
-        self.listbox_tasks.delete(index)
-        # Eliminar también de la lista interna
-        del self.tasks[index]
+        # Se elimina por id; el modelo avisa a la vista de qué fila quitar
+        self.tareas.eliminar(task_id)
+        self._guardar()
+
+
+def medir_lista(n=50_000, operaciones=2000):
+    """
+    Arranque con n tareas y coste por operación (añadir, completar, eliminar) con la vista.
+    Necesita una pantalla; en un servidor ejecutar con Xvfb: xvfb-run python <este archivo> --bench
+    """
+    import random
+    import tempfile
+    import time
+
+    azar = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "tareas.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            escribir_tareas([(i + 1, f"Tarea {i % 500}", i % 3 == 0) for i in range(n)], archivo)
+        root = tk.Tk()
+        inicio = time.perf_counter()
+        app = TodoApp(root, ruta=ruta)
+        root.update()
+        resultados = {"tareas": n, "arranque_s": round(time.perf_counter() - inicio, 3)}
+        for nombre, accion in (("anadir", lambda: app.tareas.agregar("Nueva")),
+                               ("completar", lambda: app.tareas.completar(app.tareas.id_en(azar.randrange(len(app.tareas))))),
+                               ("eliminar", lambda: app.tareas.eliminar(app.tareas.id_en(azar.randrange(len(app.tareas)))))):
+            inicio = time.perf_counter()
+            for _ in range(operaciones):
+                accion()
+                root.update_idletasks()
+            resultados[f"{nombre}_ms"] = round((time.perf_counter() - inicio) / operaciones * 1000, 3)
+        app.on_close()
+    return resultados
+
+
+def medir_filtro(n=100_000, consulta="tarea 42 urgente"):
+    """
+    Latencia de tecla a pantalla del filtro con n tareas: se escribe `consulta` letra a letra
+    (cada letra estrecha el resultado anterior) y se borra (cada borrado lo amplía).
+    Necesita una pantalla; en un servidor ejecutar con Xvfb: xvfb-run python <este archivo> --bench
+    """
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "tareas.json")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            escribir_tareas([(i + 1, f"Tarea {i % 1000} {'urgente' if i % 7 == 0 else 'normal'}", i % 3 == 0)
+                             for i in range(n)], archivo)
+        root = tk.Tk()
+        app = TodoApp(root, ruta=ruta)
+        root.update()
+
+        def tecla(accion):
+            inicio = time.perf_counter()
+            accion()
+            app._filtrar()  # lo que haría el after() del antirrebote
+            root.update()
+            return (time.perf_counter() - inicio) * 1000
+
+        escribir = [tecla(lambda c=c: app.entry_search.insert(tk.END, c)) for c in consulta]
+        borrar = [tecla(lambda: app.entry_search.delete(len(app.entry_search.get()) - 1)) for _ in consulta]
+        app.on_close()
+    return {
+        "tareas": n,
+        "escribir_ms_media": round(sum(escribir) / len(escribir), 1),
+        "escribir_ms_max": round(max(escribir), 1),
+        "borrar_ms_media": round(sum(borrar) / len(borrar), 1),
+        "borrar_ms_max": round(max(borrar), 1),
+    }
 
 
 if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_lista())
+        print(medir_filtro())
+        sys.exit(0)
+
     root = tk.Tk()
     app = TodoApp(root)
     root.mainloop()
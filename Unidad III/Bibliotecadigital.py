@@ -1,11 +1,16 @@
 from __future__ import annotations
+from bisect import bisect_left, insort
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional, Set, Iterable
+from datetime import date, datetime, timedelta
+from sys import intern
+from typing import Callable, Dict, List, MutableMapping, Tuple, Optional, Set, Iterable
+
+# Firma de los oyentes que reciben cada cambio de estado: (evento, datos).
+Oyente = Callable[[str, Dict[str, str]], None]
 
 
 # ====== MODELOS ======
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Libro:
     """Representa un libro en el sistema.
 
@@ -18,11 +23,24 @@ class Libro:
     sin embargo, la especificación solo exige inmutabilidad de (titulo, autor). Si se desea poder
     cambiar la categoría después, se podría quitar frozen=True y hacer "identidad" inmutable
     por contrato. Aquí preferimos inmutabilidad total de Libro para mayor seguridad.
+
+    Memoria: con slots=True no hay __dict__ por instancia, y autor/categoría se internan
+    (sys.intern) para que miles de libros del mismo autor compartan una sola cadena.
     """
     identidad: Tuple[str, str]  # (titulo, autor)
     categoria: str
     isbn: str
 
+    def __post_init__(self):
+        titulo, autor = self.identidad
+        object.__setattr__(self, "identidad", (titulo, intern(autor)))
+        object.__setattr__(self, "categoria", intern(self.categoria))
+
+    def __reduce__(self):
+        # Al deserializar (pool de importación, tuberías de los fragmentos) se pasa por __init__
+        # y __post_init__, así que los libros recibidos de otro proceso también quedan internados.
+        return (Libro, (self.identidad, self.categoria, self.isbn))
+
     @property
     def titulo(self) -> str:
         return self.identidad[0]
@@ -39,16 +57,16 @@ class Usuario:
     Atributos:
         nombre: Nombre del usuario
         user_id: ID único del usuario (se gestiona la unicidad con un conjunto en Biblioteca)
-        prestados: Lista de ISBNs actualmente prestados por el usuario (estructura mutable)
+        prestados: Conjunto ordenado de ISBNs actualmente prestados por el usuario. Se guarda como
+            dict {isbn: None}: conserva el orden de préstamo y permite añadir/quitar en O(1).
     """
     nombre: str
     user_id: str
-    prestados: List[str]
+    prestados: Dict[str, None]
 
     def __post_init__(self):
-        # Garantiza que prestados comience como lista vacía si no se pasa.
-        if self.prestados is None:
-            self.prestados = []
+        # Acepta cualquier iterable de ISBNs (p. ej. la lista vacía de siempre) o None.
+        self.prestados = dict.fromkeys(self.prestados or ())
 
 
 # ====== LÓGICA DE NEGOCIO ======
@@ -57,34 +75,86 @@ class Biblioteca:
 
     Estructuras usadas (según requisitos):
         - Diccionario catalogo: {isbn: Libro} para accesos/búsquedas eficientes por clave.
+          Admite cualquier mapeo mutable, p. ej. CatalogoCompacto para millones de libros.
         - Conjunto ids_usuarios: set con todos los IDs únicos (detección rápida de duplicados).
         - Diccionario usuarios: {user_id: Usuario} para obtener/gestionar usuarios.
         - Diccionario prestamos_activos: {isbn: user_id} para conocer rápidamente quién tiene un libro.
         - Historial de préstamos: lista de registros con timestamps para auditoría básica.
+        - Índices inversos de préstamos activos:
+            prestamos_por_categoria {categoria: {isbn: None}} y prestamos_por_dia {'AAAA-MM-DD': {isbn: None}},
+            con la lista ordenada dias_con_prestamos para consultar atrasos por rango de fechas.
+        - Lista de oyentes: funciones avisadas de cada cambio (persistencia, índices, etc.).
 
     Métodos cubren: añadir/quitar libros, registrar/baja usuarios, prestar/devolver,
     búsquedas y listado de libros prestados por usuario.
     """
 
-    def __init__(self) -> None:
-        self.catalogo: Dict[str, Libro] = {}
+    def __init__(self, catalogo: Optional[MutableMapping[str, Libro]] = None) -> None:
+        self.catalogo: MutableMapping[str, Libro] = {} if catalogo is None else catalogo
         self.usuarios: Dict[str, Usuario] = {}
         self.ids_usuarios: Set[str] = set()
         self.prestamos_activos: Dict[str, str] = {}  # isbn -> user_id
+        self.fecha_prestamo: Dict[str, str] = {}  # isbn -> fecha ISO del préstamo activo
+        self.prestamos_por_categoria: Dict[str, Dict[str, None]] = {}
+        self.prestamos_por_dia: Dict[str, Dict[str, None]] = {}
+        self.dias_con_prestamos: List[str] = []  # claves de prestamos_por_dia, ordenadas
         self.historial: List[Dict[str, str]] = []  # registros simples legibles
+        self._oyentes: List[Oyente] = []
+
+    # --- Oyentes ---
+    def suscribir(self, oyente: Oyente) -> None:
+        """Registra una función que recibirá (evento, datos) tras cada cambio de estado."""
+        self._oyentes.append(oyente)
+
+    def desuscribir(self, oyente: Oyente) -> None:
+        self._oyentes.remove(oyente)
+
+    def _emitir(self, evento: str, datos: Dict[str, str]) -> None:
+        for oyente in self._oyentes:
+            oyente(evento, datos)
 
     # --- Gestión de libros ---
     def anadir_libro(self, libro: Libro) -> None:
         if libro.isbn in self.catalogo:
             raise ValueError(f"Ya existe un libro con ISBN {libro.isbn} en el catálogo.")
         self.catalogo[libro.isbn] = libro
+        self._emitir("alta_libro", {
+            "isbn": libro.isbn,
+            "titulo": libro.titulo,
+            "autor": libro.autor,
+            "categoria": libro.categoria,
+        })
+
+    def anadir_libros(self, libros: Iterable[Libro]) -> List[Libro]:
+        """Alta masiva: añade los libros nuevos y devuelve los duplicados en lugar de lanzar ValueError."""
+        duplicados: List[Libro] = []
+        catalogo = self.catalogo
+        for libro in libros:
+            if libro.isbn in catalogo:
+                duplicados.append(libro)
+                continue
+            catalogo[libro.isbn] = libro
+            if self._oyentes:
+                self._emitir("alta_libro", {
+                    "isbn": libro.isbn,
+                    "titulo": libro.titulo,
+                    "autor": libro.autor,
+                    "categoria": libro.categoria,
+                })
+        return duplicados
 
     def quitar_libro(self, isbn: str) -> None:
         if isbn not in self.catalogo:
             raise KeyError(f"ISBN {isbn} no existe en el catálogo.")
         if isbn in self.prestamos_activos:
             raise ValueError(f"No se puede quitar el libro {isbn} porque está prestado.")
-        del self.catalogo[isbn]
+        libro = self.catalogo.pop(isbn)
+        self._emitir("baja_libro", {
+            "isbn": isbn,
+            "titulo": libro.titulo,
+            "autor": libro.autor,
+            "categoria": libro.categoria,
+        })
 
     # --- Gestión de usuarios ---
     def registrar_usuario(self, usuario: Usuario) -> None:
@@ -92,6 +162,7 @@ class Biblioteca:
             raise ValueError(f"El ID de usuario {usuario.user_id} ya está registrado.")
         self.ids_usuarios.add(usuario.user_id)
         self.usuarios[usuario.user_id] = usuario
+        self._emitir("alta_usuario", {"user_id": usuario.user_id, "nombre": usuario.nombre})
 
     def baja_usuario(self, user_id: str) -> None:
         if user_id not in self.usuarios:
@@ -103,9 +174,11 @@ class Biblioteca:
             )
         del self.usuarios[user_id]
         self.ids_usuarios.remove(user_id)
+        self._emitir("baja_usuario", {"user_id": user_id})
 
     # --- Préstamos ---
-    def prestar_libro(self, isbn: str, user_id: str) -> None:
+    def prestar_libro(self, isbn: str, user_id: str, fecha: Optional[str] = None) -> None:
+        """Presta un libro. `fecha` (ISO) permite reproducir eventos pasados; por defecto, ahora."""
         if isbn not in self.catalogo:
             raise KeyError(f"ISBN {isbn} no existe en el catálogo.")
         if user_id not in self.usuarios:
@@ -113,34 +186,61 @@ class Biblioteca:
         if isbn in self.prestamos_activos:
             raise ValueError(f"El libro {isbn} ya está prestado al usuario {self.prestamos_activos[isbn]}.")
 
-        usuario = self.usuarios[user_id]
-        usuario.prestados.append(isbn)  # Lista: estructura pedida para libros prestados
-        self.prestamos_activos[isbn] = user_id
-        self.historial.append({
+        registro = {
             "evento": "prestamo",
             "isbn": isbn,
             "user_id": user_id,
-            "fecha": datetime.now().isoformat(timespec="seconds"),
-        })
+            "fecha": fecha or datetime.now().isoformat(timespec="seconds"),
+        }
+        self._indexar_prestamo(isbn, user_id, registro["fecha"])
+        self.historial.append(registro)
+        self._emitir("prestamo", registro)
 
-    def devolver_libro(self, isbn: str) -> None:
+    def devolver_libro(self, isbn: str, fecha: Optional[str] = None) -> None:
         if isbn not in self.prestamos_activos:
             raise ValueError(f"El libro {isbn} no figura como prestado.")
+        user_id = self.prestamos_activos[isbn]
+        self._desindexar_prestamo(isbn)
+        registro = {
+            "evento": "devolucion",
+            "isbn": isbn,
+            "user_id": user_id,
+            "fecha": fecha or datetime.now().isoformat(timespec="seconds"),
+        }
+        self.historial.append(registro)
+        self._emitir("devolucion", registro)
+
+    def _indexar_prestamo(self, isbn: str, user_id: str, fecha: str) -> None:
+        """Registra un préstamo activo en todas las estructuras (sin historial ni oyentes)."""
+        self.usuarios[user_id].prestados[isbn] = None
+        self.prestamos_activos[isbn] = user_id
+        self.fecha_prestamo[isbn] = fecha
+        categoria = self.catalogo[isbn].categoria
+        self.prestamos_por_categoria.setdefault(categoria, {})[isbn] = None
+        dia = fecha[:10]
+        if dia not in self.prestamos_por_dia:
+            self.prestamos_por_dia[dia] = {}
+            insort(self.dias_con_prestamos, dia)  # casi siempre es el último día: inserción al final
+        self.prestamos_por_dia[dia][isbn] = None
+
+    def _desindexar_prestamo(self, isbn: str) -> None:
         user_id = self.prestamos_activos.pop(isbn)
-        usuario = self.usuarios[user_id]
         try:
-            usuario.prestados.remove(isbn)
-        except ValueError:
+            del self.usuarios[user_id].prestados[isbn]
+        except KeyError:
             # Inconsistencia (no debería pasar), pero la manejamos con un aviso claro
             raise RuntimeError(
                 f"Inconsistencia: el usuario {user_id} no tenía registrado el ISBN {isbn} en su lista de prestados"
             )
-        self.historial.append({
-            "evento": "devolucion",
-            "isbn": isbn,
-            "user_id": user_id,
-            "fecha": datetime.now().isoformat(timespec="seconds"),
-        })
+        categoria = self.catalogo[isbn].categoria
+        del self.prestamos_por_categoria[categoria][isbn]
+        if not self.prestamos_por_categoria[categoria]:
+            del self.prestamos_por_categoria[categoria]
+        dia = self.fecha_prestamo.pop(isbn)[:10]
+        del self.prestamos_por_dia[dia][isbn]
+        if not self.prestamos_por_dia[dia]:
+            del self.prestamos_por_dia[dia]
+            del self.dias_con_prestamos[bisect_left(self.dias_con_prestamos, dia)]
 
     # --- Búsquedas ---
     def _filtrar(self, predicado) -> List[Libro]:
@@ -169,6 +269,40 @@ class Biblioteca:
         isbns = self.usuarios[user_id].prestados
         return [self.catalogo[isbn] for isbn in isbns]
 
+    def usuarios_con_categoria(self, categoria: str) -> Set[str]:
+        """IDs de usuarios que tienen prestado algún libro de la categoría (coincidencia exacta)."""
+        activos = self.prestamos_activos
+        return {activos[isbn] for isbn in self.prestamos_por_categoria.get(categoria, ())}
+
+    def usuarios_con_atrasos(self, dias: int = 14, hoy: Optional[date] = None) -> Dict[str, List[str]]:
+        """Usuarios con préstamos de hace más de `dias` días: {user_id: [isbn, ...]}.
+
+        Solo recorre los días anteriores al límite (búsqueda binaria en dias_con_prestamos).
+        """
+        limite = ((hoy or date.today()) - timedelta(days=dias)).isoformat()
+        atrasos: Dict[str, List[str]] = {}
+        activos = self.prestamos_activos
+        for dia in self.dias_con_prestamos[:bisect_left(self.dias_con_prestamos, limite)]:
+            for isbn in self.prestamos_por_dia[dia]:
+                atrasos.setdefault(activos[isbn], []).append(isbn)
+        return atrasos
+
+    def reporte_prestamos_por_usuario(self) -> Dict[str, List[Libro]]:
+        """Todos los préstamos activos agrupados por usuario (sin recorrer `usuarios`)."""
+        reporte: Dict[str, List[Libro]] = {}
+        catalogo = self.catalogo
+        for isbn, user_id in self.prestamos_activos.items():
+            reporte.setdefault(user_id, []).append(catalogo[isbn])
+        return reporte
+
+    def reporte_prestamos_por_categoria(self) -> Dict[str, List[Tuple[Libro, str]]]:
+        """Préstamos activos por categoría: {categoria: [(libro, user_id), ...]}."""
+        catalogo, activos = self.catalogo, self.prestamos_activos
+        return {
+            categoria: [(catalogo[isbn], activos[isbn]) for isbn in isbns]
+            for categoria, isbns in self.prestamos_por_categoria.items()
+        }
+
     def listar_disponibles(self) -> List[Libro]:
         """Devuelve libros no prestados actualmente."""
         return [lib for isbn, lib in self.catalogo.items() if isbn not in self.prestamos_activos]
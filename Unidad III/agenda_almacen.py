@@ -0,0 +1,513 @@
+"""
+agenda_almacen.py
+Almacén de eventos de la Agenda Personal, indexado por fecha.
+
+- Los eventos se guardan ordenados por su inicio (datetime) en listas con bisect, así que
+  "esta semana" o "marzo de 2026" son dos búsquedas binarias más la copia del resultado.
+- Para detectar solapamientos hay una segunda lista ordenada con los finales. Un evento
+  [s, e) se solapa con #(inicios < e) - #(finales <= s) eventos: dos bisect, O(log n).
+  Para listarlos, los inicios se reparten además por clase de duración (potencias de 2 en
+  minutos): en cada clase solo se miran los que empiezan como mucho esa duración antes de s,
+  así que un evento de varias semanas no obliga a recorrer todo lo demás.
+- Los eventos repetidos (diarios, semanales, mensuales) se guardan una sola vez como Serie
+  (evento + Recurrencia) y se expanden con generadores solo dentro de la ventana consultada:
+  la k-ésima ocurrencia se calcula directamente, sin recorrer las anteriores. Se indexan por
+  día de la semana (semanales) o del mes (mensuales) para no mirarlas todas en cada
+  comprobación de solapamientos.
+- Se guarda en disco como JSON (escritura atómica con archivo temporal + os.replace).
+
+El almacén se comporta como una secuencia (len, [i]) de los eventos únicos en orden
+cronológico, que es lo que necesita la vista virtual de la agenda. Las consultas por rango
+(día, semana, mes) devuelven eventos únicos y ocurrencias de series mezclados por fecha.
+
+Ejecutar `python agenda_almacen.py --bench` mide 1.000 series repartidas en 10 años.
+"""
+
+import heapq
+import json
+import os
+import re
+from bisect import bisect_left, bisect_right, insort
+from calendar import monthrange
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+
+FORMATO_FECHA = "%d/%m/%Y"
+FORMATO_HORA = "%H:%M"
+
+# Camino rápido precompilado para dd/mm/yyyy y HH:MM: una expresión regular y datetime() en lugar
+# de strptime, que vuelve a interpretar el formato en cada llamada. Lo que no encaje (p. ej. "1/3/2026")
+# pasa por strptime, así que se aceptan exactamente los mismos valores que antes.
+_RE_FECHA = re.compile(r"([0-9]{2})/([0-9]{2})/([0-9]{4})")
+_RE_HORA = re.compile(r"([0-9]{2}):([0-9]{2})")
+
+
+def leer_fecha(texto):
+    """dd/mm/yyyy -> date; ValueError si no es una fecha válida."""
+    m = _RE_FECHA.fullmatch(texto)
+    if m is None:
+        return datetime.strptime(texto, FORMATO_FECHA).date()
+    return date(int(m[3]), int(m[2]), int(m[1]))
+
+
+def leer_hora(texto):
+    """HH:MM (24 horas) -> time; ValueError si no es una hora válida."""
+    m = _RE_HORA.fullmatch(texto)
+    if m is None:
+        return datetime.strptime(texto, FORMATO_HORA).time()
+    return time(int(m[1]), int(m[2]))
+
+
+def convertir_fecha_hora(fecha, hora):
+    return datetime.combine(leer_fecha(fecha), leer_hora(hora))
+
+
+@dataclass
+class Evento:
+    fecha: str  # dd/mm/yyyy
+    hora: str  # HH:MM
+    descripcion: str
+    duracion: int = 60  # minutos
+    id: int = 0  # lo asigna el almacén; en una ocurrencia de serie es (id de la serie, fecha)
+    inicio: datetime = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self.inicio is None:
+            self.inicio = convertir_fecha_hora(self.fecha, self.hora)
+
+    @property
+    def fin(self):
+        return self.inicio + timedelta(minutes=self.duracion)
+
+    def valores(self):
+        return (self.fecha, self.hora, self.descripcion)
+
+    def a_dict(self):
+        return {"id": self.id, "fecha": self.fecha, "hora": self.hora,
+                "descripcion": self.descripcion, "duracion": self.duracion}
+
+
+FRECUENCIAS = ("diaria", "semanal", "mensual")
+
+
+def _sumar_meses(momento, meses):
+    """Mismo día y hora `meses` después; en meses más cortos, su último día (31 -> 30, 28...)."""
+    total = momento.month - 1 + meses
+    anio, mes = momento.year + total // 12, total % 12 + 1
+    return momento.replace(year=anio, month=mes, day=min(momento.day, monthrange(anio, mes)[1]))
+
+
+@dataclass
+class Recurrencia:
+    frecuencia: str  # "diaria" | "semanal" | "mensual"
+    intervalo: int = 1  # cada cuántos días, semanas o meses
+    hasta: str = ""  # dd/mm/yyyy, incluida; vacío = sin fecha final
+    veces: int = 0  # número total de ocurrencias; 0 = sin límite
+    excepciones: set = field(default_factory=set)  # fechas dd/mm/yyyy omitidas
+
+    def __post_init__(self):
+        if self.frecuencia not in FRECUENCIAS:
+            raise ValueError(f"Frecuencia desconocida: {self.frecuencia!r}.")
+        if self.intervalo < 1 or self.veces < 0:
+            raise ValueError("El intervalo debe ser >= 1 y las veces >= 0.")
+        self.excepciones = set(self.excepciones)
+
+    @property
+    def limite(self):
+        """Primer instante fuera de la serie según `hasta` (None si no tiene fecha final)."""
+        return datetime.strptime(self.hasta, FORMATO_FECHA) + timedelta(days=1) if self.hasta else None
+
+    def describir(self):
+        unidades = {"diaria": "días", "semanal": "semanas", "mensual": "meses"}
+        texto = self.frecuencia if self.intervalo == 1 else f"cada {self.intervalo} {unidades[self.frecuencia]}"
+        if self.hasta:
+            texto += f" hasta {self.hasta}"
+        if self.veces:
+            texto += f", {self.veces} veces"
+        return texto
+
+    def a_dict(self):
+        return {"frecuencia": self.frecuencia, "intervalo": self.intervalo, "hasta": self.hasta,
+                "veces": self.veces, "excepciones": sorted(self.excepciones)}
+
+
+@dataclass
+class Serie:
+    """Evento repetido: se guarda la primera ocurrencia y la regla, nunca la lista expandida."""
+    evento: Evento
+    regla: Recurrencia
+
+    @property
+    def id(self):
+        return self.evento.id
+
+    def valores(self):
+        return (self.evento.fecha, self.evento.hora, f"{self.evento.descripcion} ({self.regla.describir()})")
+
+    def _inicio_k(self, k):
+        """Inicio de la k-ésima ocurrencia (k = 0 es la primera), en O(1)."""
+        regla = self.regla
+        if regla.frecuencia == "mensual":
+            return _sumar_meses(self.evento.inicio, k * regla.intervalo)
+        dias = regla.intervalo * (7 if regla.frecuencia == "semanal" else 1)
+        return self.evento.inicio + timedelta(days=k * dias)
+
+    def _primer_k(self, desde):
+        """Una k cuya ocurrencia no es posterior a la primera que empieza en o después de `desde`."""
+        base = self.evento.inicio
+        if desde <= base:
+            return 0
+        regla = self.regla
+        if regla.frecuencia == "mensual":
+            meses = (desde.year - base.year) * 12 + desde.month - base.month
+            return max(0, meses // regla.intervalo - 1)
+        paso = timedelta(days=regla.intervalo * (7 if regla.frecuencia == "semanal" else 1))
+        return -((base - desde) // paso)  # techo de (desde - base) / paso
+
+    def ocurrencias(self, desde, hasta):
+        """Genera las ocurrencias que empiezan en [desde, hasta), saltando directamente a `desde`."""
+        regla, base = self.regla, self.evento
+        limite = regla.limite
+        if limite is not None:
+            hasta = min(hasta, limite)
+        k = self._primer_k(desde)
+        while not regla.veces or k < regla.veces:
+            inicio = self._inicio_k(k)
+            if inicio >= hasta:
+                return
+            if inicio >= desde:
+                fecha = inicio.strftime(FORMATO_FECHA)
+                if fecha not in regla.excepciones:
+                    yield Evento(fecha, base.hora, base.descripcion, base.duracion, (base.id, fecha), inicio)
+            k += 1
+
+    def siguiente(self, desde):
+        """Primera ocurrencia que empieza en o después de `desde`, o None si la serie ya terminó."""
+        return next(self.ocurrencias(desde, datetime.max), None)
+
+    def ocurrencia(self, fecha):
+        """La ocurrencia del día `fecha` (dd/mm/yyyy), o None si ese día no hay."""
+        dia = datetime.strptime(fecha, FORMATO_FECHA)
+        return next(self.ocurrencias(dia, dia + timedelta(days=1)), None)
+
+    def a_dict(self):
+        return {"evento": self.evento.a_dict(), "regla": self.regla.a_dict()}
+
+
+class AlmacenEventos:
+    """Eventos ordenados por inicio, con índice de finales para solapamientos y guardado en JSON."""
+
+    def __init__(self, ruta=None):
+        self.ruta = ruta
+        self._por_id = {}  # id -> Evento
+        self._inicios = []  # [(inicio, id)] ordenado
+        self._finales = []  # [(fin, id)] ordenado
+        self._por_duracion = {}  # clase de duración (bit_length de los minutos) -> [(inicio, id)] ordenado
+        self._series = {}  # id -> Serie
+        self._series_por_dia = {}  # ("diaria",) | ("semanal", día de la semana) | ("mensual", día) -> {id: Serie}
+        self._duraciones_series = {}  # minutos -> cuántas series duran eso
+        self._siguiente_id = 1
+        if ruta and os.path.exists(ruta):
+            self.cargar()
+
+    # ---------- Secuencia en orden cronológico ----------
+    def __len__(self):
+        return len(self._inicios)
+
+    def __getitem__(self, indice):
+        return self._por_id[self._inicios[indice][1]]
+
+    def __iter__(self):
+        return (self._por_id[i] for _, i in self._inicios)
+
+    def __contains__(self, id_evento):
+        return id_evento in self._por_id or id_evento in self._series
+
+    def obtener(self, id_evento):
+        """Evento único, Serie o, si el id es (id de serie, fecha), esa ocurrencia."""
+        if isinstance(id_evento, tuple):
+            return self._series[id_evento[0]].ocurrencia(id_evento[1])
+        if id_evento in self._series:
+            return self._series[id_evento]
+        return self._por_id[id_evento]
+
+    def indice(self, id_evento):
+        """Posición cronológica de un evento único (búsqueda binaria); None si no es uno."""
+        evento = self._por_id.get(id_evento)
+        if evento is None:
+            return None
+        return bisect_left(self._inicios, (evento.inicio, id_evento))
+
+    def unicos_desde(self, momento):
+        """Eventos únicos que empiezan en o después de `momento`, en orden (búsqueda binaria + recorrido)."""
+        por_id = self._por_id
+        return (por_id[i] for _, i in self._inicios[bisect_left(self._inicios, (momento,)):])
+
+    def series(self):
+        """Las series, ordenadas por su primera ocurrencia."""
+        return sorted(self._series.values(), key=lambda s: s.evento.inicio)
+
+    # ---------- Altas y bajas ----------
+    def agregar(self, evento):
+        if not evento.id:
+            evento.id = self._siguiente_id
+        if evento.id in self:
+            raise ValueError(f"Ya existe un evento con id {evento.id}.")
+        self._siguiente_id = max(self._siguiente_id, evento.id + 1)
+        self._por_id[evento.id] = evento
+        insort(self._inicios, (evento.inicio, evento.id))
+        insort(self._finales, (evento.fin, evento.id))
+        insort(self._por_duracion.setdefault(evento.duracion.bit_length(), []), (evento.inicio, evento.id))
+        return evento
+
+    def agregar_varios(self, eventos):
+        """Alta masiva: añade al final y reordena una sola vez (O(n log n) en lugar de n inserciones)."""
+        eventos = list(eventos)
+        for evento in eventos:
+            if not evento.id:
+                evento.id = self._siguiente_id
+            if evento.id in self:
+                raise ValueError(f"Ya existe un evento con id {evento.id}.")
+            self._siguiente_id = max(self._siguiente_id, evento.id + 1)
+            self._por_id[evento.id] = evento
+        self._inicios.extend((e.inicio, e.id) for e in eventos)
+        self._finales.extend((e.fin, e.id) for e in eventos)
+        self._inicios.sort()
+        self._finales.sort()
+        clases = set()
+        for e in eventos:
+            clase = e.duracion.bit_length()
+            self._por_duracion.setdefault(clase, []).append((e.inicio, e.id))
+            clases.add(clase)
+        for clase in clases:
+            self._por_duracion[clase].sort()
+        return eventos
+
+    def agregar_serie(self, evento, regla):
+        """Registra `evento` como primera ocurrencia de una serie que se repite según `regla`."""
+        if not evento.id:
+            evento.id = self._siguiente_id
+        if evento.id in self:
+            raise ValueError(f"Ya existe un evento con id {evento.id}.")
+        self._siguiente_id = max(self._siguiente_id, evento.id + 1)
+        serie = self._series[evento.id] = Serie(evento, regla)
+        self._indexar_serie(serie)
+        return serie
+
+    @staticmethod
+    def _clave_dia(serie):
+        """Día en que caen todas las ocurrencias: de la semana (semanal), del mes (mensual) o cualquiera."""
+        frecuencia, inicio = serie.regla.frecuencia, serie.evento.inicio
+        if frecuencia == "semanal":
+            return ("semanal", inicio.weekday())
+        if frecuencia == "mensual":
+            return ("mensual", inicio.day)  # en meses más cortos cae el último día (ver _sumar_meses)
+        return ("diaria",)
+
+    def _indexar_serie(self, serie):
+        self._series_por_dia.setdefault(self._clave_dia(serie), {})[serie.id] = serie
+        duracion = serie.evento.duracion
+        self._duraciones_series[duracion] = self._duraciones_series.get(duracion, 0) + 1
+
+    def _desindexar_serie(self, serie):
+        clave = self._clave_dia(serie)
+        del self._series_por_dia[clave][serie.id]
+        if not self._series_por_dia[clave]:
+            del self._series_por_dia[clave]
+        duracion = serie.evento.duracion
+        self._duraciones_series[duracion] -= 1
+        if not self._duraciones_series[duracion]:
+            del self._duraciones_series[duracion]
+
+    def eliminar(self, id_evento):
+        """Quita un evento único o una serie entera; con (id de serie, fecha) omite esa ocurrencia.
+
+        La ocurrencia de una serie que ya no existe se ignora (p. ej. si se borró la serie antes).
+        """
+        if isinstance(id_evento, tuple):
+            serie_id, fecha = id_evento
+            serie = self._series.get(serie_id)
+            if serie is not None:
+                serie.regla.excepciones.add(fecha)
+            return None
+        if id_evento in self._series:
+            serie = self._series.pop(id_evento)
+            self._desindexar_serie(serie)
+            return serie
+        evento = self._por_id.pop(id_evento)
+        del self._inicios[bisect_left(self._inicios, (evento.inicio, id_evento))]
+        del self._finales[bisect_left(self._finales, (evento.fin, id_evento))]
+        clase = evento.duracion.bit_length()
+        inicios = self._por_duracion[clase]
+        del inicios[bisect_left(inicios, (evento.inicio, id_evento))]
+        if not inicios:
+            del self._por_duracion[clase]
+        return evento
+
+    # ---------- Consultas por rango ----------
+    def entre(self, desde, hasta):
+        """Eventos y ocurrencias de series que empiezan en [desde, hasta), en orden cronológico."""
+        a = bisect_left(self._inicios, (desde,))
+        b = bisect_left(self._inicios, (hasta,), a)
+        unicos = [self._por_id[i] for _, i in self._inicios[a:b]]
+        if not self._series:
+            return unicos
+        # Cada serie se expande solo dentro de la ventana; heapq.merge mezcla los generadores ya ordenados
+        ocurrencias = (s.ocurrencias(desde, hasta) for s in self._series.values())
+        return list(heapq.merge(unicos, *ocurrencias, key=lambda e: e.inicio))
+
+    def dia(self, fecha):
+        inicio = datetime.combine(fecha, datetime.min.time())
+        return self.entre(inicio, inicio + timedelta(days=1))
+
+    def semana(self, fecha):
+        """Semana de lunes a domingo que contiene `fecha`."""
+        lunes = datetime.combine(fecha - timedelta(days=fecha.weekday()), datetime.min.time())
+        return self.entre(lunes, lunes + timedelta(days=7))
+
+    def mes(self, anio, mes):
+        siguiente = date(anio + (mes == 12), mes % 12 + 1, 1)
+        return self.entre(datetime(anio, mes, 1), datetime.combine(siguiente, datetime.min.time()))
+
+    # ---------- Solapamientos ----------
+    def cuantos_solapan(self, inicio, fin):
+        """Número de eventos únicos que se solapan con [inicio, fin), en O(log n)."""
+        # Un evento que no se solapa termina antes (fin <= inicio) o empieza después (inicio >= fin).
+        # Los que terminan antes también empiezan antes de `fin`, así que basta con restar.
+        return bisect_left(self._inicios, (fin,)) - bisect_right(self._finales, (inicio, float("inf")))
+
+    def _series_candidatas(self, desde, hasta):
+        """Series que pueden tener una ocurrencia que empiece en [desde, hasta), según su día."""
+        primero, ultimo = desde.date(), hasta.date()
+        if (ultimo - primero).days >= 31:
+            return list(self._series.values())
+        por_dia = self._series_por_dia
+        claves = {("diaria",)}
+        dia = primero
+        while dia <= ultimo:
+            claves.add(("semanal", dia.weekday()))
+            if dia.day == monthrange(dia.year, dia.month)[1]:
+                # Último día del mes: también caen aquí las mensuales de días que este mes no tiene
+                claves.update(("mensual", d) for d in range(dia.day, 32))
+            else:
+                claves.add(("mensual", dia.day))
+            dia += timedelta(days=1)
+        return [serie for clave in claves for serie in por_dia.get(clave, {}).values()]
+
+    def solapamientos(self, inicio, fin):
+        """Eventos y ocurrencias que se solapan con [inicio, fin). Los únicos solo se recorren si hay alguno."""
+        solapados = []
+        if self.cuantos_solapan(inicio, fin):
+            # En la clase c nadie dura más de 2**c - 1 minutos: solo pueden solaparse los que
+            # empiezan en [inicio - (2**c - 1) min, fin); de ellos, los que acaban después de `inicio`
+            for clase, inicios in self._por_duracion.items():
+                a = bisect_left(inicios, (inicio - timedelta(minutes=(1 << clase) - 1),))
+                b = bisect_left(inicios, (fin,), a)
+                candidatos = (self._por_id[i] for _, i in inicios[a:b])
+                solapados.extend(e for e in candidatos if e.fin > inicio)
+            solapados.sort(key=lambda e: (e.inicio, e.id))
+        if self._series:
+            desde = inicio - timedelta(minutes=max(self._duraciones_series))
+            for serie in self._series_candidatas(desde, fin):
+                desde = inicio - timedelta(minutes=serie.evento.duracion)
+                solapados.extend(e for e in serie.ocurrencias(desde, fin) if e.fin > inicio)
+        return solapados
+
+    # ---------- Persistencia ----------
+    def instantanea(self):
+        """Copia barata (referencias) del contenido, para serializarla en otro hilo sin bloquear la interfaz."""
+        return list(self._por_id.values()), [s.a_dict() for s in self._series.values()]
+
+    @staticmethod
+    def escribir_instantanea(instantanea, archivo):
+        eventos, series = instantanea
+        # json.dump (no dumps) codifica por trozos, así otro hilo no retiene el GIL durante todo el guardado
+        json.dump({"eventos": [e.a_dict() for e in eventos], "series": series}, archivo, ensure_ascii=False)
+
+    def guardar(self, ruta=None):
+        ruta = ruta or self.ruta
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as archivo:
+            self.escribir_instantanea(self.instantanea(), archivo)
+        os.replace(temporal, ruta)
+
+    def cargar(self, ruta=None):
+        ruta = ruta or self.ruta
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        if isinstance(datos, list):  # formato anterior: solo eventos únicos
+            datos = {"eventos": datos, "series": []}
+        eventos = [Evento(**d) for d in datos["eventos"]]
+        self._series = {}
+        self._series_por_dia = {}
+        self._duraciones_series = {}
+        for d in datos["series"]:
+            serie = Serie(Evento(**d["evento"]), Recurrencia(**d["regla"]))
+            self._series[serie.id] = serie
+            self._indexar_serie(serie)
+        # Carga masiva: un sort en lugar de una inserción ordenada por evento
+        self._por_id = {e.id: e for e in eventos}
+        self._inicios = sorted((e.inicio, e.id) for e in eventos)
+        self._finales = sorted((e.fin, e.id) for e in eventos)
+        self._por_duracion = {}
+        for inicio, id_evento in self._inicios:  # ya ordenados: cada clase sale ordenada
+            self._por_duracion.setdefault(self._por_id[id_evento].duracion.bit_length(), []).append((inicio, id_evento))
+        self._siguiente_id = max(max(self._por_id, default=0), max(self._series, default=0)) + 1
+
+
+# ====== MEDICIÓN ======
+def medir_series(n_series=1000, anios=10, consultas=500):
+    """Memoria y tiempo de consulta con `n_series` series sin fin repartidas en `anios` años."""
+    import random
+    import time as reloj
+    import tracemalloc
+
+    azar = random.Random(3)
+    inicio_total = datetime(2026, 1, 1)
+    tracemalloc.start()
+    almacen = AlmacenEventos()
+    for i in range(n_series):
+        comienzo = inicio_total + timedelta(days=azar.randrange(365 * anios), minutes=15 * azar.randrange(96))
+        regla = Recurrencia(azar.choice(FRECUENCIAS), intervalo=azar.randint(1, 2))
+        almacen.agregar_serie(Evento(comienzo.strftime(FORMATO_FECHA), comienzo.strftime(FORMATO_HORA),
+                                     f"Serie {i}", 30), regla)
+    memoria_kib = tracemalloc.get_traced_memory()[0] / 1024
+    tracemalloc.stop()
+
+    # Lo que habría que guardar si se insertara cada ocurrencia como un evento suelto
+    fin_total = inicio_total + timedelta(days=365 * anios)
+    materializadas = sum(sum(1 for _ in s.ocurrencias(inicio_total, fin_total)) for s in almacen.series())
+
+    fechas = [(inicio_total + timedelta(days=azar.randrange(365 * anios))).date() for _ in range(consultas)]
+    resultados = {"series": n_series, "ocurrencias_en_10_anios": materializadas,
+                  "memoria_kib": round(memoria_kib)}
+    for nombre, consulta in (("semana", almacen.semana), ("mes", lambda f: almacen.mes(f.year, f.month))):
+        inicio = reloj.perf_counter()
+        total = sum(len(consulta(f)) for f in fechas)
+        resultados[f"{nombre}_ms"] = round((reloj.perf_counter() - inicio) / consultas * 1000, 2)
+        resultados[f"{nombre}_filas_media"] = round(total / consultas)
+    inicio = reloj.perf_counter()
+    for f in fechas:
+        momento = datetime.combine(f, datetime.min.time()) + timedelta(hours=10)
+        almacen.solapamientos(momento, momento + timedelta(hours=1))
+    resultados["solapamiento_ms"] = round((reloj.perf_counter() - inicio) / consultas * 1000, 2)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_series())
+        sys.exit(0)
+
+    almacen = AlmacenEventos()
+    almacen.agregar(Evento("05/03/2026", "10:30", "Dentista", 45))
+    reunion = almacen.agregar_serie(Evento("02/03/2026", "10:00", "Reunión de equipo", 60),
+                                    Recurrencia("semanal", hasta="30/06/2026"))
+    almacen.agregar_serie(Evento("31/01/2026", "09:00", "Pagar alquiler", 15), Recurrencia("mensual", veces=12))
+    almacen.eliminar((reunion.id, "16/03/2026"))  # esa semana no hay reunión
+    for evento in almacen.mes(2026, 3):
+        print(evento.fecha, evento.hora, evento.descripcion)
+    print("Se solapan con el 09/03 10:30:", [e.descripcion for e in almacen.solapamientos(
+        datetime(2026, 3, 9, 10, 30), datetime(2026, 3, 9, 11))])
@@ -0,0 +1,355 @@
+"""
+agenda_ics.py
+Importación y exportación de calendarios iCalendar (.ics, RFC 5545) para la Agenda Personal.
+
+- La lectura es en streaming: el archivo se recorre línea a línea (desplegando las líneas
+  continuadas) y cada VEVENT se convierte en Evento en cuanto se cierra, sin cargar el
+  archivo entero ni construir un árbol del calendario.
+- Las fechas (20260302T100000, 20260302T100000Z, 20260302) se leen con una expresión regular
+  precompilada y datetime(), sin strptime. Las horas en UTC (sufijo Z) se pasan a la hora local;
+  las que llevan TZID se toman tal cual, como hora de pared.
+- RRULE con FREQ=DAILY/WEEKLY/MONTHLY (INTERVAL, COUNT, UNTIL) y EXDATE se convierten en Serie.
+  Otras reglas se rechazan con su motivo, igual que los VEVENT sin DTSTART o con fechas rotas.
+- `importar_por_partes` añade los eventos al almacén en bloques y se detiene tras cada uno,
+  para que la interfaz pueda intercalar su bucle de eventos (after) entre bloque y bloque.
+
+Ejecutar `python agenda_ics.py --bench [n]` importa y exporta un calendario de n eventos.
+"""
+
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from agenda_almacen import AlmacenEventos, Evento, Recurrencia, leer_fecha
+
+_RE_FECHA_ICS = re.compile(r"([0-9]{4})([0-9]{2})([0-9]{2})(?:T([0-9]{2})([0-9]{2})([0-9]{2})(Z?))?")
+_RE_DURACION = re.compile(r"([+-]?)P(?:([0-9]+)W)?(?:([0-9]+)D)?(?:T(?:([0-9]+)H)?(?:([0-9]+)M)?(?:([0-9]+)S)?)?")
+_RE_ESCAPE = re.compile(r"\\([\\;,nN])")
+_DESESCAPAR = {"\\": "\\", ";": ";", ",": ",", "n": " ", "N": " "}  # la agenda usa una línea por evento
+
+FRECUENCIAS_ICS = {"DAILY": "diaria", "WEEKLY": "semanal", "MONTHLY": "mensual"}
+_PROPIEDADES_USADAS = frozenset(("DTSTART", "DTEND", "DURATION", "SUMMARY", "RRULE", "EXDATE"))
+_DIAS_ICS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+@dataclass
+class ResultadoIcs:
+    eventos: int = 0
+    series: int = 0
+    rechazados: list = field(default_factory=list)  # [(línea del BEGIN:VEVENT, motivo)]
+    segundos: float = 0.0
+
+
+def parsear_fecha_ics(valor):
+    """Devuelve (datetime local sin zona, es_dia_completo). ValueError si no es una fecha iCalendar."""
+    m = _RE_FECHA_ICS.fullmatch(valor)
+    if m is None:
+        raise ValueError(f"Fecha iCalendar no válida: {valor!r}")
+    anio, mes, dia, hora, minuto, segundo, utc = m.groups()
+    if hora is None:
+        return datetime(int(anio), int(mes), int(dia)), True
+    momento = datetime(int(anio), int(mes), int(dia), int(hora), int(minuto), int(segundo))
+    if utc:
+        momento = momento.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
+    return momento, False
+
+
+def parsear_duracion_ics(valor):
+    m = _RE_DURACION.fullmatch(valor)
+    if m is None or not any(m.groups()[1:]):
+        raise ValueError(f"Duración iCalendar no válida: {valor!r}")
+    signo, semanas, dias, horas, minutos, segundos = m.groups()
+    duracion = timedelta(weeks=int(semanas or 0), days=int(dias or 0), hours=int(horas or 0),
+                         minutes=int(minutos or 0), seconds=int(segundos or 0))
+    return -duracion if signo == "-" else duracion
+
+
+def _desescapar(texto):
+    return _RE_ESCAPE.sub(lambda m: _DESESCAPAR[m[1]], texto) if "\\" in texto else texto
+
+
+def _escapar(texto):
+    return texto.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _fecha_agenda(momento):
+    return f"{momento.day:02d}/{momento.month:02d}/{momento.year:04d}"
+
+
+def _lineas_desplegadas(archivo):
+    """Une las líneas continuadas (las que empiezan por espacio o tabulador) con la anterior."""
+    actual, numero_actual = None, 0
+    for numero, linea in enumerate(archivo, start=1):
+        linea = linea.rstrip("\r\n")
+        if linea[:1] in (" ", "\t") and actual is not None:
+            actual += linea[1:]
+            continue
+        if actual is not None:
+            yield numero_actual, actual
+        actual, numero_actual = linea, numero
+    if actual is not None:
+        yield numero_actual, actual
+
+
+def _regla_desde_rrule(valor, inicio):
+    partes = dict(p.split("=", 1) for p in valor.upper().split(";") if "=" in p)
+    frecuencia = FRECUENCIAS_ICS.get(partes.pop("FREQ", ""))
+    if frecuencia is None:
+        raise ValueError(f"Regla de repetición no admitida: {valor}")
+    # BYDAY/BYMONTHDAY que solo repiten el día de DTSTART (lo que exportan muchos calendarios) equivalen a nada
+    if partes.get("BYDAY") == _DIAS_ICS[inicio.weekday()] and frecuencia == "semanal":
+        del partes["BYDAY"]
+    if partes.get("BYMONTHDAY") == str(inicio.day) and frecuencia == "mensual":
+        del partes["BYMONTHDAY"]
+    partes.pop("WKST", None)
+    intervalo = int(partes.pop("INTERVAL", 1))
+    veces = int(partes.pop("COUNT", 0))
+    hasta = partes.pop("UNTIL", "")
+    if partes:
+        raise ValueError(f"Regla de repetición no admitida: {valor}")
+    if hasta:
+        hasta = _fecha_agenda(parsear_fecha_ics(hasta)[0])
+    return Recurrencia(frecuencia, intervalo, hasta, veces)
+
+
+def _evento_desde_propiedades(propiedades):
+    """Convierte las propiedades de un VEVENT [(nombre, parámetros, valor)] en (Evento, Recurrencia o None)."""
+    inicio = fin = duracion = regla = None
+    dia_completo = False
+    resumen, excepciones = "", []
+    for nombre, parametros, valor in propiedades:
+        if nombre == "DTSTART":
+            inicio, dia_completo = parsear_fecha_ics(valor)
+        elif nombre == "DTEND":
+            fin = parsear_fecha_ics(valor)[0]
+        elif nombre == "DURATION":
+            duracion = parsear_duracion_ics(valor)
+        elif nombre == "SUMMARY":
+            resumen = _desescapar(valor)
+        elif nombre == "RRULE":
+            regla = valor
+        elif nombre == "EXDATE":
+            excepciones.extend(parsear_fecha_ics(v)[0] for v in valor.split(","))
+    if inicio is None:
+        raise ValueError("VEVENT sin DTSTART")
+    if fin is not None:
+        duracion = fin - inicio
+    elif duracion is None:
+        duracion = timedelta(days=1) if dia_completo else timedelta(0)
+    minutos = max(1, int(duracion.total_seconds() // 60))
+    evento = Evento(_fecha_agenda(inicio), f"{inicio.hour:02d}:{inicio.minute:02d}", resumen or "(sin título)",
+                    minutos, inicio=inicio.replace(second=0))
+    if regla is None:
+        return evento, None
+    recurrencia = _regla_desde_rrule(regla, inicio)
+    recurrencia.excepciones = {_fecha_agenda(e) for e in excepciones}
+    return evento, recurrencia
+
+
+def leer_ics(archivo, rechazados=None):
+    """Genera (Evento, Recurrencia o None) por cada VEVENT de `archivo` (cualquier iterable de líneas).
+
+    Los VEVENT que no se pueden convertir se añaden a `rechazados` como (línea, motivo).
+    Los componentes anidados (VALARM...) se saltan: su SUMMARY o DURATION no son los del evento.
+    """
+    propiedades, linea_inicio, anidados = None, 0, 0
+    for numero, linea in _lineas_desplegadas(archivo):
+        if propiedades is None:
+            if linea == "BEGIN:VEVENT":
+                propiedades, linea_inicio = [], numero
+        elif anidados or linea.upper().startswith("BEGIN:"):
+            if linea.upper().startswith("BEGIN:"):
+                anidados += 1
+            elif linea.upper().startswith("END:"):
+                anidados -= 1
+        elif linea == "END:VEVENT":
+            try:
+                convertido = _evento_desde_propiedades(propiedades)
+            except ValueError as e:
+                convertido = None
+                if rechazados is not None:
+                    rechazados.append((linea_inicio, str(e)))
+            propiedades = None
+            if convertido is not None:
+                yield convertido
+        else:
+            # NOMBRE;PARAM=...;PARAM=...:valor  (el valor puede contener ':' y ';')
+            cabecera, _, valor = linea.partition(":")
+            nombre, _, parametros = cabecera.partition(";")
+            nombre = nombre.upper()
+            if nombre in _PROPIEDADES_USADAS:  # UID, DTSTAMP, DESCRIPTION... no se guardan
+                propiedades.append((nombre, parametros, valor))
+
+
+def importar_por_partes(almacen, ruta, rechazados, tamano_parte=5000):
+    """Añade los eventos de `ruta` a `almacen` en bloques; tras cada uno genera (eventos, series) acumulados."""
+    eventos = series = 0
+    with open(ruta, "r", encoding="utf-8", newline="") as archivo:
+        pendientes = []
+        for evento, regla in leer_ics(archivo, rechazados):
+            if regla is not None:
+                almacen.agregar_serie(evento, regla)
+                series += 1
+                continue
+            pendientes.append(evento)
+            if len(pendientes) >= tamano_parte:
+                almacen.agregar_varios(pendientes)
+                eventos += len(pendientes)
+                pendientes = []
+                yield eventos, series
+        almacen.agregar_varios(pendientes)
+        eventos += len(pendientes)
+    yield eventos, series
+
+
+def importar_ics(almacen, ruta):
+    """Importación completa sin interfaz."""
+    inicio = time.perf_counter()
+    resultado = ResultadoIcs()
+    for resultado.eventos, resultado.series in importar_por_partes(almacen, ruta, resultado.rechazados):
+        pass
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+# ---------- Exportación ----------
+def _plegar(linea):
+    """Parte las líneas de más de 75 octetos como pide RFC 5545 (continuación con un espacio)."""
+    if len(linea) <= 75 and linea.isascii():
+        return linea + "\r\n"
+    trozos, actual, octetos = [], "", 0
+    for caracter in linea:
+        tamano = len(caracter.encode("utf-8"))
+        if octetos + tamano > 75:
+            trozos.append(actual)
+            actual, octetos = " ", 1
+        actual += caracter
+        octetos += tamano
+    trozos.append(actual)
+    return "\r\n".join(trozos) + "\r\n"
+
+
+def _formato_ics(momento):
+    return f"{momento.year:04d}{momento.month:02d}{momento.day:02d}T{momento.hour:02d}{momento.minute:02d}00"
+
+
+def _vevent(evento, sello, regla=None):
+    lineas = ["BEGIN:VEVENT", f"UID:{evento.id}@agenda-personal", f"DTSTAMP:{sello}",
+              f"DTSTART:{_formato_ics(evento.inicio)}", f"DTEND:{_formato_ics(evento.fin)}",
+              f"SUMMARY:{_escapar(evento.descripcion)}"]
+    if regla is not None:
+        rrule = f"RRULE:FREQ={next(k for k, v in FRECUENCIAS_ICS.items() if v == regla.frecuencia)}"
+        if regla.intervalo != 1:
+            rrule += f";INTERVAL={regla.intervalo}"
+        if regla.veces:
+            rrule += f";COUNT={regla.veces}"
+        if regla.hasta:
+            rrule += f";UNTIL={_formato_ics(regla.limite - timedelta(minutes=1))}"
+        lineas.append(rrule)
+        if regla.excepciones:
+            hora = evento.inicio.time()
+            fechas = sorted(datetime.combine(leer_fecha(f), hora) for f in regla.excepciones)
+            lineas.append("EXDATE:" + ",".join(_formato_ics(f) for f in fechas))
+    lineas.append("END:VEVENT")
+    return "".join(_plegar(linea) for linea in lineas)
+
+
+def exportar_ics(almacen, ruta):
+    """Escribe el almacén como .ics, evento a evento (escritura atómica como el JSON)."""
+    sello = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    temporal = ruta + ".tmp"
+    with open(temporal, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Agenda Personal//ES\r\n")
+        for evento in almacen:
+            archivo.write(_vevent(evento, sello))
+        for serie in almacen.series():
+            archivo.write(_vevent(serie.evento, sello, serie.regla))
+        archivo.write("END:VCALENDAR\r\n")
+    os.replace(temporal, ruta)
+
+
+# ====== MEDICIÓN ======
+def generar_ics(ruta, n):
+    """Calendario sintético de n eventos en 2026-2030, con ~1 % de series y algún VEVENT roto."""
+    inicio = datetime(2026, 1, 1, 8)
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Prueba//ES\r\n")
+        for i in range(n):
+            momento = inicio + timedelta(minutes=37 * i % (5 * 365 * 24 * 60))
+            archivo.write(f"BEGIN:VEVENT\r\nUID:{i}@prueba\r\nDTSTAMP:20260101T000000Z\r\n")
+            if i % 1000 != 999:
+                archivo.write(f"DTSTART:{_formato_ics(momento)}\r\n")
+            archivo.write(f"DURATION:PT{15 + i % 4 * 15}M\r\nSUMMARY:Reunión\\, número {i}\r\n")
+            if i % 100 == 0:
+                archivo.write("RRULE:FREQ=WEEKLY;COUNT=10\r\n")
+            archivo.write("END:VEVENT\r\n")
+        archivo.write("END:VCALENDAR\r\n")
+
+
+def medir_ics(n=200_000):
+    import tempfile
+
+    from agenda_almacen import convertir_fecha_hora
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "calendario.ics")
+        generar_ics(ruta, n)
+        almacen = AlmacenEventos()
+        resultado = importar_ics(almacen, ruta)
+        inicio = time.perf_counter()
+        exportar_ics(almacen, os.path.join(tmp, "exportado.ics"))
+        t_exportar = time.perf_counter() - inicio
+
+    # Validación de fecha y hora como en la interfaz: strptime frente al camino precompilado
+    valores = [(e.fecha, e.hora) for e in almacen]
+    inicio = time.perf_counter()
+    for fecha, hora in valores:
+        datetime.strptime(f"{fecha} {hora}", "%d/%m/%Y %H:%M")
+    t_strptime = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    for fecha, hora in valores:
+        convertir_fecha_hora(fecha, hora)
+    t_rapido = time.perf_counter() - inicio
+    return {
+        "vevents": n,
+        "eventos": resultado.eventos,
+        "series": resultado.series,
+        "rechazados": len(resultado.rechazados),
+        "importar_s": round(resultado.segundos, 2),
+        "exportar_s": round(t_exportar, 2),
+        "strptime_us": round(t_strptime / len(valores) * 1e6, 2),
+        "precompilado_us": round(t_rapido / len(valores) * 1e6, 2),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    if "--bench" in sys.argv:
+        resto = [a for a in sys.argv[1:] if a != "--bench"]
+        print(medir_ics(int(resto[0]) if resto else 200_000))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "ejemplo.ics")
+        with open(ruta, "w", encoding="utf-8", newline="") as f:
+            f.write("BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nDTSTART:20260302T100000\r\nDTEND:20260302T110000\r\n"
+                    "SUMMARY:Reunión de equipo\\, sala 2\r\nRRULE:FREQ=WEEKLY;BYDAY=MO;UNTIL=20260330T235959Z\r\n"
+                    "BEGIN:VALARM\r\nACTION:EMAIL\r\nSUMMARY:Aviso por correo\r\nDURATION:PT5M\r\n"
+                    "TRIGGER:-PT15M\r\nEND:VALARM\r\nEXDATE:20260316T100000\r\nEND:VEVENT\r\n"
+                    "BEGIN:VEVENT\r\nDTSTART;VALUE=DATE:20260305\r\n"
+                    "SUMMARY:Día festivo con una descripción muy larga que ocupa más de setenta y cin\r\n"
+                    " co octetos\r\nEND:VEVENT\r\nBEGIN:VEVENT\r\nSUMMARY:Sin fecha\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n")
+        almacen = AlmacenEventos()
+        resultado = importar_ics(almacen, ruta)
+        print(f"Eventos: {resultado.eventos}, series: {resultado.series}, rechazados: {resultado.rechazados}")
+        for evento in almacen.mes(2026, 3):
+            print(evento.fecha, evento.hora, evento.duracion, evento.descripcion)
+        # El SUMMARY y la DURATION del VALARM no deben pisar los de la reunión
+        reunion = almacen.series()[0].evento
+        assert (reunion.descripcion, reunion.duracion) == ("Reunión de equipo, sala 2", 60), reunion
+        exportar_ics(almacen, ruta)
+        print(open(ruta, encoding="utf-8").read())
@@ -0,0 +1,169 @@
+"""
+agenda_recordatorios.py
+Planificador de recordatorios para la Agenda Personal sobre el bucle de eventos de Tk.
+
+- Los recordatorios pendientes viven en un montículo (heapq) ordenado por momento, así que el
+  próximo siempre está en la cima: programar es O(log n) y no hay que recorrer los eventos.
+- Solo hay un temporizador `after()` armado, para el recordatorio más próximo. Mientras no vence
+  nada el proceso no hace ningún trabajo (como mucho se despierta cada 10 minutos para re-armarse
+  por si el reloj del sistema cambió), así que el consumo en reposo no depende de cuántos haya.
+- Cancelar o reprogramar es O(1) + O(log n): la entrada vieja se marca como obsoleta (deja de
+  estar en `_vigentes`) y se descarta cuando llega a la cima. Si las obsoletas pasan a ser mayoría
+  se reconstruye el montículo en O(n).
+
+Ejecutar `python agenda_recordatorios.py --bench` mide 100.000 recordatorios (necesita pantalla;
+en un servidor: xvfb-run python agenda_recordatorios.py --bench).
+"""
+
+import heapq
+import itertools
+import math
+from datetime import datetime
+
+ESPERA_MAXIMA_MS = 10 * 60 * 1000
+
+
+class PlanificadorRecordatorios:
+    """Recordatorios en un montículo con un único temporizador after() para el más próximo."""
+
+    def __init__(self, widget, al_vencer):
+        self.widget = widget  # cualquier widget de la ventana: se usa para after()
+        self.al_vencer = al_vencer  # al_vencer(clave, momento), siempre en el bucle de Tk
+        self._heap = []  # [(momento, secuencia, clave)]
+        self._vigentes = {}  # clave -> su entrada válida en el montículo
+        self._secuencia = itertools.count()  # desempata momentos iguales sin comparar claves
+        self._temporizador = None
+        self._armado_para = None  # momento para el que está armado el temporizador
+        self.despertares = 0  # veces que ha saltado el temporizador (para medir el reposo)
+
+    def __len__(self):
+        return len(self._vigentes)
+
+    def __contains__(self, clave):
+        return clave in self._vigentes
+
+    # ---------- Altas, bajas y cambios ----------
+    def programar(self, clave, momento):
+        """Programa (o reprograma) el recordatorio `clave` para `momento`, en O(log n)."""
+        entrada = (momento, next(self._secuencia), clave)
+        self._vigentes[clave] = entrada  # la entrada anterior de la clave, si la había, queda obsoleta
+        heapq.heappush(self._heap, entrada)
+        self._compactar()
+        if self._armado_para is None or momento < self._armado_para:
+            self._armar()
+
+    def programar_todos(self, pares):
+        """Sustituye todos los recordatorios por `pares` [(clave, momento)]: un heapify, O(n)."""
+        self._vigentes = {clave: (momento, next(self._secuencia), clave) for clave, momento in pares}
+        self._heap = list(self._vigentes.values())
+        heapq.heapify(self._heap)
+        self._armar()
+
+    def cancelar(self, clave):
+        entrada = self._vigentes.pop(clave, None)
+        if entrada is None:
+            return
+        self._compactar()
+        if entrada[0] == self._armado_para:
+            self._armar()
+
+    def proximo(self):
+        """Momento del próximo recordatorio, o None."""
+        self._limpiar_cima()
+        return self._heap[0][0] if self._heap else None
+
+    # ---------- Montículo ----------
+    def _limpiar_cima(self):
+        heap, vigentes = self._heap, self._vigentes
+        while heap and vigentes.get(heap[0][2]) is not heap[0]:
+            heapq.heappop(heap)
+
+    def _compactar(self):
+        if len(self._heap) > 2 * len(self._vigentes) + 64:
+            self._heap = list(self._vigentes.values())
+            heapq.heapify(self._heap)
+
+    # ---------- Temporizador ----------
+    def _armar(self):
+        if self._temporizador is not None:
+            self.widget.after_cancel(self._temporizador)
+            self._temporizador = None
+        self._armado_para = proximo = self.proximo()
+        if proximo is None:
+            return
+        # Redondeo hacia arriba: si after() saltara una fracción de milisegundo antes, no habría nada vencido
+        espera_ms = math.ceil((proximo - datetime.now()).total_seconds() * 1000)
+        self._temporizador = self.widget.after(min(max(0, espera_ms), ESPERA_MAXIMA_MS), self._disparar)
+
+    def _disparar(self):
+        self._temporizador = None
+        self.despertares += 1
+        ahora = datetime.now()
+        vencidos = []
+        self._limpiar_cima()
+        while self._heap and self._heap[0][0] <= ahora:
+            momento, _, clave = heapq.heappop(self._heap)
+            del self._vigentes[clave]
+            vencidos.append((clave, momento))
+            self._limpiar_cima()
+        # Se re-arma antes de avisar: al_vencer puede programar el siguiente (p. ej. de una serie)
+        self._armar()
+        for clave, momento in vencidos:
+            self.al_vencer(clave, momento)
+
+    def detener(self):
+        if self._temporizador is not None:
+            self.widget.after_cancel(self._temporizador)
+            self._temporizador = None
+
+
+# ====== MEDICIÓN ======
+def medir_planificador(n=100_000, segundos_reposo=10.0):
+    """Coste de programar/cancelar y CPU consumida en reposo con `n` recordatorios en los próximos 30 días."""
+    import random
+    import time
+    import tkinter as tk
+    from datetime import timedelta
+
+    azar = random.Random(5)
+    raiz = tk.Tk()
+    raiz.withdraw()
+    planificador = PlanificadorRecordatorios(raiz, lambda clave, momento: None)
+    ahora = datetime.now()
+    momentos = [ahora + timedelta(minutes=1 + azar.random() * 30 * 24 * 60) for _ in range(n)]
+
+    inicio = time.perf_counter()
+    for clave, momento in enumerate(momentos):
+        planificador.programar(clave, momento)
+    t_programar = (time.perf_counter() - inicio) / n
+    inicio = time.perf_counter()
+    for clave in range(0, n, 2):
+        planificador.cancelar(clave)
+    t_cancelar = (time.perf_counter() - inicio) / (n // 2)
+    inicio = time.perf_counter()
+    planificador.programar_todos(enumerate(momentos))
+    t_masivo = time.perf_counter() - inicio
+
+    cpu, reloj = time.process_time(), time.monotonic()
+    raiz.after(int(segundos_reposo * 1000), raiz.quit)
+    raiz.mainloop()
+    cpu_reposo = time.process_time() - cpu
+    reposo = time.monotonic() - reloj
+    raiz.destroy()
+    return {
+        "recordatorios": n,
+        "programar_us": round(t_programar * 1e6, 2),
+        "cancelar_us": round(t_cancelar * 1e6, 2),
+        "programar_todos_ms": round(t_masivo * 1000, 1),
+        "cpu_en_reposo_pct": round(100 * cpu_reposo / reposo, 2),
+        "despertares": planificador.despertares,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_planificador())
+        sys.exit(0)
+    print(__doc__)
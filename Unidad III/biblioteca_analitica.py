@@ -0,0 +1,276 @@
+"""Analítica de préstamos de Biblioteca con agregados materializados.
+
+AnaliticaPrestamos se suscribe a la biblioteca y actualiza, en cada préstamo/devolución:
+    - contadores por libro (con el top-k de los más prestados siempre al día),
+    - contadores por categoría y un histograma de préstamos por hora del día,
+    - un resumen (sketch) de duraciones de préstamo con media exacta y percentiles aproximados.
+
+Las consultas del panel leen esos agregados directamente, sin recorrer el historial.
+Para reconstruirlos desde cero está `recalcular()`, que con NumPy procesa todo el historial
+en operaciones vectorizadas (y sin NumPy recurre a un bucle equivalente).
+
+Ejecutar `python biblioteca_analitica.py --bench` compara ambos caminos.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+import time
+from bisect import insort
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from Bibliotecadigital import Biblioteca
+
+# NumPy es opcional: solo acelera el recálculo completo desde el historial.
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    NUMPY_DISPONIBLE = False
+
+SIN_CATEGORIA = "(fuera de catálogo)"
+
+
+class SketchDuracion:
+    """Histograma logarítmico de duraciones (en segundos) con error relativo acotado.
+
+    Cada cubeta cubre (gamma^(i-1), gamma^i], así que un percentil se estima con un error
+    relativo de `precision`. Guarda además cuenta, suma, mínimo y máximo exactos.
+    """
+
+    def __init__(self, precision: float = 0.01) -> None:
+        self.gamma = (1 + precision) / (1 - precision)
+        self._log_gamma = math.log(self.gamma)
+        self.cubetas: Dict[int, int] = {}
+        self.ceros = 0  # duraciones de 0 s (préstamo y devolución en el mismo segundo)
+        self.cuenta = 0
+        self.suma = 0.0
+        self.minimo = math.inf
+        self.maximo = 0.0
+
+    def agregar(self, segundos: float) -> None:
+        self.cuenta += 1
+        self.suma += segundos
+        self.minimo = min(self.minimo, segundos)
+        self.maximo = max(self.maximo, segundos)
+        if segundos <= 0:
+            self.ceros += 1
+            return
+        i = math.ceil(math.log(segundos) / self._log_gamma)
+        self.cubetas[i] = self.cubetas.get(i, 0) + 1
+
+    def agregar_lote(self, segundos: "np.ndarray") -> None:
+        """Versión vectorizada de agregar() para un array de NumPy."""
+        if not len(segundos):
+            return
+        self.cuenta += int(len(segundos))
+        self.suma += float(segundos.sum())
+        self.minimo = min(self.minimo, float(segundos.min()))
+        self.maximo = max(self.maximo, float(segundos.max()))
+        positivos = segundos[segundos > 0]
+        self.ceros += int(len(segundos) - len(positivos))
+        indices = np.ceil(np.log(positivos) / self._log_gamma).astype(np.int64)
+        for i, n in zip(*np.unique(indices, return_counts=True)):
+            self.cubetas[int(i)] = self.cubetas.get(int(i), 0) + int(n)
+
+    def media(self) -> float:
+        return self.suma / self.cuenta if self.cuenta else 0.0
+
+    def percentil(self, q: float) -> float:
+        """Percentil aproximado (q entre 0 y 1). Recorre solo las cubetas, no las duraciones."""
+        if not self.cuenta:
+            return 0.0
+        objetivo = q * (self.cuenta - 1)
+        acumulado = self.ceros
+        if objetivo < acumulado:
+            return 0.0
+        for i in sorted(self.cubetas):
+            acumulado += self.cubetas[i]
+            if objetivo < acumulado:
+                # Punto medio (en escala relativa) de la cubeta
+                return min(self.maximo, 2 * self.gamma ** i / (self.gamma + 1))
+        return self.maximo
+
+
+class AnaliticaPrestamos:
+    """Agregados de préstamos de una Biblioteca, actualizados con cada evento."""
+
+    def __init__(self, biblioteca: Biblioteca, top_k: int = 10, usar_numpy: bool = True) -> None:
+        self.biblioteca = biblioteca
+        self.top_k = top_k
+        self.recalcular(usar_numpy=usar_numpy)
+        biblioteca.suscribir(self._al_cambiar)
+
+    # --- Reconstrucción completa ---
+    def _reiniciar(self) -> None:
+        self.total_prestamos = 0
+        self.total_devoluciones = 0
+        self.prestamos_por_isbn: Dict[str, int] = {}
+        self.prestamos_por_categoria: Dict[str, int] = {}
+        self.prestamos_por_hora: List[int] = [0] * 24
+        self.duracion = SketchDuracion()
+        self._inicio: Dict[str, datetime] = {}  # isbn -> fecha del préstamo abierto
+        self._top: List[Tuple[int, str]] = []  # [(-prestamos, isbn)] ordenado, como mucho top_k
+
+    def recalcular(self, usar_numpy: bool = True) -> None:
+        """Recalcula todos los agregados desde `historial` (p. ej. tras cargar una biblioteca)."""
+        self._reiniciar()
+        if usar_numpy and NUMPY_DISPONIBLE:
+            self._recalcular_numpy(self.biblioteca.historial)
+        else:
+            for registro in self.biblioteca.historial:
+                self._al_cambiar(registro["evento"], registro)
+        self._reconstruir_top()
+
+    def _categoria(self, isbn: str) -> str:
+        libro = self.biblioteca.catalogo.get(isbn)
+        return libro.categoria if libro is not None else SIN_CATEGORIA
+
+    def _recalcular_numpy(self, historial: Sequence[Dict[str, str]]) -> None:
+        if not historial:
+            return
+        es_prestamo = np.fromiter((r["evento"] == "prestamo" for r in historial), dtype=bool, count=len(historial))
+        isbns_unicos, codigos = np.unique([r["isbn"] for r in historial], return_inverse=True)
+        fechas = np.array([r["fecha"] for r in historial], dtype="datetime64[s]")
+
+        # Conteos por libro y por categoría
+        conteos = np.bincount(codigos[es_prestamo], minlength=len(isbns_unicos))
+        self.total_prestamos = int(es_prestamo.sum())
+        self.total_devoluciones = len(historial) - self.total_prestamos
+        for isbn, n in zip(isbns_unicos.tolist(), conteos.tolist()):
+            if n:
+                self.prestamos_por_isbn[isbn] = n
+                categoria = self._categoria(isbn)
+                self.prestamos_por_categoria[categoria] = self.prestamos_por_categoria.get(categoria, 0) + n
+
+        # Histograma por hora del día
+        fechas_prestamo = fechas[es_prestamo]
+        horas = (fechas_prestamo.astype("datetime64[h]") - fechas_prestamo.astype("datetime64[D]")).astype(np.int64)
+        self.prestamos_por_hora = np.bincount(horas, minlength=24).tolist()
+
+        # Duraciones: ordenando de forma estable por libro, cada devolución sigue a su préstamo
+        orden = np.argsort(codigos, kind="stable")
+        cod, fec, pres = codigos[orden], fechas[orden], es_prestamo[orden]
+        emparejado = (~pres[1:]) & pres[:-1] & (cod[1:] == cod[:-1])
+        duraciones = (fec[1:] - fec[:-1])[emparejado].astype(np.int64).astype(np.float64)
+        self.duracion.agregar_lote(duraciones)
+
+        # Préstamos aún abiertos: el último evento de su libro es un préstamo
+        ultimo = np.ones(len(cod), dtype=bool)
+        ultimo[:-1] = cod[1:] != cod[:-1]
+        for i in np.flatnonzero(ultimo & pres).tolist():
+            self._inicio[isbns_unicos[cod[i]]] = fec[i].astype(datetime)
+
+    # --- Actualización incremental ---
+    def _al_cambiar(self, evento: str, datos: Dict[str, str]) -> None:
+        if evento == "prestamo":
+            isbn = datos["isbn"]
+            fecha = datetime.fromisoformat(datos["fecha"])
+            self.total_prestamos += 1
+            n = self.prestamos_por_isbn.get(isbn, 0) + 1
+            self.prestamos_por_isbn[isbn] = n
+            categoria = self._categoria(isbn)
+            self.prestamos_por_categoria[categoria] = self.prestamos_por_categoria.get(categoria, 0) + 1
+            self.prestamos_por_hora[fecha.hour] += 1
+            self._inicio[isbn] = fecha
+            self._subir_en_top(isbn, n)
+        elif evento == "devolucion":
+            self.total_devoluciones += 1
+            inicio = self._inicio.pop(datos["isbn"], None)
+            if inicio is not None:
+                fin = datetime.fromisoformat(datos["fecha"])
+                self.duracion.agregar((fin - inicio).total_seconds())
+
+    def _subir_en_top(self, isbn: str, n: int) -> None:
+        # Los contadores solo crecen: basta con recolocar este libro en el top-k
+        top = self._top
+        if len(top) == self.top_k and (-n, isbn) > top[-1]:
+            return
+        top[:] = [e for e in top if e[1] != isbn]
+        insort(top, (-n, isbn))
+        del top[self.top_k:]
+
+    def _reconstruir_top(self) -> None:
+        self._top = heapq.nsmallest(self.top_k, ((-n, isbn) for isbn, n in self.prestamos_por_isbn.items()))
+
+    # --- Consultas del panel (lecturas directas) ---
+    def top_libros(self, k: Optional[int] = None) -> List[Tuple[str, int]]:
+        """[(isbn, préstamos)] de los más prestados; k no puede superar top_k."""
+        return [(isbn, -menos_n) for menos_n, isbn in self._top[:k]]
+
+    def duracion_media_horas(self) -> float:
+        return self.duracion.media() / 3600
+
+    def duracion_percentil_horas(self, q: float) -> float:
+        return self.duracion.percentil(q) / 3600
+
+    def circulacion_por_categoria(self) -> Dict[str, int]:
+        return dict(self.prestamos_por_categoria)
+
+    def horas_punta(self, n: int = 3) -> List[Tuple[int, int]]:
+        """[(hora, préstamos)] de las n horas con más préstamos."""
+        return sorted(enumerate(self.prestamos_por_hora), key=lambda h: -h[1])[:n]
+
+
+# ====== MEDICIÓN ======
+def _historial_sintetico(biblio: Biblioteca, n_eventos: int) -> None:
+    """Rellena biblio con préstamos/devoluciones de fechas repartidas a lo largo de un año."""
+    import random
+    from datetime import timedelta
+    from Bibliotecadigital import Libro, Usuario
+
+    azar = random.Random(11)
+    for i in range(5000):
+        biblio.anadir_libro(Libro(identidad=(f"Titulo {i}", f"Autor {i % 300}"), categoria=f"Categoria {i % 25}",
+                                  isbn=str(9_780_000_000_000 + i)))
+    biblio.registrar_usuario(Usuario(nombre="Lector", user_id="U1", prestados=[]))
+    isbns = list(biblio.catalogo)
+    ahora = datetime(2025, 1, 1, 8)
+    while len(biblio.historial) < n_eventos:
+        ahora += timedelta(seconds=azar.randint(1, 120))
+        isbn = azar.choice(isbns)
+        if isbn in biblio.prestamos_activos:
+            biblio.devolver_libro(isbn, fecha=ahora.isoformat(timespec="seconds"))
+        else:
+            biblio.prestar_libro(isbn, "U1", fecha=ahora.isoformat(timespec="seconds"))
+
+
+def medir_analitica(n_eventos: int = 1_000_000) -> Dict[str, float]:
+    biblio = Biblioteca()
+    _historial_sintetico(biblio, n_eventos)
+    resultados: Dict[str, float] = {"eventos": len(biblio.historial)}
+    for usar_numpy in ((True, False) if NUMPY_DISPONIBLE else (False,)):
+        inicio = time.perf_counter()
+        analitica = AnaliticaPrestamos(biblio, usar_numpy=usar_numpy)
+        resultados["recalculo_numpy_s" if usar_numpy else "recalculo_python_s"] = round(time.perf_counter() - inicio, 2)
+        biblio.desuscribir(analitica._al_cambiar)
+    biblio.suscribir(analitica._al_cambiar)
+
+    inicio = time.perf_counter()
+    for _ in range(1000):
+        analitica.top_libros(10)
+        analitica.duracion_media_horas()
+        analitica.duracion_percentil_horas(0.95)
+        analitica.circulacion_por_categoria()
+        analitica.horas_punta()
+    resultados["panel_us"] = round((time.perf_counter() - inicio) / 1000 * 1e6, 1)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_analitica())
+        sys.exit(0)
+
+    biblio = Biblioteca()
+    _historial_sintetico(biblio, 2000)
+    analitica = AnaliticaPrestamos(biblio)
+    print("Más prestados:", analitica.top_libros(3))
+    print(f"Duración media: {analitica.duracion_media_horas():.2f} h "
+          f"(p95 ≈ {analitica.duracion_percentil_horas(0.95):.2f} h)")
+    print("Horas punta:", analitica.horas_punta())
+    print("Categorías con más circulación:",
+          sorted(analitica.circulacion_por_categoria().items(), key=lambda c: -c[1])[:3])
@@ -0,0 +1,303 @@
+"""Autocompletado por prefijo (búsqueda mientras se escribe) para Biblioteca.
+
+Cada IndicePrefijos guarda las sugerencias normalizadas (minúsculas, sin tildes) en una lista
+ordenada: los textos que empiezan por un prefijo forman un rango contiguo que se localiza con
+bisect. Para prefijos cortos, cuyo rango abarca gran parte del catálogo, se mantiene además en
+caché el top-k por popularidad, actualizado en cada préstamo. Los de 1 a `largo_fijo` letras
+(los de rango más largo) se calculan todos al cargar, en una pasada por la lista ordenada, y se
+mantienen siempre; los más largos se calculan la primera vez que se consultan.
+
+La popularidad son los préstamos: la de un título es la de su libro y la de un autor, la suma
+de sus libros. Se calcula una vez desde `historial` y después se actualiza con los eventos de
+la biblioteca (alta/baja de libros y préstamos), sin volver a recorrer nada.
+
+Ejecutar `python biblioteca_autocompletado.py --bench` mide la latencia de las consultas.
+"""
+from __future__ import annotations
+
+import heapq
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from itertools import groupby
+from typing import Dict, List, Tuple
+
+from Bibliotecadigital import Biblioteca, Libro
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes y con espacios simples: 'Cien  Años' -> 'cien anos'."""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.split())
+
+
+class IndicePrefijos:
+    """Sugerencias ordenadas con top-k en caché para prefijos de hasta `largo_cache` letras.
+
+    Los top-k de prefijos de hasta `largo_fijo` letras están siempre calculados.
+    """
+
+    def __init__(self, top_cache: int = 10, largo_cache: int = 6, largo_fijo: int = 4) -> None:
+        self.top_cache = top_cache
+        self.largo_cache = largo_cache
+        self.largo_fijo = min(largo_fijo, largo_cache)
+        self.claves: List[str] = []  # textos normalizados, ordenados
+        self.texto: Dict[str, str] = {}  # clave -> texto original a mostrar
+        self.popularidad: Dict[str, int] = {}
+        self.referencias: Dict[str, int] = {}  # cuántos libros aportan la sugerencia
+        self._cache: Dict[str, List[Tuple[int, str]]] = {}  # prefijo -> [(-popularidad, clave)] ordenado
+
+    # --- Mantenimiento ---
+    def cargar(self, textos: Dict[str, str], popularidad: Dict[str, int], referencias: Dict[str, int]) -> None:
+        """Carga masiva inicial: un único sort en lugar de una inserción ordenada por texto."""
+        self.texto = textos
+        self.popularidad = popularidad
+        self.referencias = referencias
+        self.claves = sorted(textos)
+        self._cache.clear()
+        self._precalcular()
+
+    def _precalcular(self) -> None:
+        """
+        Top-k de todos los prefijos de 1 a `largo_fijo` letras. Se agrupan las claves por sus
+        `largo_fijo` primeras letras (grupos contiguos en la lista ordenada) y cada nivel más
+        corto se obtiene mezclando los top-k de sus grupos hijos, sin volver a recorrer las claves.
+        """
+        k, popularidad = self.top_cache, self.popularidad
+        # Grupos por clave[:largo]; una clave más corta que `largo` forma su propio grupo
+        grupos = {
+            prefijo: heapq.nsmallest(k, ((-popularidad[c], c) for c in claves))
+            for prefijo, claves in groupby(self.claves, key=lambda c: c[:self.largo_fijo])
+        }
+        for largo in range(self.largo_fijo, 0, -1):
+            for prefijo, top in grupos.items():
+                if len(prefijo) == largo:
+                    self._cache[prefijo] = top
+            candidatos: Dict[str, List[Tuple[int, str]]] = {}
+            for prefijo, top in grupos.items():
+                candidatos.setdefault(prefijo[:largo - 1], []).extend(top)
+            grupos = {prefijo: heapq.nsmallest(k, top) for prefijo, top in candidatos.items() if prefijo}
+
+    def agregar(self, texto: str) -> None:
+        clave = normalizar(texto)
+        if not clave:
+            return
+        if clave in self.referencias:
+            self.referencias[clave] += 1
+            return
+        self.referencias[clave] = 1
+        self.texto[clave] = texto
+        self.popularidad[clave] = 0
+        insort(self.claves, clave)
+        for largo in range(1, min(len(clave), self.largo_fijo) + 1):
+            self._cache.setdefault(clave[:largo], [])  # primer texto con ese prefijo corto
+        self._actualizar_cache(clave)
+
+    def quitar(self, texto: str, prestamos: int = 0) -> None:
+        """Quita la aportación de un libro (y sus `prestamos`) a la sugerencia."""
+        clave = normalizar(texto)
+        if clave not in self.referencias:
+            return
+        self.referencias[clave] -= 1
+        if self.referencias[clave]:
+            if prestamos:
+                self.popularidad[clave] -= prestamos
+                self._invalidar_cache(clave)
+            return
+        del self.referencias[clave], self.texto[clave], self.popularidad[clave]
+        del self.claves[bisect_left(self.claves, clave)]
+        self._invalidar_cache(clave)
+
+    def sumar(self, texto: str, cantidad: int = 1) -> None:
+        clave = normalizar(texto)
+        if clave in self.popularidad:
+            self.popularidad[clave] += cantidad
+            self._actualizar_cache(clave)
+
+    def _prefijos_cache(self, clave: str):
+        for largo in range(1, min(len(clave), self.largo_cache) + 1):
+            prefijo = clave[:largo]
+            if prefijo in self._cache:
+                yield prefijo
+
+    def _actualizar_cache(self, clave: str) -> None:
+        """La popularidad solo sube (o entra una clave nueva): se corrige cada top-k en caché."""
+        entrada = (-self.popularidad[clave], clave)
+        for prefijo in self._prefijos_cache(clave):
+            top = self._cache[prefijo]
+            top[:] = [e for e in top if e[1] != clave]
+            if len(top) < self.top_cache or entrada < top[-1]:
+                insort(top, entrada)
+                del top[self.top_cache:]
+
+    def _invalidar_cache(self, clave: str) -> None:
+        """
+        Si una clave baja o desaparece, un top-k que la contenía se recalcula: los de prefijos
+        fijos en el momento (solo pasa al dar de baja libros) y los demás al consultarse.
+        """
+        for prefijo in list(self._prefijos_cache(clave)):
+            if any(c == clave for _, c in self._cache[prefijo]):
+                if len(prefijo) <= self.largo_fijo:
+                    self._cache[prefijo] = self._top_rango(prefijo, self.top_cache)
+                else:
+                    del self._cache[prefijo]
+
+    # --- Consultas ---
+    def _rango(self, prefijo: str) -> Tuple[int, int]:
+        inicio = bisect_left(self.claves, prefijo)
+        fin = bisect_left(self.claves, prefijo + "\U0010ffff", inicio)
+        return inicio, fin
+
+    def _top_rango(self, prefijo: str, k: int) -> List[Tuple[int, str]]:
+        inicio, fin = self._rango(prefijo)
+        popularidad = self.popularidad
+        return heapq.nsmallest(k, ((-popularidad[c], c) for c in self.claves[inicio:fin]))
+
+    def completar(self, prefijo: str, k: int = 5) -> List[Tuple[str, int]]:
+        """Top-k sugerencias [(texto, préstamos)] que empiezan por `prefijo`, más populares primero."""
+        q = normalizar(prefijo)
+        if not q:
+            return []
+        if len(q) <= self.largo_cache and k <= self.top_cache:
+            top = self._cache.get(q)
+            if top is None:
+                top = self._cache[q] = self._top_rango(q, self.top_cache)
+        else:
+            top = self._top_rango(q, k)
+        return [(self.texto[c], -menos_pop) for menos_pop, c in top[:k]]
+
+    def __len__(self) -> int:
+        return len(self.claves)
+
+
+class Autocompletado:
+    """Autocompletado de títulos y autores de una Biblioteca, suscrito a sus eventos."""
+
+    def __init__(self, biblioteca: Biblioteca, top_cache: int = 10, largo_cache: int = 6) -> None:
+        self.biblioteca = biblioteca
+        self.titulos = IndicePrefijos(top_cache, largo_cache)
+        self.autores = IndicePrefijos(top_cache, largo_cache)
+        self.prestamos_por_isbn: Dict[str, int] = {}
+        self._construir()
+        biblioteca.suscribir(self._al_cambiar)
+
+    def _construir(self) -> None:
+        # Una sola pasada por el historial para la popularidad inicial
+        prestamos: Dict[str, int] = {}
+        for registro in self.biblioteca.historial:
+            if registro["evento"] == "prestamo":
+                prestamos[registro["isbn"]] = prestamos.get(registro["isbn"], 0) + 1
+        self.prestamos_por_isbn = prestamos
+
+        for indice, atributo in ((self.titulos, "titulo"), (self.autores, "autor")):
+            textos: Dict[str, str] = {}
+            popularidad: Dict[str, int] = {}
+            referencias: Dict[str, int] = {}
+            for libro in self.biblioteca.catalogo.values():
+                texto = getattr(libro, atributo)
+                clave = normalizar(texto)
+                if not clave:
+                    continue
+                textos.setdefault(clave, texto)
+                popularidad[clave] = popularidad.get(clave, 0) + prestamos.get(libro.isbn, 0)
+                referencias[clave] = referencias.get(clave, 0) + 1
+            indice.cargar(textos, popularidad, referencias)
+
+    def _al_cambiar(self, evento: str, datos: Dict[str, str]) -> None:
+        if evento == "prestamo":
+            isbn = datos["isbn"]
+            self.prestamos_por_isbn[isbn] = self.prestamos_por_isbn.get(isbn, 0) + 1
+            libro = self.biblioteca.catalogo[isbn]
+            self.titulos.sumar(libro.titulo)
+            self.autores.sumar(libro.autor)
+        elif evento == "alta_libro":
+            self.titulos.agregar(datos["titulo"])
+            self.autores.agregar(datos["autor"])
+        elif evento == "baja_libro":
+            # El libro ya no está en el catálogo: el evento trae su título y autor
+            prestamos = self.prestamos_por_isbn.pop(datos["isbn"], 0)
+            self.titulos.quitar(datos["titulo"], prestamos)
+            self.autores.quitar(datos["autor"], prestamos)
+
+    def completar_titulo(self, prefijo: str, k: int = 5) -> List[Tuple[str, int]]:
+        return self.titulos.completar(prefijo, k)
+
+    def completar_autor(self, prefijo: str, k: int = 5) -> List[Tuple[str, int]]:
+        return self.autores.completar(prefijo, k)
+
+
+# ====== MEDICIÓN ======
+def medir_autocompletado(n_libros: int = 1_000_000, n_prestamos: int = 200_000,
+                         n_consultas: int = 20_000) -> Dict[str, float]:
+    import random
+
+    azar = random.Random(7)
+    silabas = ["ma", "ri", "so", "la", "ce", "do", "ra", "ne", "tu", "vi", "el", "an", "quí", "ño"]
+    biblio = Biblioteca()
+    for i in range(n_libros):
+        titulo = " ".join("".join(azar.choices(silabas, k=3)) for _ in range(3)) + f" {i}"
+        biblio.anadir_libro(Libro(identidad=(titulo.capitalize(), f"Autor {i % 20_000}"),
+                                  categoria="General", isbn=str(9_780_000_000_000 + i)))
+    from Bibliotecadigital import Usuario
+    biblio.registrar_usuario(Usuario(nombre="Lector", user_id="U1", prestados=[]))
+    isbns = list(biblio.catalogo)
+    for _ in range(n_prestamos):
+        isbn = isbns[min(int(azar.paretovariate(1.2)), len(isbns)) - 1]  # pocos libros muy populares
+        biblio.prestar_libro(isbn, "U1")
+        biblio.devolver_libro(isbn)
+
+    inicio = time.perf_counter()
+    auto = Autocompletado(biblio)
+    t_construccion = time.perf_counter() - inicio
+
+    prefijos = [normalizar(biblio.catalogo[azar.choice(isbns)].titulo)[:azar.randint(1, 8)]
+                for _ in range(n_consultas)]
+
+    def pasada() -> List[float]:
+        latencias = []
+        for p in prefijos:
+            t0 = time.perf_counter()
+            auto.completar_titulo(p, k=5)
+            latencias.append(time.perf_counter() - t0)
+        return sorted(latencias)
+
+    frias = pasada()  # primera vez que se ve cada prefijo: recorre su rango
+    calientes = pasada()  # prefijos ya tecleados antes: top-k en caché
+
+    t0 = time.perf_counter()
+    for isbn in isbns[:10_000]:
+        biblio.prestar_libro(isbn, "U1")
+        biblio.devolver_libro(isbn)
+    t_eventos = (time.perf_counter() - t0) / 20_000
+    return {
+        "libros": n_libros,
+        "segundos_construccion": round(t_construccion, 2),
+        "frio_p50_ms": round(frias[len(frias) // 2] * 1000, 3),
+        "frio_p99_ms": round(frias[int(len(frias) * 0.99)] * 1000, 3),
+        "caliente_p50_ms": round(calientes[len(calientes) // 2] * 1000, 3),
+        "caliente_p99_ms": round(calientes[int(len(calientes) * 0.99)] * 1000, 3),
+        "us_por_evento": round(t_eventos * 1e6, 1),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_autocompletado())
+        sys.exit(0)
+
+    from Bibliotecadigital import Usuario
+
+    biblio = Biblioteca()
+    biblio.anadir_libro(Libro(identidad=("Cien años de soledad", "Gabriel García Márquez"),
+                              categoria="Realismo mágico", isbn="9780307474728"))
+    biblio.anadir_libro(Libro(identidad=("Ciudades de papel", "John Green"), categoria="Novela", isbn="9788415594017"))
+    biblio.registrar_usuario(Usuario(nombre="Ana", user_id="U001", prestados=[]))
+    auto = Autocompletado(biblio)
+    biblio.prestar_libro("9788415594017", "U001")
+    biblio.anadir_libro(Libro(identidad=("Cinco semanas en globo", "Julio Verne"), categoria="Aventura",
+                              isbn="9788491051442"))
+    print("ci ->", auto.completar_titulo("ci"))
+    print("gab ->", auto.completar_autor("gab"))
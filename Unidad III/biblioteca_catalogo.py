@@ -0,0 +1,326 @@
+"""Catálogo compacto en columnas para millones de libros.
+
+CatalogoCompacto se comporta como el diccionario {isbn: Libro} de Biblioteca.catalogo
+(in, [], del, len, values(), items()...), pero no guarda objetos Libro:
+
+    - ISBN-13 numéricos empaquetados como enteros de 64 bits en un array('q'), localizados con
+      una tabla hash de direccionamiento abierto (otro array) en lugar de un dict de objetos int;
+    - autores y categorías codificados como enteros contra un diccionario de cadenas únicas;
+    - solo el título se guarda como cadena propia de cada fila.
+
+Los Libro se reconstruyen al leerlos, así que son iguales (==) pero no el mismo objeto.
+ISBNs que no encajan (con guiones, ISBN-10, con 'X'...) se guardan aparte en un dict normal.
+
+Ejecutar `python biblioteca_catalogo.py --bench [n]` mide bytes por libro y tiempo de carga.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from array import array
+from dataclasses import dataclass
+from typing import Dict, ItemsView, Iterator, List, MutableMapping, Optional, Tuple, ValuesView
+
+from Bibliotecadigital import Biblioteca, Libro
+
+
+def isbn_a_entero(isbn: str) -> Optional[int]:
+    """Empaqueta un ISBN-13 numérico (sin ceros a la izquierda) como entero; None si no se puede."""
+    if len(isbn) == 13 and isbn.isdigit() and isbn[0] != "0":
+        return int(isbn)
+    return None
+
+
+class DiccionarioCodigos:
+    """Asigna a cada cadena distinta un código entero estable (0, 1, 2...)."""
+
+    def __init__(self) -> None:
+        self.cadenas: List[str] = []
+        self.codigos: Dict[str, int] = {}
+
+    def codificar(self, texto: str) -> int:
+        codigo = self.codigos.get(texto)
+        if codigo is None:
+            codigo = self.codigos[texto] = len(self.cadenas)
+            self.cadenas.append(texto)
+        return codigo
+
+    def __len__(self) -> int:
+        return len(self.cadenas)
+
+
+class IndiceIsbn:
+    """Tabla hash {isbn empaquetado: fila} con sondeo lineal sobre un array('q').
+
+    Cada hueco guarda una fila (-1 si está vacío); la clave se lee de la columna de ISBNs,
+    así que el índice ocupa ~16 bytes por libro frente a ~100 de un dict con claves int.
+    """
+
+    VACIO = -1
+
+    def __init__(self, isbns: array) -> None:
+        self._isbns = isbns
+        self._bits = 4
+        self._tabla = array("q", [self.VACIO]) * (1 << self._bits)
+        self._usados = 0
+
+    def _hueco(self, clave: int) -> int:
+        """Hueco que contiene la clave o, si no está, el hueco vacío donde iría."""
+        mascara = len(self._tabla) - 1
+        i = ((clave * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._bits)  # hash de Fibonacci
+        tabla, isbns = self._tabla, self._isbns
+        while True:
+            fila = tabla[i]
+            if fila == self.VACIO or isbns[fila] == clave:
+                return i
+            i = (i + 1) & mascara
+
+    def buscar(self, clave: int) -> int:
+        return self._tabla[self._hueco(clave)]
+
+    def insertar(self, clave: int, fila: int) -> None:
+        if (self._usados + 1) * 2 > len(self._tabla):  # factor de carga máximo 0.5
+            self._crecer()
+        i = self._hueco(clave)
+        if self._tabla[i] == self.VACIO:
+            self._usados += 1
+        self._tabla[i] = fila
+
+    def mover(self, clave: int, fila: int) -> None:
+        """Actualiza la fila de una clave existente (tras rellenar un hueco del catálogo)."""
+        self._tabla[self._hueco(clave)] = fila
+
+    def eliminar(self, clave: int) -> None:
+        """Borra con desplazamiento hacia atrás para no dejar lápidas en la secuencia de sondeo."""
+        tabla, isbns = self._tabla, self._isbns
+        mascara = len(tabla) - 1
+        i = self._hueco(clave)
+        tabla[i] = self.VACIO
+        self._usados -= 1
+        j = i
+        while True:
+            j = (j + 1) & mascara
+            fila = tabla[j]
+            if fila == self.VACIO:
+                return
+            ideal = ((isbns[fila] * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - self._bits)
+            # Se mueve al hueco libre si este queda entre su posición ideal y la actual (cíclicamente)
+            if (j - ideal) & mascara >= (j - i) & mascara:
+                tabla[i] = fila
+                tabla[j] = self.VACIO
+                i = j
+
+    def _crecer(self) -> None:
+        vieja = self._tabla
+        self._bits += 1
+        self._tabla = array("q", [self.VACIO]) * (1 << self._bits)
+        for fila in vieja:
+            if fila != self.VACIO:
+                self._tabla[self._hueco(self._isbns[fila])] = fila
+
+
+class CatalogoCompacto(MutableMapping[str, Libro]):
+    """Mapeo {isbn: Libro} almacenado en columnas. Las bajas rellenan el hueco con la última fila."""
+
+    def __init__(self) -> None:
+        self._isbns = array("q")
+        self._filas = IndiceIsbn(self._isbns)  # isbn empaquetado -> fila
+        self._titulos: List[str] = []
+        self._autores = array("I")
+        self._categorias = array("I")
+        self.autores = DiccionarioCodigos()
+        self.categorias = DiccionarioCodigos()
+        self._otros: Dict[str, Libro] = {}  # ISBNs no empaquetables
+
+    def _libro(self, fila: int) -> Libro:
+        return Libro(
+            identidad=(self._titulos[fila], self.autores.cadenas[self._autores[fila]]),
+            categoria=self.categorias.cadenas[self._categorias[fila]],
+            isbn=str(self._isbns[fila]),
+        )
+
+    def __getitem__(self, isbn: str) -> Libro:
+        clave = isbn_a_entero(isbn)
+        if clave is None:
+            return self._otros[isbn]
+        fila = self._filas.buscar(clave)
+        if fila == IndiceIsbn.VACIO:
+            raise KeyError(isbn)
+        return self._libro(fila)
+
+    def __setitem__(self, isbn: str, libro: Libro) -> None:
+        clave = isbn_a_entero(isbn)
+        if clave is None:
+            self._otros[isbn] = libro
+            return
+        autor = self.autores.codificar(libro.autor)
+        categoria = self.categorias.codificar(libro.categoria)
+        fila = self._filas.buscar(clave)
+        if fila == IndiceIsbn.VACIO:
+            self._isbns.append(clave)
+            self._filas.insertar(clave, len(self._isbns) - 1)
+            self._titulos.append(libro.titulo)
+            self._autores.append(autor)
+            self._categorias.append(categoria)
+        else:
+            self._titulos[fila] = libro.titulo
+            self._autores[fila] = autor
+            self._categorias[fila] = categoria
+
+    def __delitem__(self, isbn: str) -> None:
+        clave = isbn_a_entero(isbn)
+        if clave is None:
+            del self._otros[isbn]
+            return
+        fila = self._filas.buscar(clave)
+        if fila == IndiceIsbn.VACIO:
+            raise KeyError(isbn)
+        self._filas.eliminar(clave)
+        ultima = len(self._isbns) - 1
+        if fila != ultima:
+            self._isbns[fila] = self._isbns[ultima]
+            self._titulos[fila] = self._titulos[ultima]
+            self._autores[fila] = self._autores[ultima]
+            self._categorias[fila] = self._categorias[ultima]
+            self._filas.mover(self._isbns[fila], fila)
+        self._isbns.pop()
+        self._titulos.pop()
+        self._autores.pop()
+        self._categorias.pop()
+
+    def __contains__(self, isbn: object) -> bool:
+        if not isinstance(isbn, str):
+            return False
+        clave = isbn_a_entero(isbn)
+        return isbn in self._otros if clave is None else self._filas.buscar(clave) != IndiceIsbn.VACIO
+
+    def __iter__(self) -> Iterator[str]:
+        for clave in self._isbns:
+            yield str(clave)
+        yield from self._otros
+
+    def __len__(self) -> int:
+        return len(self._isbns) + len(self._otros)
+
+    def values(self) -> ValuesView[Libro]:
+        return _ValoresCompactos(self)
+
+    def items(self) -> ItemsView[str, Libro]:
+        return _ElementosCompactos(self)
+
+    def _recorrer(self) -> Iterator[Libro]:
+        # Más rápido que la implementación genérica de Mapping (evita buscar cada clave)
+        for fila in range(len(self._isbns)):
+            yield self._libro(fila)
+        yield from self._otros.values()
+
+    # --- Instantáneas (biblioteca_persistencia) ---
+    def columnas(self) -> Tuple:
+        """Copia de las columnas tal cual; son arrays y listas, así que se copian en bloque."""
+        return (self._isbns[:], self._titulos[:], self._autores[:], self._categorias[:],
+                self.autores.cadenas[:], self.categorias.cadenas[:], dict(self._otros))
+
+    @classmethod
+    def desde_columnas(cls, columnas: Tuple) -> "CatalogoCompacto":
+        """Reconstruye un catálogo a partir de `columnas()` sin pasar por objetos Libro."""
+        isbns, titulos, autores, categorias, cadenas_autores, cadenas_categorias, otros = columnas
+        catalogo = cls()
+        catalogo._isbns.extend(isbns)
+        for fila, clave in enumerate(isbns):
+            catalogo._filas.insertar(clave, fila)
+        catalogo._titulos = list(titulos)
+        catalogo._autores.extend(autores)
+        catalogo._categorias.extend(categorias)
+        for codigos, cadenas in ((catalogo.autores, cadenas_autores), (catalogo.categorias, cadenas_categorias)):
+            codigos.cadenas = list(cadenas)
+            codigos.codigos = {texto: codigo for codigo, texto in enumerate(cadenas)}
+        catalogo._otros = dict(otros)
+        return catalogo
+
+
+class _ValoresCompactos(ValuesView):
+    """values() perezoso: cada Libro se reconstruye al recorrerlo, sin crear una lista completa."""
+
+    def __iter__(self) -> Iterator[Libro]:
+        return self._mapping._recorrer()
+
+
+class _ElementosCompactos(ItemsView):
+    def __iter__(self) -> Iterator[Tuple[str, Libro]]:
+        for libro in self._mapping._recorrer():
+            yield libro.isbn, libro
+
+
+# ====== MEDICIÓN ======
+@dataclass(frozen=True)
+class _LibroSinSlots:
+    """Libro tal como era antes (con __dict__ y sin internado), solo para comparar."""
+    identidad: Tuple[str, str]
+    categoria: str
+    isbn: str
+
+
+def _datos(i: int) -> Tuple[str, str, str, str]:
+    # Cadenas nuevas en cada fila, como si vinieran de un archivo: sin compartir memoria entre sí
+    return (f"Titulo {i}", "".join(("Autor ", str(i % 20_000))), "".join(("Categoria ", str(i % 200))),
+            str(9_780_000_000_000 + i))
+
+
+def _construir(variante: str, n: int):
+    if variante == "dict + Libro sin slots":
+        catalogo = {}
+        for i in range(n):
+            titulo, autor, cat, isbn = _datos(i)
+            catalogo[isbn] = _LibroSinSlots(identidad=(titulo, autor), categoria=cat, isbn=isbn)
+        return catalogo
+    biblio = Biblioteca(CatalogoCompacto() if variante == "CatalogoCompacto" else None)
+    for i in range(n):
+        titulo, autor, cat, isbn = _datos(i)
+        biblio.anadir_libro(Libro(identidad=(titulo, autor), categoria=cat, isbn=isbn))
+    return biblio
+
+
+def _medir_variante(variante: str, n: int) -> Dict[str, float]:
+    """Se ejecuta en un proceso aparte: memoria = crecimiento del pico de RSS al construir."""
+    import resource
+
+    escala = 1 if sys.platform == "darwin" else 1024  # ru_maxrss: bytes en macOS, KiB en Linux
+    antes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * escala
+    inicio = time.perf_counter()
+    objeto = _construir(variante, n)
+    segundos = time.perf_counter() - inicio
+    despues = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * escala
+    del objeto
+    return {"variante": variante, "libros": n, "bytes_por_libro": round((despues - antes) / n, 1),
+            "segundos_carga": round(segundos, 2)}
+
+
+def medir_catalogo(n: int = 5_000_000) -> List[Dict[str, float]]:
+    # Un proceso por variante para que la memoria de una no contamine la siguiente
+    from concurrent.futures import ProcessPoolExecutor
+
+    resultados = []
+    for variante in ("dict + Libro sin slots", "dict + Libro con slots", "CatalogoCompacto"):
+        with ProcessPoolExecutor(max_workers=1) as proceso:
+            resultados.append(proceso.submit(_medir_variante, variante, n).result())
+    return resultados
+
+
+if __name__ == "__main__":
+    if "--bench" in sys.argv:
+        resto = [a for a in sys.argv[1:] if a != "--bench"]
+        for fila in medir_catalogo(int(resto[0]) if resto else 5_000_000):
+            print(fila)
+        sys.exit(0)
+
+    biblio = Biblioteca(CatalogoCompacto())
+    biblio.anadir_libro(Libro(identidad=("Cien años de soledad", "Gabriel García Márquez"),
+                              categoria="Realismo mágico", isbn="9780307474728"))
+    biblio.anadir_libro(Libro(identidad=("El amor en los tiempos del cólera", "Gabriel García Márquez"),
+                              categoria="Novela", isbn="9780307389732"))
+    biblio.anadir_libro(Libro(identidad=("Antología", "Varios"), categoria="Novela", isbn="84-376-0494-X"))
+    print("Autores distintos:", len(biblio.catalogo.autores))
+    for lib in biblio.buscar_por_autor("garcía"):
+        print(f"- {lib.titulo} (ISBN {lib.isbn})")
+    biblio.quitar_libro("9780307474728")
+    print("Quedan:", sorted(biblio.catalogo))
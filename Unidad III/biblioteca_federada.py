@@ -0,0 +1,276 @@
+"""Red de sucursales: varias Biblioteca, cada una en su propio proceso, tras un único enrutador.
+
+BibliotecaFederada reparte el catálogo en fragmentos (shards):
+    - por sucursal: `anadir_libro(libro, sucursal=2)` deja el libro en esa sucursal;
+    - por hash del ISBN (por defecto), si no se indica sucursal.
+
+Los préstamos y devoluciones van solo al fragmento dueño del ISBN. Las búsquedas y
+`listar_disponibles` se envían a todos los fragmentos a la vez (cada uno busca en paralelo en
+su proceso) y después se combinan los resultados. Los usuarios son comunes a la red: se
+registran en todos los fragmentos.
+
+Los errores de un fragmento (KeyError, ValueError...) se relanzan tal cual en el llamador.
+
+Ejecutar `python biblioteca_federada.py --bench` mide la escalabilidad con 1, 2 y 4 fragmentos.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from Bibliotecadigital import Biblioteca, Libro, Usuario
+
+
+def _trabajador(conexion) -> None:
+    """Bucle de un fragmento: recibe (método, argumentos) y responde (ok, resultado o excepción)."""
+    biblio = Biblioteca()
+    consultas = {
+        "_tiene_libro": lambda isbn: isbn in biblio.catalogo,
+        "_prestados_de": lambda user_id: len(biblio.usuarios[user_id].prestados) if user_id in biblio.usuarios else 0,
+    }
+    while True:
+        mensaje = conexion.recv()
+        if mensaje is None:
+            break
+        metodo, args = mensaje
+        if metodo == "_lote":
+            # Varias llamadas en un solo viaje: [(método, args), ...] -> [(ok, resultado), ...]
+            resultados = []
+            for sub_metodo, sub_args in args:
+                try:
+                    resultados.append((True, getattr(biblio, sub_metodo)(*sub_args)))
+                except Exception as e:
+                    resultados.append((False, e))
+            conexion.send((True, resultados))
+            continue
+        try:
+            funcion = consultas.get(metodo) or getattr(biblio, metodo)
+            conexion.send((True, funcion(*args)))
+        except Exception as e:
+            conexion.send((False, e))
+    conexion.close()
+
+
+class BibliotecaFederada:
+    """Enrutador sobre `n_fragmentos` procesos, cada uno con su propia Biblioteca."""
+
+    def __init__(self, n_fragmentos: int = 2) -> None:
+        if n_fragmentos < 1:
+            raise ValueError("Se necesita al menos un fragmento.")
+        self.n_fragmentos = n_fragmentos
+        self.ubicacion: Dict[str, int] = {}  # isbn -> fragmento, solo para libros asignados a una sucursal
+        self._conexiones = []
+        self._procesos = []
+        for _ in range(n_fragmentos):
+            propia, remota = mp.Pipe()
+            proceso = mp.Process(target=_trabajador, args=(remota,), daemon=True)
+            proceso.start()
+            remota.close()
+            self._conexiones.append(propia)
+            self._procesos.append(proceso)
+
+    # --- Comunicación ---
+    @staticmethod
+    def _respuesta(conexion) -> Any:
+        ok, resultado = conexion.recv()
+        if not ok:
+            raise resultado
+        return resultado
+
+    def _llamar(self, fragmento: int, metodo: str, *args) -> Any:
+        conexion = self._conexiones[fragmento]
+        conexion.send((metodo, args))
+        return self._respuesta(conexion)
+
+    def _difundir(self, metodo: str, *args) -> List[Any]:
+        """Envía la misma llamada a todos los fragmentos y luego recoge: trabajan en paralelo."""
+        for conexion in self._conexiones:
+            conexion.send((metodo, args))
+        resultados, error = [], None
+        for conexion in self._conexiones:
+            try:
+                resultados.append(self._respuesta(conexion))
+            except Exception as e:  # se recogen todas las respuestas antes de relanzar
+                error = error or e
+        if error is not None:
+            raise error
+        return resultados
+
+    def fragmento_de(self, isbn: str) -> int:
+        fragmento = self.ubicacion.get(isbn)
+        if fragmento is None:
+            fragmento = zlib.crc32(isbn.encode("utf-8")) % self.n_fragmentos
+        return fragmento
+
+    # --- Gestión de libros ---
+    def anadir_libro(self, libro: Libro, sucursal: Optional[int] = None) -> None:
+        isbn = libro.isbn
+        if isbn in self.ubicacion:
+            raise ValueError(f"Ya existe un libro con ISBN {isbn} en la sucursal {self.ubicacion[isbn]}.")
+        if sucursal is None:
+            self._llamar(self.fragmento_de(isbn), "anadir_libro", libro)
+            return
+        if not 0 <= sucursal < self.n_fragmentos:
+            raise ValueError(f"Sucursal {sucursal} fuera de rango (0..{self.n_fragmentos - 1}).")
+        if self._llamar(self.fragmento_de(isbn), "_tiene_libro", isbn):
+            raise ValueError(f"Ya existe un libro con ISBN {isbn} en la red.")
+        self._llamar(sucursal, "anadir_libro", libro)
+        self.ubicacion[isbn] = sucursal
+
+    def anadir_libros(self, libros: Iterable[Libro]) -> List[Libro]:
+        """Alta masiva por hash de ISBN: un único mensaje por fragmento. Devuelve los duplicados."""
+        por_fragmento: List[List[Libro]] = [[] for _ in range(self.n_fragmentos)]
+        duplicados: List[Libro] = []
+        for libro in libros:
+            if libro.isbn in self.ubicacion:
+                duplicados.append(libro)
+            else:
+                por_fragmento[self.fragmento_de(libro.isbn)].append(libro)
+        for conexion, grupo in zip(self._conexiones, por_fragmento):
+            conexion.send(("anadir_libros", (grupo,)))
+        for conexion in self._conexiones:
+            duplicados.extend(self._respuesta(conexion))
+        return duplicados
+
+    def quitar_libro(self, isbn: str) -> None:
+        self._llamar(self.fragmento_de(isbn), "quitar_libro", isbn)
+        self.ubicacion.pop(isbn, None)
+
+    # --- Gestión de usuarios (comunes a todas las sucursales) ---
+    def registrar_usuario(self, usuario: Usuario) -> None:
+        self._difundir("registrar_usuario", usuario)
+
+    def baja_usuario(self, user_id: str) -> None:
+        # Primero se comprueba en todas las sucursales, para no dejar la baja a medias
+        prestados = sum(self._difundir("_prestados_de", user_id))
+        if prestados:
+            raise ValueError(f"No se puede dar de baja al usuario {user_id}: tiene libros prestados ({prestados}).")
+        self._difundir("baja_usuario", user_id)
+
+    # --- Préstamos (al fragmento dueño) ---
+    def prestar_libro(self, isbn: str, user_id: str) -> None:
+        self._llamar(self.fragmento_de(isbn), "prestar_libro", isbn, user_id)
+
+    def devolver_libro(self, isbn: str) -> None:
+        self._llamar(self.fragmento_de(isbn), "devolver_libro", isbn)
+
+    def ejecutar_lote(self, operaciones: Sequence[Tuple[str, Tuple]]) -> List[Tuple[bool, Any]]:
+        """Ejecuta muchas operaciones [('prestar_libro', (isbn, uid)), ('devolver_libro', (isbn,))...].
+
+        Se agrupan por fragmento y se envían de una vez, de modo que todos los fragmentos
+        trabajan a la vez. Devuelve [(ok, resultado o excepción)] en el orden de entrada.
+        """
+        grupos: List[List[int]] = [[] for _ in range(self.n_fragmentos)]
+        for i, (_, args) in enumerate(operaciones):
+            grupos[self.fragmento_de(args[0])].append(i)
+        for conexion, indices in zip(self._conexiones, grupos):
+            conexion.send(("_lote", [operaciones[i] for i in indices]))
+        resultados: List[Tuple[bool, Any]] = [(False, None)] * len(operaciones)
+        for conexion, indices in zip(self._conexiones, grupos):
+            for i, resultado in zip(indices, self._respuesta(conexion)):
+                resultados[i] = resultado
+        return resultados
+
+    # --- Búsquedas y listados (difusión + combinación) ---
+    @staticmethod
+    def _combinar(listas: List[List[Libro]]) -> List[Libro]:
+        return [libro for lista in listas for libro in lista]
+
+    def buscar_por_titulo(self, texto: str) -> List[Libro]:
+        return self._combinar(self._difundir("buscar_por_titulo", texto))
+
+    def buscar_por_autor(self, texto: str) -> List[Libro]:
+        return self._combinar(self._difundir("buscar_por_autor", texto))
+
+    def buscar_por_categoria(self, texto: str) -> List[Libro]:
+        return self._combinar(self._difundir("buscar_por_categoria", texto))
+
+    def listar_disponibles(self) -> List[Libro]:
+        return self._combinar(self._difundir("listar_disponibles"))
+
+    def listar_prestados_usuario(self, user_id: str) -> List[Libro]:
+        return self._combinar(self._difundir("listar_prestados_usuario", user_id))
+
+    def __len__(self) -> int:
+        return sum(self._difundir("__len__"))
+
+    # --- Ciclo de vida ---
+    def cerrar(self) -> None:
+        for conexion in self._conexiones:
+            conexion.send(None)
+            conexion.close()
+        for proceso in self._procesos:
+            proceso.join()
+        self._conexiones, self._procesos = [], []
+
+    def __enter__(self) -> "BibliotecaFederada":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.cerrar()
+
+
+# ====== MEDICIÓN ======
+def medir_federada(fragmentos: Sequence[int] = (1, 2, 4), n_libros: int = 400_000, n_usuarios: int = 1000,
+                   n_operaciones: int = 100_000) -> List[Dict[str, float]]:
+    libros = [Libro(identidad=(f"Titulo {i}", f"Autor {i % 5000}"), categoria=f"Categoria {i % 40}",
+                    isbn=str(9_780_000_000_000 + i)) for i in range(n_libros)]
+    resultados = []
+    for n in fragmentos:
+        with BibliotecaFederada(n) as red:
+            red.anadir_libros(libros)
+            for i in range(n_usuarios):
+                red.registrar_usuario(Usuario(nombre=f"Usuario {i}", user_id=f"U{i:05d}", prestados=[]))
+
+            inicio = time.perf_counter()
+            for consulta in ("titulo 12", "titulo 99", "titulo 5"):
+                red.buscar_por_titulo(consulta)
+            t_busqueda = (time.perf_counter() - inicio) / 3
+
+            prestamos = [("prestar_libro", (libros[i].isbn, f"U{i % n_usuarios:05d}")) for i in range(n_operaciones)]
+            devoluciones = [("devolver_libro", (libros[i].isbn,)) for i in range(n_operaciones)]
+            inicio = time.perf_counter()
+            for j in range(0, n_operaciones, 10_000):
+                red.ejecutar_lote(prestamos[j:j + 10_000])
+                red.ejecutar_lote(devoluciones[j:j + 10_000])
+            t_prestamos = time.perf_counter() - inicio
+
+            resultados.append({
+                "fragmentos": n,
+                "busqueda_ms": round(t_busqueda * 1000, 1),
+                "operaciones_por_s": round(2 * n_operaciones / t_prestamos),
+            })
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(f"Núcleos disponibles: {os.cpu_count()}")
+        for fila in medir_federada():
+            print(fila)
+        sys.exit(0)
+
+    with BibliotecaFederada(3) as red:
+        red.anadir_libro(Libro(identidad=("Cien años de soledad", "Gabriel García Márquez"),
+                               categoria="Realismo mágico", isbn="9780307474728"), sucursal=0)
+        red.anadir_libro(Libro(identidad=("El amor en los tiempos del cólera", "Gabriel García Márquez"),
+                               categoria="Novela", isbn="9780307389732"), sucursal=2)
+        red.anadir_libro(Libro(identidad=("Python Crash Course", "Eric Matthes"), categoria="Programación",
+                               isbn="9781593276034"))
+        red.registrar_usuario(Usuario(nombre="Rubi", user_id="U001", prestados=[]))
+        red.prestar_libro("9780307389732", "U001")
+        print("Buscar 'garcía' en la red:", [l.titulo for l in red.buscar_por_autor("garcía")])
+        print("Disponibles:", [l.titulo for l in red.listar_disponibles()])
+        try:
+            red.prestar_libro("9780307389732", "U001")
+        except ValueError as e:
+            print("Error desde la sucursal:", e)
+        try:
+            red.baja_usuario("U001")
+        except ValueError as e:
+            print("Error:", e)
@@ -0,0 +1,248 @@
+"""Importación masiva de catálogos (CSV o JSONL) a una Biblioteca.
+
+El archivo se lee por bloques de líneas que se reparten a un pool de procesos. Cada proceso
+analiza su bloque, normaliza los campos (espacios, guiones del ISBN, dígito de control),
+descarta los duplicados internos del bloque y devuelve los Libro ya construidos junto con las
+filas rechazadas. El proceso principal solo cruza los ISBN con un set (catálogo + bloques
+anteriores) y los inserta con `Biblioteca.anadir_libros`, sin excepciones por duplicado.
+
+Formato CSV: cabecera con las columnas isbn, titulo, autor, categoria (en cualquier orden).
+Formato JSONL: un objeto por línea con esas mismas claves.
+Los registros CSV con saltos de línea dentro de comillas no se admiten (se rechazan).
+
+Ejecutar `python biblioteca_importacion.py --bench [n]` compara con `anadir_libro` libro a libro.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from Bibliotecadigital import Biblioteca, Libro
+
+COLUMNAS = ("isbn", "titulo", "autor", "categoria")
+
+# (número de línea, motivo, línea original)
+Rechazo = Tuple[int, str, str]
+
+
+@dataclass
+class ResultadoImportacion:
+    importados: int = 0
+    rechazados: List[Rechazo] = field(default_factory=list)
+    segundos: float = 0.0
+
+    @property
+    def filas_por_segundo(self) -> float:
+        total = self.importados + len(self.rechazados)
+        return total / self.segundos if self.segundos else 0.0
+
+
+def normalizar_isbn(isbn: str, validar_digito: bool = True) -> Optional[str]:
+    """Quita guiones y espacios; devuelve None si no es un ISBN-10/13 válido."""
+    limpio = isbn.replace("-", "").replace(" ", "").upper()
+    if len(limpio) == 13 and limpio.isdigit():
+        if validar_digito and sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(limpio)) % 10:
+            return None
+        return limpio
+    if len(limpio) == 10 and limpio[:9].isdigit() and (limpio[9].isdigit() or limpio[9] == "X"):
+        if validar_digito:
+            digitos = [10 if c == "X" else int(c) for c in limpio]
+            if sum((10 - i) * d for i, d in enumerate(digitos)) % 11:
+                return None
+        return limpio
+    return None
+
+
+def _limpiar(texto: str) -> str:
+    return " ".join(texto.split())
+
+
+def _procesar_bloque(formato: str, columnas: Dict[str, int], primera_linea: int, lineas: List[str],
+                     validar_digito: bool) -> Tuple[List[Libro], List[int], List[Rechazo]]:
+    """Se ejecuta en un proceso del pool: analiza, normaliza y construye los Libro de un bloque."""
+    libros: List[Libro] = []
+    numeros: List[int] = []  # línea de origen de cada libro, para informar duplicados entre bloques
+    rechazos: List[Rechazo] = []
+    vistos = set()
+    for n, linea in enumerate(lineas, start=primera_linea):
+        if not linea.strip():
+            continue
+        try:
+            if formato == "jsonl":
+                registro = json.loads(linea)
+                campos = [str(registro[c]) for c in COLUMNAS]
+            else:
+                # Camino rápido: una línea sin comillas se parte con split, sin pasar por csv
+                fila = linea.rstrip("\r\n").split(",") if '"' not in linea else next(csv.reader((linea,)))
+                campos = [fila[columnas[c]] for c in COLUMNAS]
+        except (ValueError, KeyError, IndexError, TypeError, StopIteration, csv.Error):
+            rechazos.append((n, "formato", linea.rstrip("\r\n")))
+            continue
+        isbn = normalizar_isbn(campos[0], validar_digito)
+        titulo, autor, categoria = (_limpiar(c) for c in campos[1:])
+        if isbn is None:
+            rechazos.append((n, "isbn inválido", linea.rstrip("\r\n")))
+        elif not (titulo and autor):
+            rechazos.append((n, "título o autor vacío", linea.rstrip("\r\n")))
+        elif isbn in vistos:
+            rechazos.append((n, "isbn duplicado", linea.rstrip("\r\n")))
+        else:
+            vistos.add(isbn)
+            libros.append(Libro(identidad=(titulo, autor), categoria=categoria, isbn=isbn))
+            numeros.append(n)
+    return libros, numeros, rechazos
+
+
+def _bloques(archivo, tamano: int, primera_linea: int) -> Iterator[Tuple[int, List[str]]]:
+    n = primera_linea
+    while True:
+        lineas = list(islice(archivo, tamano))
+        if not lineas:
+            return
+        yield n, lineas
+        n += len(lineas)
+
+
+def importar_catalogo(biblioteca: Biblioteca, ruta: str, procesos: Optional[int] = None,
+                      tamano_bloque: int = 20_000, validar_digito: bool = True) -> ResultadoImportacion:
+    """Importa `ruta` (.csv o .jsonl) en paralelo. Nunca lanza por filas malas: las informa."""
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacion()
+    formato = "jsonl" if ruta.endswith((".jsonl", ".ndjson")) else "csv"
+    vistos = set(biblioteca.catalogo)
+
+    with open(ruta, "r", encoding="utf-8", newline="") as archivo:
+        columnas: Dict[str, int] = {}
+        primera_linea = 1
+        if formato == "csv":
+            cabecera = [c.strip().lower() for c in next(csv.reader((archivo.readline(),)), [])]
+            faltan = [c for c in COLUMNAS if c not in cabecera]
+            if faltan:
+                raise ValueError(f"Faltan columnas en la cabecera de {ruta}: {', '.join(faltan)}")
+            columnas = {c: cabecera.index(c) for c in COLUMNAS}
+            primera_linea = 2
+
+        bloques = _bloques(archivo, tamano_bloque, primera_linea)
+        procesos = procesos or os.cpu_count() or 1
+        if procesos == 1:
+            # Con un solo núcleo el pool solo añadiría el coste de serializar los bloques
+            for n, lineas in bloques:
+                _insertar(biblioteca, _procesar_bloque(formato, columnas, n, lineas, validar_digito),
+                          n, lineas, vistos, resultado)
+            resultado.segundos = time.perf_counter() - inicio
+            return resultado
+
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            # Como mucho dos bloques pendientes por proceso: memoria acotada aunque el archivo sea enorme
+            limite = 2 * procesos
+            # Se conservan las líneas de cada bloque pendiente para poder citar los duplicados entre bloques
+            pendientes = []
+            for n, lineas in bloques:
+                pendientes.append((pool.submit(_procesar_bloque, formato, columnas, n, lineas, validar_digito),
+                                   n, lineas))
+                if len(pendientes) >= limite:
+                    futuro, primera, lineas_bloque = pendientes.pop(0)
+                    _insertar(biblioteca, futuro.result(), primera, lineas_bloque, vistos, resultado)
+            for futuro, primera, lineas_bloque in pendientes:
+                _insertar(biblioteca, futuro.result(), primera, lineas_bloque, vistos, resultado)
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def _insertar(biblioteca: Biblioteca, bloque: Tuple[List[Libro], List[int], List[Rechazo]], primera_linea: int,
+              lineas: List[str], vistos: set, resultado: ResultadoImportacion) -> None:
+    libros, numeros, rechazos = bloque
+    resultado.rechazados.extend(rechazos)
+    nuevos = []
+    for libro, n in zip(libros, numeros):
+        if libro.isbn in vistos:
+            resultado.rechazados.append((n, "isbn duplicado", lineas[n - primera_linea].rstrip("\r\n")))
+        else:
+            vistos.add(libro.isbn)
+            nuevos.append(libro)
+    biblioteca.anadir_libros(nuevos)
+    resultado.importados += len(nuevos)
+
+
+# ====== MEDICIÓN ======
+def _isbn13(n: int) -> str:
+    base = f"978{n:09d}"
+    control = (10 - sum(int(c) * (1 if i % 2 == 0 else 3) for i, c in enumerate(base)) % 10) % 10
+    return base + str(control)
+
+
+def generar_csv(ruta: str, n: int) -> None:
+    """CSV sintético con ~2 % de ISBN repetidos y ~1 % de filas mal formadas."""
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(["isbn", "titulo", "autor", "categoria"])
+        for i in range(n):
+            if i % 100 == 7:
+                f.write("fila,rota\n")
+                continue
+            isbn = _isbn13(i - 1 if i % 50 == 3 else i)
+            escritor.writerow([isbn[:3] + "-" + isbn[3:], f" Título  {i} ", f"Autor {i % 5000}", f"Categoría {i % 40}"])
+
+
+def _importar_uno_a_uno(biblioteca: Biblioteca, ruta: str) -> int:
+    """Lo que había antes: leer en serie y llamar a anadir_libro capturando ValueError."""
+    importados = 0
+    with open(ruta, "r", encoding="utf-8", newline="") as f:
+        for fila in csv.DictReader(f):
+            try:
+                isbn = normalizar_isbn(fila["isbn"] or "")
+                if isbn is None:
+                    raise ValueError("isbn inválido")
+                biblioteca.anadir_libro(Libro(identidad=(_limpiar(fila["titulo"]), _limpiar(fila["autor"])),
+                                              categoria=_limpiar(fila["categoria"]), isbn=isbn))
+                importados += 1
+            except (ValueError, KeyError, AttributeError):
+                pass
+    return importados
+
+
+def medir_importacion(n: int = 1_000_000) -> Dict[str, float]:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "catalogo.csv")
+        generar_csv(ruta, n)
+        inicio = time.perf_counter()
+        importados_serie = _importar_uno_a_uno(Biblioteca(), ruta)
+        t_serie = time.perf_counter() - inicio
+        resultado = importar_catalogo(Biblioteca(), ruta)
+    assert resultado.importados == importados_serie
+    return {
+        "filas": n,
+        "procesos": os.cpu_count() or 1,
+        "importados": resultado.importados,
+        "rechazados": len(resultado.rechazados),
+        "uno_a_uno_filas_s": round(n / t_serie),
+        "masivo_filas_s": round(resultado.filas_por_segundo),
+    }
+
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    if "--bench" in sys.argv:
+        resto = [a for a in sys.argv[1:] if a != "--bench"]
+        print(medir_importacion(int(resto[0]) if resto else 1_000_000))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "catalogo.csv")
+        generar_csv(ruta, 500)
+        biblio = Biblioteca()
+        resultado = importar_catalogo(biblio, ruta, procesos=2, tamano_bloque=100)
+        print(f"Importados: {resultado.importados}, rechazados: {len(resultado.rechazados)}")
+        for rechazo in resultado.rechazados[:5]:
+            print("  ", rechazo)
@@ -0,0 +1,453 @@
+"""Persistencia de Biblioteca: instantáneas compactas + registro de eventos.
+
+Estructura en disco (dentro de `directorio`):
+    - snapshot.pkl: estado completo (catálogo, usuarios y préstamos activos) en columnas,
+      junto con el número de secuencia del último evento que ya incluye. Un CatalogoCompacto
+      se guarda con sus propias columnas y se restaura como CatalogoCompacto.
+    - eventos.log: un evento JSON por línea, escrito tras cada cambio desde la última instantánea.
+    - historial.jsonl: archivo histórico de préstamos/devoluciones ya consolidados en una instantánea.
+
+Al arrancar se carga la última instantánea y se reproducen solo los eventos posteriores
+(la "cola" del registro). Nunca se reconstruye el estado recorriendo el historial completo:
+ese archivo solo se lee para devolver a `Biblioteca.historial` los préstamos ya archivados
+(de él recalculan la popularidad el autocompletado y la analítica), y por defecto no se lee
+hasta que alguien consulta el historial por primera vez (`HistorialPerezoso`).
+
+Las instantáneas periódicas se escriben en un hilo aparte: en el hilo que registra el evento
+solo se copian las referencias del estado (los libros son inmutables) y el punto de corte
+del registro; serializar, sincronizar y archivar no bloquean a quien presta o devuelve.
+
+Si un corte deja la última línea de eventos.log a medio escribir, al abrir se recorta el
+archivo hasta el último evento completo antes de seguir añadiendo.
+"""
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import threading
+import time
+from collections import UserList
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from Bibliotecadigital import Biblioteca, Libro, Usuario
+from biblioteca_catalogo import CatalogoCompacto
+
+VERSION_FORMATO = 2
+
+
+class HistorialPerezoso(UserList):
+    """Lista de historial que solo lee los eventos archivados la primera vez que se consulta.
+
+    `append` (lo que hace Biblioteca en cada préstamo) no fuerza la carga: los eventos nuevos
+    se acumulan y quedan detrás de los archivados cuando por fin se leen.
+    """
+
+    def __init__(self, iniciales: Optional[Iterable[Dict[str, str]]] = None,
+                 cargar: Optional[Callable[[], Iterable[Dict[str, str]]]] = None) -> None:
+        self._datos: List[Dict[str, str]] = list(iniciales) if iniciales is not None else []
+        self._cargar = cargar
+
+    @property
+    def data(self) -> List[Dict[str, str]]:
+        if self._cargar is not None:
+            cargar, self._cargar = self._cargar, None
+            archivados = list(cargar())
+            archivados.extend(self._datos)
+            self._datos = archivados
+        return self._datos
+
+    @data.setter
+    def data(self, valor: List[Dict[str, str]]) -> None:
+        self._datos = valor
+        self._cargar = None
+
+    def append(self, registro: Dict[str, str]) -> None:
+        self._datos.append(registro)
+
+
+class AlmacenBiblioteca:
+    """Guarda y restaura una Biblioteca en `directorio`.
+
+    Uso:
+        almacen = AlmacenBiblioteca("datos")
+        biblio = almacen.abrir()            # carga instantánea + cola y empieza a registrar
+        biblio.prestar_libro(isbn, uid)     # queda escrito en eventos.log
+        almacen.cerrar()                    # instantánea final y cierre del registro
+
+    Atributos:
+        cada_n_eventos: tras cuántos eventos registrados se toma una instantánea automática
+            (None desactiva las instantáneas periódicas).
+        sincronizar: si True, hace fsync tras cada evento (más lento, pero durable ante cortes).
+    """
+
+    def __init__(self, directorio: str, cada_n_eventos: Optional[int] = 50_000,
+                 sincronizar: bool = False) -> None:
+        self.directorio = directorio
+        self.cada_n_eventos = cada_n_eventos
+        self.sincronizar = sincronizar
+        self.ruta_snapshot = os.path.join(directorio, "snapshot.pkl")
+        self.ruta_eventos = os.path.join(directorio, "eventos.log")
+        self.ruta_historial = os.path.join(directorio, "historial.jsonl")
+        self.biblioteca: Optional[Biblioteca] = None
+        self._seq = 0  # último número de secuencia asignado
+        self._pendientes = 0  # eventos escritos desde la última instantánea
+        self._fin_valido = 0  # bytes de eventos.log que contienen eventos completos
+        self._log = None
+        self._cerrojo_log = threading.Lock()  # escritura/rotación de _log frente a fsync y al hilo de instantáneas
+        self._hilo_snapshot: Optional[threading.Thread] = None
+        self._error_snapshot: Optional[BaseException] = None
+        os.makedirs(directorio, exist_ok=True)
+
+    # --- Arranque ---
+    def abrir(self, con_historial: bool = False) -> Biblioteca:
+        """Restaura la biblioteca desde disco y la deja suscrita al registro de eventos.
+
+        `historial` incluye los préstamos y devoluciones ya archivados, pero se leen la primera
+        vez que se consulta; con `con_historial` se leen ya durante el arranque.
+        """
+        biblio, seq = self._leer_snapshot()
+        if con_historial:
+            biblio.historial.extend(self._historial_archivado())
+        else:
+            biblio.historial = HistorialPerezoso(cargar=self._historial_archivado)
+        self._seq = seq
+        self._pendientes = 0
+        # Reproducir solo los eventos posteriores a la instantánea (aún sin oyente: no se re-registran)
+        for evento in self._leer_eventos():
+            if evento["seq"] <= seq:
+                continue  # ya incluido (corte entre escribir la instantánea y vaciar el registro)
+            self._aplicar(biblio, evento)
+            self._seq = evento["seq"]
+            self._pendientes += 1
+        # Se recorta la línea rota (si la hay): si no, el próximo evento quedaría pegado a ella
+        if os.path.exists(self.ruta_eventos) and os.path.getsize(self.ruta_eventos) > self._fin_valido:
+            with open(self.ruta_eventos, "r+b") as f:
+                f.truncate(self._fin_valido)
+        self._log = open(self.ruta_eventos, "a", encoding="utf-8")
+        biblio.suscribir(self._registrar)
+        self.biblioteca = biblio
+        return biblio
+
+    def _leer_snapshot(self):
+        if not os.path.exists(self.ruta_snapshot):
+            return Biblioteca(), 0
+        with open(self.ruta_snapshot, "rb") as f:
+            datos = pickle.load(f)
+        if datos.get("version") != VERSION_FORMATO:
+            raise ValueError(f"Versión de instantánea no soportada: {datos.get('version')}")
+
+        biblio = Biblioteca()
+        if "catalogo_compacto" in datos:
+            # Se guardó desde un CatalogoCompacto: se restaura como tal (columnas, no objetos Libro)
+            biblio.catalogo = CatalogoCompacto.desde_columnas(datos["catalogo_compacto"])
+        else:
+            isbns, titulos, autores, categorias = datos["libros"]
+            biblio.catalogo = {
+                isbn: Libro(identidad=(titulo, autor), categoria=cat, isbn=isbn)
+                for isbn, titulo, autor, cat in zip(isbns, titulos, autores, categorias)
+            }
+        ids, nombres = datos["usuarios"]
+        biblio.usuarios = {uid: Usuario(nombre=nombre, user_id=uid, prestados=[]) for uid, nombre in zip(ids, nombres)}
+        biblio.ids_usuarios = set(ids)
+        # Se guardan en orden de préstamo: reconstruye también el orden de cada usuario y los índices
+        for isbn, uid, fecha in zip(*datos["prestamos"]):
+            biblio._indexar_prestamo(isbn, uid, fecha)
+        return biblio, datos["seq"]
+
+    def _leer_eventos(self) -> Iterator[Dict[str, str]]:
+        """Eventos completos del registro; al terminar, `_fin_valido` es el byte donde acaba el último."""
+        self._fin_valido = 0
+        if not os.path.exists(self.ruta_eventos):
+            return
+        with open(self.ruta_eventos, "rb") as f:
+            for linea in f:
+                try:
+                    evento = json.loads(linea)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    evento = None
+                if evento is None or not linea.endswith(b"\n"):
+                    # Última línea a medio escribir por un corte: se descarta
+                    return
+                self._fin_valido += len(linea)
+                yield evento
+
+    def _historial_archivado(self) -> Iterator[Dict[str, str]]:
+        """Eventos archivados con el formato de `Biblioteca.historial` (sin número de secuencia)."""
+        for evento in self._leer_archivado():
+            del evento["seq"]
+            yield evento
+
+    def _leer_archivado(self) -> Iterator[Dict[str, str]]:
+        """Eventos de historial.jsonl, sin líneas rotas ni repetidos (por número de secuencia)."""
+        if not os.path.exists(self.ruta_historial):
+            return
+        ultimo = 0
+        with open(self.ruta_historial, "rb") as f:
+            for linea in f:
+                try:
+                    evento = json.loads(linea)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue  # línea cortada a medias al archivar
+                # Un corte entre archivar y vaciar eventos.log hace que se vuelvan a archivar
+                if evento["seq"] <= ultimo:
+                    continue
+                ultimo = evento["seq"]
+                yield evento
+
+    @staticmethod
+    def _aplicar(biblio: Biblioteca, evento: Dict[str, str]) -> None:
+        tipo = evento["evento"]
+        if tipo == "prestamo":
+            biblio.prestar_libro(evento["isbn"], evento["user_id"], fecha=evento["fecha"])
+        elif tipo == "devolucion":
+            biblio.devolver_libro(evento["isbn"], fecha=evento["fecha"])
+        elif tipo == "alta_libro":
+            biblio.anadir_libro(Libro(identidad=(evento["titulo"], evento["autor"]),
+                                      categoria=evento["categoria"], isbn=evento["isbn"]))
+        elif tipo == "baja_libro":
+            biblio.quitar_libro(evento["isbn"])
+        elif tipo == "alta_usuario":
+            biblio.registrar_usuario(Usuario(nombre=evento["nombre"], user_id=evento["user_id"], prestados=[]))
+        elif tipo == "baja_usuario":
+            biblio.baja_usuario(evento["user_id"])
+        else:
+            raise ValueError(f"Evento desconocido en el registro: {tipo}")
+
+    # --- Registro de eventos ---
+    def _registrar(self, evento: str, datos: Dict[str, str]) -> None:
+        self._seq += 1
+        linea = json.dumps(dict(datos, evento=evento, seq=self._seq), ensure_ascii=False) + "\n"
+        with self._cerrojo_log:
+            self._log.write(linea)
+            self._log.flush()
+            if self.sincronizar:
+                os.fsync(self._log.fileno())
+        self._pendientes += 1
+        if self.cada_n_eventos is not None and self._pendientes >= self.cada_n_eventos:
+            if self._hilo_snapshot is None or not self._hilo_snapshot.is_alive():
+                # Si la anterior aún se está escribiendo, se reintenta con el siguiente evento
+                captura = self._capturar()
+                self._hilo_snapshot = threading.Thread(target=self._snapshot_en_segundo_plano,
+                                                       args=(captura,), daemon=True)
+                self._hilo_snapshot.start()
+
+    # --- Instantáneas ---
+    def guardar_snapshot(self) -> None:
+        """Escribe una instantánea atómica y traslada el registro de eventos al historial archivado."""
+        if self.biblioteca is None:
+            raise RuntimeError("El almacén no está abierto: llama primero a abrir().")
+        self.esperar_snapshot()
+        self._escribir_snapshot(self._capturar())
+
+    def esperar_snapshot(self) -> None:
+        """Espera a que termine la instantánea periódica en curso (y relanza su error, si lo tuvo)."""
+        if self._hilo_snapshot is not None:
+            self._hilo_snapshot.join()
+            self._hilo_snapshot = None
+        if self._error_snapshot is not None:
+            error, self._error_snapshot = self._error_snapshot, None
+            raise error
+
+    def _capturar(self) -> Dict[str, object]:
+        """Copia superficial del estado y posición del registro; se llama en el hilo que registra."""
+        biblio = self.biblioteca
+        self._pendientes = 0
+        compacto = isinstance(biblio.catalogo, CatalogoCompacto)
+        return {
+            "seq": self._seq,
+            "corte": os.path.getsize(self.ruta_eventos),  # _registrar ya ha vaciado el búfer
+            "libros": biblio.catalogo.columnas() if compacto else list(biblio.catalogo.values()),
+            "compacto": compacto,
+            "usuarios": list(biblio.usuarios.values()),
+            "prestamos": list(biblio.prestamos_activos.items()),
+            "fechas": dict(biblio.fecha_prestamo),
+        }
+
+    def _snapshot_en_segundo_plano(self, captura: Dict[str, object]) -> None:
+        try:
+            self._escribir_snapshot(captura)
+        except BaseException as e:  # se relanza en esperar_snapshot() / cerrar()
+            self._error_snapshot = e
+
+    def _escribir_snapshot(self, captura: Dict[str, object]) -> None:
+        libros, usuarios, prestamos = captura["libros"], captura["usuarios"], captura["prestamos"]
+        fechas = captura["fechas"]
+        datos = {
+            "version": VERSION_FORMATO,
+            "seq": captura["seq"],
+            "usuarios": ([u.user_id for u in usuarios], [u.nombre for u in usuarios]),
+            "prestamos": (
+                [isbn for isbn, _ in prestamos],
+                [uid for _, uid in prestamos],
+                [fechas[isbn] for isbn, _ in prestamos],
+            ),
+        }
+        if captura["compacto"]:
+            datos["catalogo_compacto"] = libros
+        else:
+            datos["libros"] = (
+                [l.isbn for l in libros],
+                [l.titulo for l in libros],
+                [l.autor for l in libros],
+                [l.categoria for l in libros],
+            )
+        temporal = self.ruta_snapshot + ".tmp"
+        with open(temporal, "wb") as f:
+            pickle.dump(datos, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_snapshot)
+        self._rotar_registro(captura["corte"])
+
+    def _rotar_registro(self, corte: int) -> None:
+        """Archiva los préstamos/devoluciones anteriores a `corte` y los quita de eventos.log.
+
+        El resto de eventos de esa parte ya está en la instantánea. Lo escrito después del corte
+        (mientras se guardaba la instantánea) se conserva en el registro nuevo.
+        """
+        with open(self.ruta_eventos, "rb") as f:
+            prefijo = f.read(corte)
+        with open(self.ruta_historial, "ab+") as archivo:
+            # Si un corte dejó la última línea sin terminar, se cierra para no pegarle la siguiente
+            if archivo.seek(0, os.SEEK_END):
+                archivo.seek(-1, os.SEEK_END)
+                if archivo.read(1) != b"\n":
+                    archivo.write(b"\n")
+            for linea in prefijo.splitlines(keepends=True):
+                evento = json.loads(linea)
+                if evento["evento"] in ("prestamo", "devolucion"):
+                    archivo.write(linea)
+        temporal = self.ruta_eventos + ".tmp"
+        with self._cerrojo_log:
+            self._log.close()
+            with open(self.ruta_eventos, "rb") as f:
+                f.seek(corte)
+                resto = f.read()
+            # Por un archivo temporal: un corte aquí no puede perder los eventos posteriores al corte
+            with open(temporal, "wb") as f:
+                f.write(resto)
+                if self.sincronizar:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temporal, self.ruta_eventos)
+            self._log = open(self.ruta_eventos, "a", encoding="utf-8")
+
+    def sincronizar_log(self) -> None:
+        """fsync del registro de eventos; se puede llamar desde otro hilo aunque se esté rotando."""
+        with self._cerrojo_log:
+            os.fsync(self._log.fileno())
+
+    def cargar_historial(self) -> List[Dict[str, str]]:
+        """Lee el historial completo (archivado + pendiente). Solo para auditoría, no para arrancar."""
+        historial: List[Dict[str, str]] = list(self._leer_archivado())
+        historial.extend(e for e in self._leer_eventos() if e["evento"] in ("prestamo", "devolucion"))
+        return historial
+
+    def cerrar(self) -> None:
+        if self.biblioteca is None:
+            return
+        self.guardar_snapshot()  # espera también a la instantánea periódica en curso
+        with self._cerrojo_log:
+            self._log.close()
+        self.biblioteca.desuscribir(self._registrar)
+        self.biblioteca = None
+
+
+# ====== MEDICIÓN DE ARRANQUE EN FRÍO ======
+def medir_arranque(directorio: str, n_libros: int = 1_000_000, n_usuarios: int = 100_000,
+                   n_prestamos: int = 200_000, n_cola: int = 10_000,
+                   n_archivados: int = 2_000_000) -> Dict[str, float]:
+    """Genera una biblioteca sintética, la guarda y mide cuánto tarda en volver a abrirse.
+
+    También mide cuánto bloquea al que registra el evento que dispara una instantánea periódica.
+    """
+    almacen = AlmacenBiblioteca(directorio, cada_n_eventos=None)
+    biblio = almacen.abrir()
+    # Carga masiva sin pasar por el registro: se persistirá en la primera instantánea
+    biblio.desuscribir(almacen._registrar)
+    for i in range(n_libros):
+        biblio.anadir_libro(Libro(identidad=(f"Titulo {i}", f"Autor {i % 5000}"),
+                                  categoria=f"Categoria {i % 50}", isbn=f"{i:013d}"))
+    for i in range(n_usuarios):
+        biblio.registrar_usuario(Usuario(nombre=f"Usuario {i}", user_id=f"U{i:06d}", prestados=[]))
+    for i in range(n_prestamos):
+        biblio.prestar_libro(f"{i:013d}", f"U{i % n_usuarios:06d}")
+    biblio.suscribir(almacen._registrar)
+    # Historial archivado de años de uso (solo se lee si alguien lo consulta)
+    with open(almacen.ruta_historial, "w", encoding="utf-8") as f:
+        for i in range(n_archivados):
+            f.write(json.dumps({"evento": "prestamo" if i % 2 == 0 else "devolucion",
+                                "isbn": f"{i // 2 % n_libros:013d}", "user_id": f"U{i % n_usuarios:06d}",
+                                "fecha": "2020-01-01 00:00:00", "seq": i + 1}) + "\n")
+    almacen._seq = n_archivados
+    inicio = time.perf_counter()
+    almacen.guardar_snapshot()
+    t_snapshot = time.perf_counter() - inicio
+
+    # Cola de eventos posteriores a la instantánea; el último dispara una instantánea periódica
+    for i in range(n_cola - 1):
+        biblio.devolver_libro(f"{i:013d}")
+    almacen.cada_n_eventos = n_cola
+    inicio = time.perf_counter()
+    biblio.devolver_libro(f"{n_cola - 1:013d}")
+    t_bloqueo = time.perf_counter() - inicio
+    almacen.esperar_snapshot()
+    almacen._log.close()
+
+    inicio = time.perf_counter()
+    restaurada = AlmacenBiblioteca(directorio, cada_n_eventos=None)
+    biblio2 = restaurada.abrir()
+    t_arranque = time.perf_counter() - inicio
+    assert len(biblio2) == n_libros and len(biblio2.prestamos_activos) == n_prestamos - n_cola
+    inicio = time.perf_counter()
+    assert len(biblio2.historial) == n_archivados + n_cola
+    t_primer_acceso = time.perf_counter() - inicio
+    restaurada._log.close()
+
+    inicio = time.perf_counter()
+    restaurada = AlmacenBiblioteca(directorio, cada_n_eventos=None)
+    restaurada.abrir(con_historial=True)
+    t_arranque_historial = time.perf_counter() - inicio
+    restaurada._log.close()
+    return {
+        "libros": n_libros,
+        "usuarios": n_usuarios,
+        "eventos_cola": n_cola,
+        "eventos_archivados": n_archivados,
+        "bytes_snapshot": os.path.getsize(almacen.ruta_snapshot),
+        "segundos_snapshot": round(t_snapshot, 3),
+        "segundos_bloqueo_snapshot_periodica": round(t_bloqueo, 3),
+        "segundos_arranque": round(t_arranque, 3),
+        "segundos_primer_acceso_historial": round(t_primer_acceso, 3),
+        "segundos_arranque_con_historial": round(t_arranque_historial, 3),
+    }
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+
+    if "--bench" in sys.argv:
+        with tempfile.TemporaryDirectory() as tmp:
+            print(medir_arranque(tmp))
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        almacen = AlmacenBiblioteca(tmp, cada_n_eventos=3)
+        biblio = almacen.abrir()
+        biblio.anadir_libro(Libro(identidad=("Rayuela", "Julio Cortázar"), categoria="Novela", isbn="9788437604572"))
+        biblio.registrar_usuario(Usuario(nombre="Ana", user_id="U001", prestados=[]))
+        biblio.prestar_libro("9788437604572", "U001")  # 3er evento: instantánea automática
+        almacen.esperar_snapshot()
+        biblio.devolver_libro("9788437604572")  # queda solo en eventos.log
+        almacen._log.write('{"evento": "prestamo", "isbn": "97884')  # corte a mitad de una línea
+        almacen._log.close()  # simulamos un cierre abrupto (sin instantánea final)
+
+        otro_almacen = AlmacenBiblioteca(tmp)
+        otra = otro_almacen.abrir()
+        print("Libros restaurados:", [l.titulo for l in otra.catalogo.values()])
+        print("Préstamos activos:", otra.prestamos_activos)
+        print("Historial (archivado + cola):", otra.historial)
+        otra.prestar_libro("9788437604572", "U001")  # se escribe tras recortar la línea rota
+        otro_almacen._log.close()
+        print("Préstamos tras otro reinicio:", AlmacenBiblioteca(tmp).abrir().prestamos_activos)
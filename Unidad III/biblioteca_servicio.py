@@ -0,0 +1,424 @@
+"""Servicio asyncio de préstamos para Biblioteca con interfaz HTTP/JSON local.
+
+- Candados por ISBN y por usuario: dos préstamos del mismo libro (o del mismo usuario) se
+  serializan, mientras que libros distintos avanzan en paralelo. Se adquieren siempre en el
+  mismo orden (ISBN y luego usuario) para evitar bloqueos mutuos.
+- Coalescencia: peticiones idénticas en curso (mismo préstamo, misma devolución) comparten
+  un único resultado en lugar de ejecutarse varias veces. Las búsquedas no esperan nada y
+  se resuelven de una vez, así que no hay nada que compartir.
+- Con un AlmacenBiblioteca, la respuesta se envía después de un fsync agrupado: un solo
+  fsync en un hilo confirma todas las operaciones acumuladas mientras tanto.
+
+Rutas:
+    POST /prestamos     {"isbn": ..., "user_id": ...}
+    POST /devoluciones  {"isbn": ...}
+    GET  /libros?titulo=...  |  ?autor=...  |  ?categoria=...
+    GET  /disponibles?limite=100
+    GET  /usuarios/<user_id>/prestados
+
+Errores: 400 si la petición o su cuerpo no son válidos, 404 si el libro, el usuario o la ruta
+no existen, 409 si la operación choca con el estado (libro ya prestado o no prestado) y 500
+si falla el fsync.
+
+Ejecutar `python biblioteca_servicio.py --bench` lanza la prueba de carga.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from Bibliotecadigital import Biblioteca, Libro, Usuario
+
+try:
+    from biblioteca_persistencia import AlmacenBiblioteca
+except ImportError:  # el servicio funciona igual sin persistencia
+    AlmacenBiblioteca = None
+
+ESTADOS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+                500: "Internal Server Error"}
+
+
+class PeticionInvalida(Exception):
+    """Petición HTTP o cuerpo JSON mal formados (se responde 400)."""
+
+
+def _campos(cuerpo: bytes, *nombres: str) -> List[str]:
+    """Valida que `cuerpo` sea un objeto JSON con los campos de texto `nombres` y los devuelve."""
+    try:
+        datos = json.loads(cuerpo) if cuerpo else {}
+    except ValueError:  # JSON inválido o bytes que no son UTF-8
+        raise PeticionInvalida("El cuerpo no es JSON válido") from None
+    if not isinstance(datos, dict):
+        raise PeticionInvalida("El cuerpo debe ser un objeto JSON")
+    valores = []
+    for nombre in nombres:
+        valor = datos.get(nombre)
+        if not isinstance(valor, str) or not valor:
+            raise PeticionInvalida(f"Falta el campo de texto {nombre!r}")
+        valores.append(valor)
+    return valores
+
+
+def _libro_a_dict(libro: Libro) -> Dict[str, str]:
+    return {"isbn": libro.isbn, "titulo": libro.titulo, "autor": libro.autor, "categoria": libro.categoria}
+
+
+class CandadosPorClave:
+    """Un asyncio.Lock por clave, creado al vuelo y descartado cuando nadie lo usa."""
+
+    def __init__(self) -> None:
+        self._candados: Dict[str, asyncio.Lock] = {}
+        self._usos: Dict[str, int] = {}
+
+    async def adquirir(self, clave: str) -> None:
+        candado = self._candados.get(clave)
+        if candado is None:
+            candado = self._candados[clave] = asyncio.Lock()
+        self._usos[clave] = self._usos.get(clave, 0) + 1
+        await candado.acquire()
+
+    def liberar(self, clave: str) -> None:
+        self._candados[clave].release()
+        self._usos[clave] -= 1
+        if not self._usos[clave]:
+            del self._usos[clave]
+            del self._candados[clave]
+
+    def __len__(self) -> int:
+        return len(self._candados)
+
+
+class ServicioPrestamos:
+    """Envuelve una Biblioteca y expone sus operaciones como corrutinas seguras ante concurrencia."""
+
+    def __init__(self, biblioteca: Biblioteca, almacen: Optional["AlmacenBiblioteca"] = None) -> None:
+        self.biblioteca = biblioteca
+        self.almacen = almacen
+        self.candados_isbn = CandadosPorClave()
+        self.candados_usuario = CandadosPorClave()
+        self._en_curso: Dict[Tuple, asyncio.Future] = {}
+        self._esperando_fsync: List[asyncio.Future] = []
+        self._fsync_activo = False
+
+    # --- Coalescencia ---
+    async def _coalescer(self, clave: Tuple, operacion: Callable[[], Awaitable[Any]]) -> Any:
+        """Si ya hay una petición idéntica en curso, espera su resultado en lugar de repetirla."""
+        futuro = self._en_curso.get(clave)
+        if futuro is not None:
+            return await asyncio.shield(futuro)
+        futuro = asyncio.get_running_loop().create_future()
+        self._en_curso[clave] = futuro
+        try:
+            resultado = await operacion()
+        except Exception as e:
+            futuro.set_exception(e)
+            futuro.exception()  # marcada como recuperada aunque nadie más la espere
+            raise
+        else:
+            futuro.set_result(resultado)
+            return resultado
+        finally:
+            del self._en_curso[clave]
+            if not futuro.done():
+                # Cancelaron la petición original: los que esperaban su resultado no deben colgarse
+                futuro.set_exception(RuntimeError("La operación original se canceló"))
+                futuro.exception()
+
+    # --- Durabilidad con fsync agrupado ---
+    async def _confirmar(self) -> None:
+        if self.almacen is None:
+            return
+        futuro = asyncio.get_running_loop().create_future()
+        self._esperando_fsync.append(futuro)
+        if not self._fsync_activo:
+            self._fsync_activo = True
+            asyncio.create_task(self._ciclo_fsync())
+        await futuro
+
+    async def _ciclo_fsync(self) -> None:
+        lote: List[asyncio.Future] = []
+        try:
+            while self._esperando_fsync:
+                lote, self._esperando_fsync = self._esperando_fsync, []
+                # El almacén toma el descriptor bajo el mismo cerrojo con el que rota el registro
+                await asyncio.to_thread(self.almacen.sincronizar_log)
+                for futuro in lote:
+                    if not futuro.done():  # el cliente pudo cancelar mientras tanto
+                        futuro.set_result(None)
+                lote = []
+        except Exception as e:
+            # Si el fsync falla, nadie puede quedarse esperando (retienen los candados de ISBN y usuario)
+            for futuro in lote + self._esperando_fsync:
+                if not futuro.done():
+                    futuro.set_exception(OSError(f"No se pudo confirmar en disco: {e}"))
+            self._esperando_fsync = []
+        finally:
+            self._fsync_activo = False
+
+    # --- Operaciones ---
+    async def prestar(self, isbn: str, user_id: str) -> Dict[str, Any]:
+        return await self._coalescer(("prestamo", isbn, user_id), lambda: self._prestar(isbn, user_id))
+
+    async def _prestar(self, isbn: str, user_id: str) -> Dict[str, Any]:
+        await self.candados_isbn.adquirir(isbn)
+        try:
+            await self.candados_usuario.adquirir(user_id)
+            try:
+                # Comprobación y asignación sin await intermedio: atómicas dentro del bucle de eventos
+                self.biblioteca.prestar_libro(isbn, user_id)
+                await self._confirmar()
+            finally:
+                self.candados_usuario.liberar(user_id)
+        finally:
+            self.candados_isbn.liberar(isbn)
+        return {"ok": True, "isbn": isbn, "user_id": user_id}
+
+    async def devolver(self, isbn: str) -> Dict[str, Any]:
+        return await self._coalescer(("devolucion", isbn), lambda: self._devolver(isbn))
+
+    async def _devolver(self, isbn: str) -> Dict[str, Any]:
+        await self.candados_isbn.adquirir(isbn)
+        try:
+            user_id = self.biblioteca.prestamos_activos.get(isbn)
+            if user_id is None:
+                raise ValueError(f"El libro {isbn} no figura como prestado.")
+            await self.candados_usuario.adquirir(user_id)
+            try:
+                self.biblioteca.devolver_libro(isbn)
+                await self._confirmar()
+            finally:
+                self.candados_usuario.liberar(user_id)
+        finally:
+            self.candados_isbn.liberar(isbn)
+        return {"ok": True, "isbn": isbn, "user_id": user_id}
+
+    def buscar(self, campo: str, texto: str) -> List[Dict[str, str]]:
+        metodo = getattr(self.biblioteca, f"buscar_por_{campo}")
+        return [_libro_a_dict(l) for l in metodo(texto)]
+
+    # --- HTTP ---
+    async def _despachar(self, metodo: str, ruta: str, cuerpo: bytes) -> Tuple[int, Any]:
+        partes = urlsplit(ruta)
+        camino = partes.path.rstrip("/")
+        consulta = {k: v[0] for k, v in parse_qs(partes.query).items()}
+
+        if camino == "/prestamos":
+            if metodo != "POST":
+                return 405, {"error": "Usa POST"}
+            isbn, user_id = _campos(cuerpo, "isbn", "user_id")
+            return 200, await self.prestar(isbn, user_id)
+        if camino == "/devoluciones":
+            if metodo != "POST":
+                return 405, {"error": "Usa POST"}
+            isbn, = _campos(cuerpo, "isbn")
+            return 200, await self.devolver(isbn)
+        if camino == "/libros":
+            for campo in ("titulo", "autor", "categoria"):
+                if campo in consulta:
+                    return 200, self.buscar(campo, consulta[campo])
+            return 400, {"error": "Indica titulo, autor o categoria"}
+        if camino == "/disponibles":
+            limite = consulta.get("limite", "100")
+            if not limite.isdigit():
+                raise PeticionInvalida("limite debe ser un entero no negativo")
+            limite = int(limite)
+            disponibles = self.biblioteca.listar_disponibles()[:limite]
+            return 200, [_libro_a_dict(l) for l in disponibles]
+        if camino.startswith("/usuarios/") and camino.endswith("/prestados"):
+            user_id = camino[len("/usuarios/"):-len("/prestados")]
+            return 200, [_libro_a_dict(l) for l in self.biblioteca.listar_prestados_usuario(user_id)]
+        return 404, {"error": f"Ruta desconocida: {camino}"}
+
+    async def _responder(self, metodo: str, ruta: str, cuerpo: bytes) -> Tuple[int, Any]:
+        """Despacha la petición y traduce las excepciones a su código HTTP."""
+        try:
+            return await self._despachar(metodo, ruta, cuerpo)
+        except PeticionInvalida as e:
+            return 400, {"error": str(e)}
+        except KeyError as e:  # libro o usuario inexistente
+            return 404, {"error": str(e).strip("'\"")}
+        except ValueError as e:  # choca con el estado: ya prestado, no prestado...
+            return 409, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    @staticmethod
+    async def _leer_peticion(lector: asyncio.StreamReader, linea: bytes) -> Tuple[str, str, Dict[str, str], bytes]:
+        """Lee cabeceras y cuerpo tras la línea de petición `linea`."""
+        partes = linea.decode("latin-1").split()
+        if len(partes) != 3 or not partes[2].startswith("HTTP/"):
+            raise PeticionInvalida("Línea de petición mal formada")
+        metodo, ruta, _ = partes
+        cabeceras: Dict[str, str] = {}
+        while True:
+            linea = await lector.readline()
+            if linea in (b"\r\n", b"\n", b""):
+                break
+            nombre, _, valor = linea.decode("latin-1").partition(":")
+            cabeceras[nombre.strip().lower()] = valor.strip()
+        largo = cabeceras.get("content-length", "0")
+        if not largo.isdigit():
+            raise PeticionInvalida("Content-Length no válido")
+        cuerpo = await lector.readexactly(int(largo)) if int(largo) else b""
+        return metodo, ruta, cabeceras, cuerpo
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Atiende una conexión HTTP/1.1 con keep-alive."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, ruta, cabeceras, cuerpo = await self._leer_peticion(lector, linea)
+                except PeticionInvalida as e:
+                    # No se sabe dónde empieza la siguiente petición: se responde y se cierra
+                    estado, respuesta, cabeceras = 400, {"error": str(e)}, {"connection": "close"}
+                else:
+                    estado, respuesta = await self._responder(metodo, ruta, cuerpo)
+                carga = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+                escritor.write(
+                    f"HTTP/1.1 {estado} {ESTADOS_HTTP[estado]}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(carga)}\r\n\r\n".encode("latin-1") + carga
+                )
+                await escritor.drain()
+                if cabeceras.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(self, host: str = "127.0.0.1", puerto: int = 8080) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self._atender, host, puerto, backlog=1024)
+
+
+# ====== PRUEBA DE CARGA ======
+async def _peticion(lector, escritor, metodo: str, ruta: str, datos: Optional[dict] = None) -> Tuple[int, Any]:
+    cuerpo = json.dumps(datos).encode("utf-8") if datos is not None else b""
+    escritor.write(
+        f"{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo
+    )
+    await escritor.drain()
+    estado = int((await lector.readline()).split()[1])
+    largo = 0
+    while True:
+        linea = await lector.readline()
+        if linea in (b"\r\n", b""):
+            break
+        if linea.lower().startswith(b"content-length:"):
+            largo = int(linea.split(b":")[1])
+    return estado, json.loads(await lector.readexactly(largo))
+
+
+async def prueba_carga(host: str, puerto: int, clientes: int, isbns: List[str], user_ids: List[str],
+                       duracion: float = 3.0) -> Dict[str, float]:
+    """Cada cliente presta un ISBN al azar y, si lo consigue, lo devuelve. Mide préstamos/s y latencias."""
+    latencias: List[float] = []
+    prestamos_ok = 0
+    rechazos = 0
+    fin = time.perf_counter() + duracion
+
+    async def cliente(n: int) -> None:
+        nonlocal prestamos_ok, rechazos
+        lector, escritor = await asyncio.open_connection(host, puerto)
+        azar = random.Random(n)
+        user_id = user_ids[n % len(user_ids)]
+        try:
+            while time.perf_counter() < fin:
+                isbn = azar.choice(isbns)
+                t0 = time.perf_counter()
+                estado, _ = await _peticion(lector, escritor, "POST", "/prestamos", {"isbn": isbn, "user_id": user_id})
+                latencias.append(time.perf_counter() - t0)
+                if estado == 200:
+                    prestamos_ok += 1
+                    t0 = time.perf_counter()
+                    await _peticion(lector, escritor, "POST", "/devoluciones", {"isbn": isbn})
+                    latencias.append(time.perf_counter() - t0)
+                else:
+                    rechazos += 1
+        finally:
+            escritor.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(n) for n in range(clientes)))
+    transcurrido = time.perf_counter() - inicio
+    latencias.sort()
+
+    def percentil(p: float) -> float:
+        return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000, 2) if latencias else 0.0
+
+    return {
+        "clientes": clientes,
+        "prestamos_por_s": round(prestamos_ok / transcurrido, 1),
+        "rechazos_por_s": round(rechazos / transcurrido, 1),
+        "p50_ms": percentil(0.50),
+        "p99_ms": percentil(0.99),
+        "p999_ms": percentil(0.999),
+    }
+
+
+def verificar_sin_doble_prestamo(biblioteca: Biblioteca) -> None:
+    """Recorre el historial: cada ISBN debe alternar préstamo/devolución sin dos préstamos seguidos."""
+    prestado: Dict[str, bool] = {}
+    for registro in biblioteca.historial:
+        isbn = registro["isbn"]
+        if registro["evento"] == "prestamo":
+            if prestado.get(isbn):
+                raise AssertionError(f"Doble préstamo del libro {isbn}")
+            prestado[isbn] = True
+        else:
+            prestado[isbn] = False
+
+
+async def _bench(niveles=(1, 10, 50, 100, 250, 500), n_libros: int = 200) -> None:
+    biblio = Biblioteca()
+    isbns = [f"{i:013d}" for i in range(n_libros)]  # pocos libros: fuerza contención por ISBN
+    for i, isbn in enumerate(isbns):
+        biblio.anadir_libro(Libro(identidad=(f"Titulo {i}", f"Autor {i % 20}"), categoria="General", isbn=isbn))
+    user_ids = [f"U{i:04d}" for i in range(max(niveles))]
+    for uid in user_ids:
+        biblio.registrar_usuario(Usuario(nombre=uid, user_id=uid, prestados=[]))
+
+    servicio = ServicioPrestamos(biblio)
+    servidor = await servicio.iniciar(puerto=0)
+    puerto = servidor.sockets[0].getsockname()[1]
+    async with servidor:
+        for clientes in niveles:
+            print(await prueba_carga("127.0.0.1", puerto, clientes, isbns, user_ids))
+    verificar_sin_doble_prestamo(biblio)
+    print(f"Sin dobles préstamos en {len(biblio.historial)} eventos.")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        asyncio.run(_bench())
+        sys.exit(0)
+
+    async def _demo() -> None:
+        biblio = Biblioteca()
+        biblio.anadir_libro(Libro(identidad=("Ficciones", "Jorge Luis Borges"), categoria="Cuento", isbn="9788420633114"))
+        for uid in ("U001", "U002"):
+            biblio.registrar_usuario(Usuario(nombre=uid, user_id=uid, prestados=[]))
+        servicio = ServicioPrestamos(biblio)
+        # Dos usuarios intentan llevarse el mismo libro a la vez: solo uno lo consigue
+        resultados = await asyncio.gather(
+            servicio.prestar("9788420633114", "U001"),
+            servicio.prestar("9788420633114", "U002"),
+            return_exceptions=True,
+        )
+        print(resultados)
+        servidor = await servicio.iniciar()
+        print("Escuchando en http://127.0.0.1:8080 (Ctrl+C para salir)")
+        async with servidor:
+            await servidor.serve_forever()
+
+    asyncio.run(_demo())
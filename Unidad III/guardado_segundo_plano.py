@@ -0,0 +1,269 @@
+"""
+guardado_segundo_plano.py
+Guardado automático en segundo plano para las aplicaciones Tkinter (Agenda, Lista de Tareas).
+
+Guardar en el hilo de Tk en cada cambio congela la ventana mientras se escribe el archivo.
+GuardadoEnSegundoPlano reparte el trabajo así:
+
+- Hilo de Tk: `marcar_cambio(ruta, instantanea, escribir)` solo apunta qué archivo está sucio
+  (si llegan varios cambios del mismo archivo, cuenta el último) y reprograma un temporizador
+  `after` (antirrebote). Cuando la edición se detiene `retardo_ms` (o como mucho cada
+  `espera_maxima_ms` si no se detiene), toma una instantánea barata de los datos
+  (`instantanea()`, una copia de referencias) y la pasa al hilo de fondo por una cola.
+- Hilo de fondo: serializa (`escribir(datos, archivo)`), escribe en archivos temporales, hace
+  un fsync por archivo y uno por directorio para todo el lote y los reemplaza con os.replace.
+  Si mientras tanto llegan más lotes, se juntan y solo se escribe la última versión de cada archivo.
+- El resultado (rutas guardadas o el error) vuelve al hilo de Tk por otra cola que se revisa
+  con `after`; `al_terminar` se llama siempre desde el bucle de Tk, nunca desde el hilo de fondo.
+
+`cerrar()` guarda lo pendiente y espera al hilo: llamarlo antes de destruir la ventana.
+
+`ruta_datos(nombre)` da la ruta de un archivo de datos en la carpeta del usuario (nunca junto
+al código fuente). `apartar_corrupto(ruta)` renombra un archivo que no se pudo leer al arrancar, para que el
+primer guardado automático no lo sobrescriba con una lista vacía.
+
+Ejecutar `python guardado_segundo_plano.py --bench` mide la latencia del bucle de eventos de Tk
+mientras se edita sin parar, guardando en el hilo de Tk o en segundo plano (necesita pantalla;
+en un servidor: xvfb-run python guardado_segundo_plano.py --bench).
+"""
+
+import os
+import queue
+import shutil
+import threading
+import time
+
+# Datos del usuario (XDG_DATA_HOME en Linux, APPDATA en Windows, si no ~/.local/share)
+CARPETA_DATOS = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.environ.get("APPDATA")
+    or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "agenda_tareas",
+)
+
+
+class GuardadoEnSegundoPlano:
+    """Antirrebote en el bucle de Tk + escritura agrupada en un hilo de fondo."""
+
+    def __init__(self, widget, retardo_ms=500, espera_maxima_ms=5000, al_terminar=None):
+        self.widget = widget  # cualquier widget de la ventana: se usa para after()
+        self.retardo_ms = retardo_ms
+        self.espera_maxima_ms = espera_maxima_ms
+        self.al_terminar = al_terminar  # al_terminar(rutas, error) en el hilo de Tk
+        self._sucios = {}  # ruta -> (instantanea, escribir); el último cambio gana
+        self._primer_cambio = None
+        self._temporizador = None
+        self._vigilancia = None  # id del after que revisa los resultados
+        self._cerrado = False
+        self._en_curso = 0  # lotes enviados al hilo cuyo resultado aún no ha vuelto
+        self._lotes = queue.Queue()
+        self._resultados = queue.Queue()
+        self._hilo = threading.Thread(target=self._trabajar, name="guardado", daemon=True)
+        self._hilo.start()
+
+    # ---------- Hilo de Tk ----------
+    def marcar_cambio(self, ruta, instantanea, escribir):
+        """Anota que `ruta` debe guardarse. No escribe nada: solo (re)programa el temporizador."""
+        self._sucios[ruta] = (instantanea, escribir)
+        ahora = time.monotonic()
+        if self._primer_cambio is None:
+            self._primer_cambio = ahora
+        if self._temporizador is not None:
+            self.widget.after_cancel(self._temporizador)
+        restante_ms = self.espera_maxima_ms - (ahora - self._primer_cambio) * 1000
+        self._temporizador = self.widget.after(max(0, int(min(self.retardo_ms, restante_ms))), self._despachar)
+
+    def _despachar(self):
+        self._temporizador = None
+        self._primer_cambio = None
+        if not self._sucios:
+            return
+        # La instantánea se toma aquí, en el hilo de Tk, para que el hilo de fondo no lea datos a medio cambiar
+        lote = {ruta: (escribir, instantanea()) for ruta, (instantanea, escribir) in self._sucios.items()}
+        self._sucios = {}
+        self._en_curso += 1
+        self._lotes.put(lote)
+        if self._vigilancia is None and not self._cerrado:
+            self._vigilancia = self.widget.after(50, self._revisar_resultados)
+
+    def _entregar_resultados(self):
+        while True:
+            try:
+                rutas, error = self._resultados.get_nowait()
+            except queue.Empty:
+                return
+            self._en_curso -= 1
+            if self.al_terminar is not None:
+                self.al_terminar(rutas, error)
+
+    def _revisar_resultados(self):
+        self._entregar_resultados()
+        self._vigilancia = self.widget.after(50, self._revisar_resultados) if self._en_curso else None
+
+    @property
+    def pendiente(self):
+        """True si hay cambios sin escribir todavía en disco."""
+        return bool(self._sucios) or self._en_curso > 0
+
+    def cerrar(self):
+        """Guarda lo pendiente ya mismo y espera a que el hilo termine (al salir de la aplicación)."""
+        if self._cerrado:
+            return
+        self._cerrado = True
+        for pendiente in (self._temporizador, self._vigilancia):
+            if pendiente is not None:
+                self.widget.after_cancel(pendiente)
+        self._despachar()
+        self._lotes.put(None)
+        self._hilo.join()
+        # El bucle de Tk ya no va a revisar la cola: se entregan aquí los resultados que falten
+        self._entregar_resultados()
+
+    # ---------- Hilo de fondo ----------
+    def _trabajar(self):
+        terminar = False
+        while not terminar:
+            lote = self._lotes.get()
+            if lote is None:
+                break
+            lotes = 1
+            # Coalescencia: si se acumularon lotes mientras escribíamos, cuenta la última versión de cada ruta
+            while True:
+                try:
+                    siguiente = self._lotes.get_nowait()
+                except queue.Empty:
+                    break
+                if siguiente is None:
+                    terminar = True
+                    break
+                lote.update(siguiente)
+                lotes += 1
+            try:
+                self._escribir_lote(lote)
+                error = None
+            except Exception as e:  # se informa en el hilo de Tk; el hilo sigue vivo para el próximo lote
+                error = e
+            rutas = list(lote)
+            # Un resultado por lote recibido, para que _en_curso cuadre en el hilo de Tk
+            for _ in range(lotes - 1):
+                self._resultados.put(([], None))
+            self._resultados.put((rutas, error))
+
+    @staticmethod
+    def _escribir_lote(lote):
+        temporales = []
+        try:
+            for ruta, (escribir, datos) in lote.items():
+                temporal = ruta + ".tmp"
+                temporales.append((temporal, ruta))
+                with open(temporal, "w", encoding="utf-8") as archivo:
+                    escribir(datos, archivo)
+                    archivo.flush()
+                    os.fsync(archivo.fileno())
+            for temporal, ruta in temporales:
+                os.replace(temporal, ruta)
+        except BaseException:
+            for temporal, _ in temporales:
+                if os.path.exists(temporal):
+                    os.remove(temporal)
+            raise
+        # Un único fsync por directorio para que los renombres del lote lleguen al disco
+        if os.name == "posix":
+            for directorio in {os.path.dirname(os.path.abspath(ruta)) for ruta in lote}:
+                descriptor = os.open(directorio, os.O_RDONLY)
+                try:
+                    os.fsync(descriptor)
+                finally:
+                    os.close(descriptor)
+
+
+def ruta_datos(nombre):
+    """
+    Ruta de `nombre` en CARPETA_DATOS (creándola si hace falta). Si aún no existe pero quedó un
+    archivo con ese nombre junto al código (versiones anteriores guardaban ahí), se traslada.
+    """
+    os.makedirs(CARPETA_DATOS, exist_ok=True)
+    ruta = os.path.join(CARPETA_DATOS, nombre)
+    anterior = os.path.join(os.path.dirname(os.path.abspath(__file__)), nombre)
+    if not os.path.exists(ruta) and os.path.exists(anterior):
+        try:
+            shutil.move(anterior, ruta)
+        except OSError:
+            return anterior  # no se pudo mover: se sigue usando el de siempre
+    return ruta
+
+
+def apartar_corrupto(ruta):
+    """
+    Renombra `ruta` a `ruta.corrupto` (o `.corrupto.1`, `.2`... si ya existe) y devuelve el
+    nombre nuevo; None si no se pudo renombrar (entonces la aplicación no debe guardar en `ruta`).
+    """
+    destino, n = ruta + ".corrupto", 0
+    while os.path.exists(destino):
+        n += 1
+        destino = f"{ruta}.corrupto.{n}"
+    try:
+        os.replace(ruta, destino)
+    except OSError:
+        return None
+    return destino
+
+
+# ====== MEDICIÓN ======
+def medir_latencia(n_eventos=200_000, segundos=5.0, cambio_cada_ms=20, tic_ms=10):
+    """
+    Retraso de un temporizador de `tic_ms` del bucle de Tk mientras se hace un cambio cada
+    `cambio_cada_ms` en una agenda de `n_eventos`: guardando en el hilo de Tk tras cada cambio
+    (lo ingenuo) o con GuardadoEnSegundoPlano. Devuelve p50/p99/máximo en milisegundos.
+    """
+    import tempfile
+    import tkinter as tk
+
+    from agenda_almacen import AlmacenEventos, Evento
+
+    almacen = AlmacenEventos()
+    almacen.agregar_varios(Evento(f"{1 + i % 28:02d}/{1 + i % 12:02d}/2026", f"{i % 24:02d}:{i % 60:02d}",
+                                  f"Evento {i}") for i in range(n_eventos))
+    resultados = {"eventos": n_eventos}
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "agenda.json")
+        for modo in ("hilo_tk", "segundo_plano"):
+            raiz = tk.Tk()
+            guardado = GuardadoEnSegundoPlano(raiz)
+            retrasos = []
+            fin = time.monotonic() + segundos
+
+            def tic(esperado):
+                ahora = time.monotonic()
+                retrasos.append((ahora - esperado) * 1000)
+                if ahora < fin:
+                    raiz.after(tic_ms, tic, time.monotonic() + tic_ms / 1000)
+                else:
+                    raiz.quit()
+
+            def editar():
+                if modo == "hilo_tk":
+                    almacen.guardar(ruta)
+                else:
+                    guardado.marcar_cambio(ruta, almacen.instantanea, AlmacenEventos.escribir_instantanea)
+                if time.monotonic() < fin:
+                    raiz.after(cambio_cada_ms, editar)
+
+            raiz.after(tic_ms, tic, time.monotonic() + tic_ms / 1000)
+            raiz.after(cambio_cada_ms, editar)
+            raiz.mainloop()
+            guardado.cerrar()
+            raiz.destroy()
+            retrasos.sort()
+            resultados[f"{modo}_p50_ms"] = round(retrasos[len(retrasos) // 2], 1)
+            resultados[f"{modo}_p99_ms"] = round(retrasos[int(len(retrasos) * 0.99)], 1)
+            resultados[f"{modo}_max_ms"] = round(retrasos[-1], 1)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_latencia())
+        sys.exit(0)
+    print(__doc__)
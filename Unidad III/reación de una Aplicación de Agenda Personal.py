@@ -7,16 +7,29 @@ Requisitos:
 - (Opcional) tkcalendar para DatePicker: pip install tkcalendar
 
 Funcionalidades:
-- Mostrar eventos en un TreeView (fecha, hora, descripción)
-- Añadir eventos mediante campos de entrada
+- Mostrar eventos en un TreeView (fecha, hora, descripción) virtualizado: los eventos viven
+  en una lista de Python y solo existen como filas del widget los que se ven en pantalla
+- Añadir eventos mediante campos de entrada (con aviso si se solapan con otro evento)
+- Eventos que se repiten (diarios, semanales o mensuales, hasta una fecha o un número de veces)
+- Filtrar por hoy / esta semana / este mes, o ver las series (en "Todos" aparecen arriba)
+- Guardar los eventos en disco (agenda_eventos.json en la carpeta de datos del usuario) en
+  segundo plano, sin bloquear la ventana mientras se edita
+- Recordatorios unos minutos antes de cada evento (un único temporizador para el más próximo)
+- Importar y exportar calendarios .ics (la importación avanza por bloques sin congelar la ventana)
 - Eliminar evento seleccionado con confirmación
 - Organización por Frames
 - Comentarios explicativos en el código
 """
 
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox
-from datetime import datetime
+from tkinter import ttk, messagebox, filedialog
+from datetime import date, datetime, timedelta
+
+from agenda_almacen import AlmacenEventos, Evento, Recurrencia, Serie, leer_fecha, leer_hora
+from agenda_ics import exportar_ics, importar_por_partes
+from agenda_recordatorios import PlanificadorRecordatorios
+from guardado_segundo_plano import GuardadoEnSegundoPlano, apartar_corrupto, ruta_datos
 
 # Intentamos importar DateEntry de tkcalendar para el DatePicker opcional.
 # Si no está instalado, usamos un campo Entry con validación de formato.
@@ -27,27 +40,206 @@ except Exception:
     TKCALENDAR_AVAILABLE = False
 
 
+RUTA_EVENTOS = ruta_datos("agenda_eventos.json")
+
+
+class VistaVirtual:
+    """
+    Muestra una secuencia de Evento en un Treeview sin crear una fila por evento.
+
+    El Treeview tiene un conjunto fijo de filas (tantas como caben en pantalla) que se
+    reutilizan: al desplazarse solo se cambian sus valores. La barra de desplazamiento y la
+    rueda del ratón mueven un índice de inicio sobre el modelo, no el widget.
+    La selección se guarda por id de evento, así sobrevive al desplazamiento.
+    """
+
+    def __init__(self, tree, scrollbar, filas_visibles):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.filas_visibles = filas_visibles
+        self.modelo = []  # cualquier secuencia de Evento (len + índice)
+        self.inicio = 0
+        self.seleccion = set()  # ids de eventos seleccionados
+        # Conjunto fijo de filas reutilizables
+        self._filas = [tree.insert("", tk.END, values=("", "", "")) for _ in range(filas_visibles)]
+        self._visibles = {}  # iid -> id del evento que muestra ahora
+
+        scrollbar.configure(command=self._al_mover_barra)
+        tree.bind("<<TreeviewSelect>>", self._al_seleccionar)
+        tree.bind("<MouseWheel>", lambda e: self.desplazar(-1 if e.delta > 0 else 1) or "break")
+        tree.bind("<Button-4>", lambda e: self.desplazar(-1) or "break")  # rueda en Linux
+        tree.bind("<Button-5>", lambda e: self.desplazar(1) or "break")
+        tree.bind("<Up>", lambda e: self._tecla(-1))
+        tree.bind("<Down>", lambda e: self._tecla(1))
+        tree.bind("<Prior>", lambda e: self.desplazar(-self.filas_visibles) or "break")
+        tree.bind("<Next>", lambda e: self.desplazar(self.filas_visibles) or "break")
+
+    def establecer_modelo(self, modelo):
+        self.modelo = modelo
+        self.refrescar()
+
+    def refrescar(self):
+        """Vuelve a pintar las filas visibles (llamar tras modificar el modelo)."""
+        maximo = max(0, len(self.modelo) - self.filas_visibles)
+        self.inicio = min(self.inicio, maximo)
+        self._pintar()
+
+    def desplazar(self, filas):
+        maximo = max(0, len(self.modelo) - self.filas_visibles)
+        nuevo = min(max(0, self.inicio + filas), maximo)
+        if nuevo != self.inicio:
+            self.inicio = nuevo
+            self._pintar()
+
+    def ir_a(self, indice):
+        """Desplaza lo justo para que el evento en `indice` quede a la vista."""
+        if indice < self.inicio:
+            self.desplazar(indice - self.inicio)
+        elif indice >= self.inicio + self.filas_visibles:
+            self.desplazar(indice - self.inicio - self.filas_visibles + 1)
+
+    def _pintar(self):
+        total = len(self.modelo)
+        self._visibles = {}
+        seleccionar = []
+        for k, iid in enumerate(self._filas):
+            i = self.inicio + k
+            if i < total:
+                evento = self.modelo[i]
+                self.tree.item(iid, values=evento.valores())
+                self.tree.move(iid, "", k)  # vuelve a enganchar la fila si estaba oculta
+                self._visibles[iid] = evento.id
+                if evento.id in self.seleccion:
+                    seleccionar.append(iid)
+            else:
+                self.tree.detach(iid)
+        self.tree.selection_set(seleccionar)
+        if total:
+            self.scrollbar.set(self.inicio / total, min(1.0, (self.inicio + self.filas_visibles) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _al_mover_barra(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            self.desplazar(int(float(cantidad) * len(self.modelo)) - self.inicio)
+        elif accion == "scroll":
+            paso = self.filas_visibles if unidad == "pages" else 1
+            self.desplazar(int(cantidad) * paso)
+
+    def _al_seleccionar(self, event=None):
+        # Solo las filas visibles pueden haber cambiado; la selección fuera de pantalla se conserva
+        self.seleccion.difference_update(self._visibles.values())
+        self.seleccion.update(self._visibles[iid] for iid in self.tree.selection() if iid in self._visibles)
+
+    def _tecla(self, paso):
+        """Flechas: al llegar al borde de las filas visibles, desplaza el modelo en lugar del foco."""
+        foco = self.tree.focus()
+        if foco in self._filas:
+            posicion = self._filas.index(foco)
+            if (paso < 0 and posicion == 0) or (paso > 0 and posicion == len(self._visibles) - 1):
+                self.desplazar(paso)
+                # La fila con el foco ahora muestra el evento siguiente/anterior: lo seleccionamos
+                if foco in self._visibles:
+                    self.seleccion = {self._visibles[foco]}
+                    self.tree.selection_set(foco)
+                return "break"
+        return None
+
+
+class ListaTodos:
+    """
+    Modelo del filtro "Todos": primero una fila por serie (sin expandir) y después los eventos
+    únicos del almacén en orden cronológico. Los eventos se leen del propio almacén, así que
+    siempre están al día; la lista de series se toma al crear el modelo (se rehace con el filtro).
+    """
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self.series = almacen.series()
+
+    def __len__(self):
+        return len(self.series) + len(self.almacen)
+
+    def __getitem__(self, indice):
+        if indice < len(self.series):
+            return self.series[indice]
+        return self.almacen[indice - len(self.series)]
+
+    def indice(self, id_evento):
+        """Posición de una serie o de un evento único (búsqueda binaria en el almacén); None si no está."""
+        for i, serie in enumerate(self.series):
+            if serie.id == id_evento:
+                return i
+        indice = self.almacen.indice(id_evento)
+        return None if indice is None else len(self.series) + indice
+
+
 class AgendaApp(tk.Tk):
-    def __init__(self):
+    FILAS_VISIBLES = 10
+
+    FILTROS = ("Todos", "Hoy", "Esta semana", "Este mes", "Series")
+    ANTELACION_RECORDATORIO = timedelta(minutes=10)
+    REPETICIONES = {"No": None, "Diaria": "diaria", "Semanal": "semanal", "Mensual": "mensual"}
+
+    def __init__(self, ruta=RUTA_EVENTOS):
         super().__init__()
         self.title("Agenda Personal")
-        self.geometry("700x450")
+        self.geometry("700x490")
         self.resizable(False, False)
 
+        # Modelo: almacén ordenado por fecha; el Treeview solo muestra los visibles
+        aviso_carga = None
+        try:
+            self.eventos = AlmacenEventos(ruta)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            # Archivo dañado o de un formato antiguo: se aparta antes de que un guardado lo pise
+            respaldo = apartar_corrupto(ruta)
+            self.eventos = AlmacenEventos(ruta if respaldo else None)
+            if respaldo:
+                aviso_carga = (f"No se pudieron leer los eventos guardados ({e}).\n\n"
+                               f"Se empieza con una agenda vacía; el archivo original se conservó como:\n{respaldo}")
+            else:
+                aviso_carga = (f"No se pudieron leer los eventos guardados ({e}).\n\n"
+                               f"Los cambios de esta sesión no se guardarán para no sobrescribir:\n{ruta}")
+        # Los cambios se guardan con antirrebote en un hilo de fondo; el resultado vuelve a este bucle
+        self.guardado = GuardadoEnSegundoPlano(self, al_terminar=self._al_guardar)
+        self.protocol("WM_DELETE_WINDOW", self._cerrar)
+
         # Contenedor principal: top (lista) y bottom (entradas y botones)
         self.create_widgets()
 
+        # Recordatorios: montículo con un solo after() armado para el más próximo
+        self.recordatorios = PlanificadorRecordatorios(self, self._recordar)
+        self._ventana_recordatorios = None
+        self._programar_todos()
+        series = len(self.eventos.series())
+        if len(self.eventos) or series:
+            self.status_var.set(f"{len(self.eventos)} evento(s) y {series} serie(s) cargados.")
+        if aviso_carga:
+            self.status_var.set("No se pudieron leer los eventos guardados.")
+            self.after_idle(lambda: messagebox.showwarning("Aviso", aviso_carga))
+
     def create_widgets(self):
         # ---------- Frame: Lista de eventos ----------
         frame_list = ttk.Frame(self, padding=(10, 8))
         frame_list.pack(fill=tk.BOTH, expand=False)
 
-        lbl_title = ttk.Label(frame_list, text="Eventos programados", font=("Segoe UI", 12, "bold"))
-        lbl_title.pack(anchor=tk.W, pady=(0, 6))
+        frame_header = ttk.Frame(frame_list)
+        frame_header.pack(fill=tk.X, pady=(0, 6))
+        lbl_title = ttk.Label(frame_header, text="Eventos programados", font=("Segoe UI", 12, "bold"))
+        lbl_title.pack(side=tk.LEFT)
+
+        # Filtro por rango de fechas (consultas por búsqueda binaria en el almacén)
+        self.filtro_var = tk.StringVar(value=self.FILTROS[0])
+        combo_filtro = ttk.Combobox(frame_header, textvariable=self.filtro_var, values=self.FILTROS,
+                                    state="readonly", width=12)
+        combo_filtro.pack(side=tk.RIGHT)
+        combo_filtro.bind("<<ComboboxSelected>>", lambda e: self._aplicar_filtro())
+        ttk.Label(frame_header, text="Mostrar:").pack(side=tk.RIGHT, padx=(0, 4))
 
         # Definición del Treeview
         columns = ("fecha", "hora", "descripcion")
-        self.tree = ttk.Treeview(frame_list, columns=columns, show="headings", height=10)
+        self.tree = ttk.Treeview(frame_list, columns=columns, show="headings", height=self.FILAS_VISIBLES)
         self.tree.heading("fecha", text="Fecha")
         self.tree.heading("hora", text="Hora")
         self.tree.heading("descripcion", text="Descripción")
@@ -55,11 +247,12 @@ class AgendaApp(tk.Tk):
         self.tree.column("hora", width=80, anchor=tk.CENTER)
         self.tree.column("descripcion", width=440, anchor=tk.W)
 
-        # Scrollbar vertical para el Treeview
-        vsb = ttk.Scrollbar(frame_list, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
+        # Scrollbar vertical: la controla la vista virtual (desplaza el modelo, no el widget)
+        vsb = ttk.Scrollbar(frame_list, orient="vertical")
         vsb.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(fill=tk.BOTH, expand=True)
+        self.vista = VistaVirtual(self.tree, vsb, self.FILAS_VISIBLES)
+        self.vista.establecer_modelo(ListaTodos(self.eventos))
 
         # ---------- Frame: Entradas (Date, Time, Description) ----------
         frame_inputs = ttk.Frame(self, padding=(10, 8))
@@ -86,10 +279,34 @@ class AgendaApp(tk.Tk):
         self.entry_hora.insert(0, "12:00")
         self.entry_hora.grid(row=0, column=3, padx=4, pady=4)
 
+        lbl_duracion = ttk.Label(frame_inputs, text="Duración (min):")
+        lbl_duracion.grid(row=0, column=4, sticky=tk.W, padx=12, pady=4)
+        self.entry_duracion = ttk.Entry(frame_inputs, width=6)
+        self.entry_duracion.insert(0, "60")
+        self.entry_duracion.grid(row=0, column=5, padx=4, pady=4)
+
         lbl_desc = ttk.Label(frame_inputs, text="Descripción:")
         lbl_desc.grid(row=1, column=0, sticky=tk.W, padx=4, pady=4)
         self.entry_desc = ttk.Entry(frame_inputs, width=70)
-        self.entry_desc.grid(row=1, column=1, columnspan=3, padx=4, pady=4, sticky=tk.W)
+        self.entry_desc.grid(row=1, column=1, columnspan=5, padx=4, pady=4, sticky=tk.W)
+
+        # Repetición: la serie se guarda una vez y se expande solo al consultar un rango de fechas
+        lbl_repetir = ttk.Label(frame_inputs, text="Repetir:")
+        lbl_repetir.grid(row=2, column=0, sticky=tk.W, padx=4, pady=4)
+        self.repetir_var = tk.StringVar(value="No")
+        combo_repetir = ttk.Combobox(frame_inputs, textvariable=self.repetir_var, values=list(self.REPETICIONES),
+                                     state="readonly", width=10)
+        combo_repetir.grid(row=2, column=1, padx=4, pady=4, sticky=tk.W)
+
+        lbl_hasta = ttk.Label(frame_inputs, text="Hasta:")
+        lbl_hasta.grid(row=2, column=2, sticky=tk.W, padx=12, pady=4)
+        self.entry_hasta = ttk.Entry(frame_inputs, width=12)
+        self.entry_hasta.grid(row=2, column=3, padx=4, pady=4)
+
+        lbl_veces = ttk.Label(frame_inputs, text="Veces:")
+        lbl_veces.grid(row=2, column=4, sticky=tk.W, padx=12, pady=4)
+        self.entry_veces = ttk.Entry(frame_inputs, width=6)
+        self.entry_veces.grid(row=2, column=5, padx=4, pady=4)
 
         # ---------- Frame: Botones ----------
         frame_buttons = ttk.Frame(self, padding=(10, 8))
@@ -101,6 +318,12 @@ class AgendaApp(tk.Tk):
         btn_delete = ttk.Button(frame_buttons, text="Eliminar Evento Seleccionado", command=self.delete_selected)
         btn_delete.pack(side=tk.LEFT, padx=(0, 6))
 
+        self.btn_import = ttk.Button(frame_buttons, text="Importar .ics", command=self.import_ics)
+        self.btn_import.pack(side=tk.LEFT, padx=(0, 6))
+
+        btn_export = ttk.Button(frame_buttons, text="Exportar .ics", command=self.export_ics)
+        btn_export.pack(side=tk.LEFT, padx=(0, 6))
+
         btn_exit = ttk.Button(frame_buttons, text="Salir", command=self.on_exit)
         btn_exit.pack(side=tk.RIGHT)
 
@@ -109,6 +332,98 @@ class AgendaApp(tk.Tk):
         lbl_status = ttk.Label(self, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
         lbl_status.pack(fill=tk.X, side=tk.BOTTOM, ipady=2)
 
+    # ---------- Filtro y modelo ----------
+    def _aplicar_filtro(self):
+        """Muestra todos los eventos o solo los del rango elegido."""
+        filtro = self.filtro_var.get()
+        hoy = date.today()
+        if filtro == "Hoy":
+            modelo = self.eventos.dia(hoy)
+        elif filtro == "Esta semana":
+            modelo = self.eventos.semana(hoy)
+        elif filtro == "Este mes":
+            modelo = self.eventos.mes(hoy.year, hoy.month)
+        elif filtro == "Series":
+            modelo = self.eventos.series()  # una fila por serie, sin expandir
+        else:
+            modelo = ListaTodos(self.eventos)  # series y el propio almacén, siempre al día
+        self.vista.establecer_modelo(modelo)
+
+    def _mostrar_evento(self, evento):
+        """Desplaza la lista hasta `evento` si está dentro del filtro actual."""
+        modelo = self.vista.modelo
+        if isinstance(modelo, ListaTodos):
+            indice = modelo.indice(evento.id)
+            if indice is not None:
+                self.vista.ir_a(indice)
+            return
+        for i, e in enumerate(modelo):
+            if e.id == evento.id:
+                self.vista.ir_a(i)
+                return
+
+    def _guardar(self):
+        """Pide un guardado; se escribe en segundo plano cuando la edición se detiene."""
+        if self.eventos.ruta:
+            self.guardado.marcar_cambio(self.eventos.ruta, self.eventos.instantanea,
+                                        AlmacenEventos.escribir_instantanea)
+
+    def _al_guardar(self, rutas, error):
+        if error is not None:
+            self.status_var.set(f"No se pudieron guardar los eventos: {error}")
+
+    # ---------- Recordatorios ----------
+    def _momento_recordatorio(self, evento, ahora):
+        return max(ahora, evento.inicio - self.ANTELACION_RECORDATORIO)
+
+    def _programar_todos(self):
+        """Recordatorios de todos los eventos futuros de una vez (heapify en O(n))."""
+        ahora = datetime.now()
+        pares = [(e.id, self._momento_recordatorio(e, ahora)) for e in self.eventos.unicos_desde(ahora)]
+        for serie in self.eventos.series():
+            ocurrencia = serie.siguiente(ahora)
+            if ocurrencia is not None:
+                pares.append((serie.id, self._momento_recordatorio(ocurrencia, ahora)))
+        self.recordatorios.programar_todos(pares)
+
+    def _programar(self, evento, desde=None):
+        """Programa el recordatorio de un evento o, si es una serie, el de su próxima ocurrencia."""
+        ahora = datetime.now()
+        siguiente = evento.siguiente(desde or ahora) if isinstance(evento, Serie) else evento
+        if siguiente is None or siguiente.inicio <= ahora:
+            self.recordatorios.cancelar(evento.id)
+        else:
+            self.recordatorios.programar(evento.id, self._momento_recordatorio(siguiente, ahora))
+
+    def _recordar(self, id_evento, momento):
+        if id_evento not in self.eventos:
+            return
+        evento = self.eventos.obtener(id_evento)
+        if isinstance(evento, Serie):  # serie: avisamos de esta ocurrencia y programamos la próxima
+            serie = evento
+            evento = serie.siguiente(momento)
+            if evento is None:
+                return
+            self._programar(serie, desde=evento.inicio + timedelta(minutes=1))
+        texto = f"{evento.fecha} {evento.hora} - {evento.descripcion}"
+        # Una sola ventana de avisos que se va llenando, aunque venzan muchos a la vez
+        if self._ventana_recordatorios is None or not self._ventana_recordatorios.winfo_exists():
+            ventana = tk.Toplevel(self)
+            ventana.title("Recordatorios")
+            lista = tk.Listbox(ventana, width=60, height=8)
+            lista.pack(padx=10, pady=10)
+            ttk.Button(ventana, text="Aceptar", command=ventana.destroy).pack(pady=(0, 10))
+            self._ventana_recordatorios = ventana
+            self._lista_recordatorios = lista
+        self._lista_recordatorios.insert(tk.END, texto)
+        self.status_var.set(f"Recordatorio: {texto}")
+        self.bell()
+
+    def _cerrar(self):
+        self.recordatorios.detener()
+        self.guardado.cerrar()  # escribe lo pendiente antes de cerrar
+        self.destroy()
+
     # ---------- Helpers para placeholder ----------
     def _clear_placeholder(self, event, placeholder):
         if event.widget.get() == placeholder:
@@ -125,9 +440,9 @@ class AgendaApp(tk.Tk):
         Devuelve True si es válida, False en caso contrario.
         """
         try:
-            datetime.strptime(date_text, "%d/%m/%Y")
+            leer_fecha(date_text)
             return True
-        except Exception:
+        except ValueError:
             return False
 
     def validate_time(self, time_text):
@@ -135,9 +450,9 @@ class AgendaApp(tk.Tk):
         Valida la hora en formato HH:MM (24 horas).
         """
         try:
-            datetime.strptime(time_text, "%H:%M")
+            leer_hora(time_text)
             return True
-        except Exception:
+        except ValueError:
             return False
 
     # ---------- Acciones de botones ----------
@@ -173,8 +488,41 @@ class AgendaApp(tk.Tk):
             messagebox.showwarning("Descripción vacía", "Ingrese una breve descripción para el evento.")
             return
 
-        # Agregamos el evento al Treeview
-        self.tree.insert("", tk.END, values=(fecha, hora, desc))
+        duracion = self.entry_duracion.get().strip()
+        if not duracion.isdigit() or int(duracion) <= 0:
+            messagebox.showwarning("Duración inválida", "La duración debe ser un número entero de minutos.")
+            return
+
+        regla = None
+        frecuencia = self.REPETICIONES[self.repetir_var.get()]
+        if frecuencia:
+            hasta = self.entry_hasta.get().strip()
+            veces = self.entry_veces.get().strip()
+            if hasta and not self.validate_date(hasta):
+                messagebox.showwarning("Fecha final inválida", "Formato de fecha requerido: dd/mm/yyyy.")
+                return
+            if veces and not veces.isdigit():
+                messagebox.showwarning("Veces inválidas", "Las veces deben ser un número entero.")
+                return
+            regla = Recurrencia(frecuencia, hasta=hasta, veces=int(veces or 0))
+
+        evento = Evento(fecha, hora, desc, int(duracion))
+        # Aviso de solapamiento (de la primera ocurrencia si es una serie): el conteo es O(log n)
+        solapados = self.eventos.solapamientos(evento.inicio, evento.fin)
+        if solapados:
+            detalle = "\n".join(f"{e.fecha} {e.hora} - {e.descripcion}" for e in solapados[:3])
+            if len(solapados) > 3:
+                detalle += f"\n... y {len(solapados) - 3} más"
+            if not messagebox.askyesno("Conflicto de horario",
+                                       f"El evento se solapa con:\n\n{detalle}\n\n¿Agregarlo de todos modos?"):
+                return
+
+        # Agregamos el evento al almacén (queda en su sitio cronológico) y lo mostramos
+        nuevo = self.eventos.agregar(evento) if regla is None else self.eventos.agregar_serie(evento, regla)
+        self._guardar()
+        self._programar(nuevo)
+        self._aplicar_filtro()
+        self._mostrar_evento(nuevo)
         self.status_var.set(f"Evento agregado: {fecha} {hora} - {desc}")
         # Limpiar campos (excepto fecha si usamos DateEntry)
         if not TKCALENDAR_AVAILABLE:
@@ -182,41 +530,160 @@ class AgendaApp(tk.Tk):
             self.entry_fecha.insert(0, "dd/mm/yyyy")
         self.entry_hora.delete(0, tk.END)
         self.entry_hora.insert(0, "12:00")
+        self.entry_duracion.delete(0, tk.END)
+        self.entry_duracion.insert(0, "60")
         self.entry_desc.delete(0, tk.END)
+        self.repetir_var.set("No")
+        self.entry_hasta.delete(0, tk.END)
+        self.entry_veces.delete(0, tk.END)
 
     def delete_selected(self):
         """
         Elimina el evento seleccionado en el Treeview, con diálogo de confirmación.
+        Una ocurrencia de una serie solo se omite ese día; la fila de la serie la borra entera.
         """
-        selected = self.tree.selection()
+        selected = self.vista.seleccion
         if not selected:
             messagebox.showinfo("Eliminar", "No hay ningún evento seleccionado.")
             return
 
+        # Las ocurrencias de una serie que también se borra entera sobran
+        ids = [i for i in selected if not (isinstance(i, tuple) and i[0] in selected)]
+
         # Si se seleccionan múltiples, preguntamos confirmación general
-        count = len(selected)
+        count = len(ids)
         if count == 1:
-            item = selected[0]
-            values = self.tree.item(item, "values")
-            fecha, hora, desc = values
+            fecha, hora, desc = self.eventos.obtener(ids[0]).valores()
             msg = f"¿Deseas eliminar el evento?\n\n{fecha} {hora} - {desc}"
         else:
             msg = f"¿Deseas eliminar los {count} eventos seleccionados?"
 
         if messagebox.askyesno("Confirmar eliminación", msg):
-            for item in selected:
-                self.tree.delete(item)
+            for id_evento in ids:
+                self.eventos.eliminar(id_evento)
+                if isinstance(id_evento, tuple):
+                    # Se omitió una ocurrencia: la serie sigue, quizá con otro próximo aviso
+                    self._programar(self.eventos.obtener(id_evento[0]))
+                else:
+                    self.recordatorios.cancelar(id_evento)
+            selected.clear()
+            self._guardar()
+            self._aplicar_filtro()
             self.status_var.set(f"{count} evento(s) eliminado(s).")
 
+    def import_ics(self):
+        """
+        Importa un calendario .ics. Cada bloque de eventos se procesa en una llamada de after(),
+        así la ventana sigue respondiendo (y mostrando el progreso) aunque el archivo sea enorme.
+        """
+        ruta = filedialog.askopenfilename(title="Importar calendario",
+                                          filetypes=[("iCalendar", "*.ics"), ("Todos los archivos", "*.*")])
+        if not ruta:
+            return
+        self.btn_import.state(["disabled"])
+        rechazados = []
+        partes = importar_por_partes(self.eventos, ruta, rechazados)
+        self._importar_bloque(partes, rechazados, time.perf_counter())
+
+    def _importar_bloque(self, partes, rechazados, inicio):
+        try:
+            eventos, series = next(partes)
+        except StopIteration:
+            self.btn_import.state(["!disabled"])
+            self._guardar()
+            self._programar_todos()
+            self._aplicar_filtro()
+            texto = f"Importación terminada en {time.perf_counter() - inicio:.1f} s"
+            if rechazados:
+                texto += f" ({len(rechazados)} evento(s) no válidos, el primero en la línea {rechazados[0][0]})"
+            self.status_var.set(texto + ".")
+            return
+        except (OSError, UnicodeDecodeError) as e:
+            self.btn_import.state(["!disabled"])
+            self._aplicar_filtro()
+            messagebox.showerror("Importar .ics", f"No se pudo leer el calendario:\n{e}")
+            return
+        self.status_var.set(f"Importando... {eventos} evento(s) y {series} serie(s)")
+        self.vista.refrescar()
+        self.after(1, self._importar_bloque, partes, rechazados, inicio)
+
+    def export_ics(self):
+        ruta = filedialog.asksaveasfilename(title="Exportar calendario", defaultextension=".ics",
+                                            filetypes=[("iCalendar", "*.ics")])
+        if not ruta:
+            return
+        try:
+            exportar_ics(self.eventos, ruta)
+        except OSError as e:
+            messagebox.showerror("Exportar .ics", f"No se pudo guardar el calendario:\n{e}")
+            return
+        self.status_var.set(f"Calendario exportado en {ruta}.")
+
     def on_exit(self):
         """
         Cierra la aplicación (pregunta de confirmación opcional).
         """
         if messagebox.askokcancel("Salir", "¿Estás seguro que deseas salir?"):
-            self.destroy()
+            self._cerrar()
+
+
+def medir_vista(n=100_000, pasos=2000):
+    """
+    Compara la vista virtual con un Treeview clásico (una fila por evento) con n eventos.
+    Necesita una pantalla; en un servidor ejecutar con Xvfb: xvfb-run python <este archivo> --bench
+    """
+    import resource
+
+    def rss_mb():
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB en Linux
+
+    eventos = [Evento(f"{1 + i % 28:02d}/{1 + i % 12:02d}/2026", f"{i % 24:02d}:{i % 60:02d}", f"Evento {i}")
+               for i in range(n)]
+    resultados = {"eventos": n}
+
+    # Vista virtual
+    antes = rss_mb()
+    inicio = time.perf_counter()
+    app = AgendaApp(ruta=None)
+    app.eventos.agregar_varios(eventos)
+    app.vista.refrescar()
+    app.update()
+    resultados["virtual_arranque_s"] = round(time.perf_counter() - inicio, 3)
+    inicio = time.perf_counter()
+    for _ in range(pasos):
+        app.vista.desplazar(1)
+        app.update_idletasks()
+    resultados["virtual_desplazamiento_ms"] = round((time.perf_counter() - inicio) / pasos * 1000, 3)
+    resultados["virtual_rss_mb"] = round(rss_mb() - antes, 1)
+    app._cerrar()
+
+    # Treeview clásico, como antes de la vista virtual
+    antes = rss_mb()
+    inicio = time.perf_counter()
+    raiz = tk.Tk()
+    tree = ttk.Treeview(raiz, columns=("fecha", "hora", "descripcion"), show="headings", height=10)
+    tree.pack()
+    for evento in eventos:
+        tree.insert("", tk.END, values=evento.valores())
+    raiz.update()
+    resultados["clasico_arranque_s"] = round(time.perf_counter() - inicio, 3)
+    inicio = time.perf_counter()
+    for _ in range(pasos):
+        tree.yview_scroll(1, "units")
+        raiz.update_idletasks()
+    resultados["clasico_desplazamiento_ms"] = round((time.perf_counter() - inicio) / pasos * 1000, 3)
+    resultados["clasico_rss_mb"] = round(rss_mb() - antes, 1)
+    raiz.destroy()
+    return resultados
 
 
 if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_vista())
+        sys.exit(0)
+
     # Si no tenemos tkcalendar, avisamos al usuario sobre la opción de instalarlo
     if not TKCALENDAR_AVAILABLE:
         print("Nota: 'tkcalendar' no está instalado. El selector de fecha será un campo de texto.")
@@ -0,0 +1,176 @@
+"""
+tareas_modelo.py
+Modelo de la Lista de Tareas, separado de la interfaz.
+
+- Cada tarea tiene un id estable (creciente, nunca se reutiliza), así que dos tareas con el
+  mismo texto se distinguen y las operaciones no dependen de posiciones que cambian.
+- `_por_id` da la tarea (y su marca de completada) en O(1); `_orden` guarda los ids en orden de
+  alta. Como los ids crecen con cada alta, `_orden` está ordenada y la posición de un id se
+  obtiene con bisect en O(log n).
+- La vista (el Listbox) se suscribe a los cambios y recibe la posición afectada, de modo que
+  solo toca esa fila: insertar al final, borrar una fila o repintar una fila.
+- Para filtrar mientras se escribe se guarda, por id, el texto normalizado (minúsculas, sin
+  tildes), que se mantiene en cada alta y baja. `buscar` puede recibir el resultado anterior
+  para revisar solo esos candidatos cuando la consulta nueva amplía la anterior, y
+  `diferencia_filas` calcula los tramos mínimos de filas a borrar e insertar en la vista.
+"""
+
+import unicodedata
+from bisect import bisect_left
+from dataclasses import dataclass
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Llamar a Ángela' -> 'llamar a angela'."""
+    descompuesto = unicodedata.normalize("NFKD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def diferencia_filas(viejos, nuevos):
+    """
+    Operaciones mínimas para pasar la vista de `viejos` a `nuevos` (listas de ids crecientes).
+
+    Devuelve (borrados, insertados): `borrados` son tramos (primera, última) de posiciones a
+    borrar, de abajo arriba; `insertados` son (posición, [ids]) a insertar, de arriba abajo,
+    una vez hechos los borrados. Las filas comunes no se tocan.
+    """
+    borrados, insertados = [], []
+    if viejos == nuevos:  # p. ej. "tare" -> "tarea" sin descartar nada: comparación en C, sin recorrido
+        return borrados, insertados
+    # Mezcla de dos listas ordenadas: un solo recorrido, sin conjuntos auxiliares
+    i = j = 0
+    n_viejos, n_nuevos = len(viejos), len(nuevos)
+    while i < n_viejos or j < n_nuevos:
+        if i < n_viejos and j < n_nuevos and viejos[i] == nuevos[j]:
+            i += 1
+            j += 1
+        elif j == n_nuevos or (i < n_viejos and viejos[i] < nuevos[j]):
+            if borrados and borrados[-1][1] == i - 1:
+                borrados[-1][1] = i
+            else:
+                borrados.append([i, i])
+            i += 1
+        else:
+            if insertados and insertados[-1][0] + len(insertados[-1][1]) == j:
+                insertados[-1][1].append(nuevos[j])
+            else:
+                insertados.append((j, [nuevos[j]]))
+            j += 1
+    return [tuple(t) for t in reversed(borrados)], insertados
+
+
+@dataclass
+class Tarea:
+    texto: str
+    completada: bool = False
+    id: int = 0  # lo asigna la lista
+
+
+class ListaTareas:
+    """Tareas en orden de alta, indexadas por id, con aviso de cambios a los suscriptores."""
+
+    def __init__(self):
+        self._por_id = {}  # id -> Tarea
+        self._orden = []  # ids en orden de alta (creciente)
+        self._claves = {}  # id -> texto normalizado, para buscar
+        self._siguiente_id = 1
+        self.completadas = 0
+        self._oyentes = []
+
+    # ---------- Suscripción (la vista) ----------
+    def suscribir(self, oyente):
+        """oyente(evento, posicion, tarea) con evento en "alta", "baja", "cambio"."""
+        self._oyentes.append(oyente)
+
+    def desuscribir(self, oyente):
+        self._oyentes.remove(oyente)
+
+    def _emitir(self, evento, posicion, tarea):
+        for oyente in self._oyentes:
+            oyente(evento, posicion, tarea)
+
+    # ---------- Secuencia en orden de alta ----------
+    def __len__(self):
+        return len(self._orden)
+
+    def __getitem__(self, posicion):
+        return self._por_id[self._orden[posicion]]
+
+    def __iter__(self):
+        return (self._por_id[i] for i in self._orden)
+
+    def __contains__(self, id_tarea):
+        return id_tarea in self._por_id
+
+    def obtener(self, id_tarea):
+        return self._por_id[id_tarea]
+
+    def id_en(self, posicion):
+        return self._orden[posicion]
+
+    def coincide(self, id_tarea, consulta):
+        """¿Contiene la tarea la consulta (ya normalizada)?"""
+        return consulta in self._claves[id_tarea]
+
+    def buscar(self, consulta, candidatos=None):
+        """Ids, en orden, cuyas tareas contienen `consulta`; solo entre `candidatos` si se dan."""
+        consulta = normalizar(consulta)
+        ids = self._orden if candidatos is None else candidatos
+        if not consulta:
+            return list(ids)
+        claves = self._claves
+        return [i for i in ids if consulta in claves[i]]
+
+    def posicion(self, id_tarea):
+        if id_tarea not in self._por_id:
+            raise KeyError(id_tarea)
+        return bisect_left(self._orden, id_tarea)
+
+    # ---------- Cambios ----------
+    def agregar(self, texto, completada=False):
+        tarea = Tarea(texto, completada, self._siguiente_id)
+        self._siguiente_id += 1
+        self._por_id[tarea.id] = tarea
+        self._orden.append(tarea.id)
+        self._claves[tarea.id] = normalizar(texto)
+        self.completadas += completada
+        self._emitir("alta", len(self._orden) - 1, tarea)
+        return tarea
+
+    def completar(self, id_tarea):
+        """Marca la tarea como completada. Devuelve False si ya lo estaba."""
+        tarea = self._por_id[id_tarea]
+        if tarea.completada:
+            return False
+        tarea.completada = True
+        self.completadas += 1
+        self._emitir("cambio", self.posicion(id_tarea), tarea)
+        return True
+
+    def eliminar(self, id_tarea):
+        posicion = self.posicion(id_tarea)
+        tarea = self._por_id.pop(id_tarea)
+        del self._orden[posicion]
+        del self._claves[id_tarea]
+        self.completadas -= tarea.completada
+        self._emitir("baja", posicion, tarea)
+        return tarea
+
+    # ---------- Persistencia ----------
+    def instantanea(self):
+        """Copia inmutable [(id, texto, completada)] para guardarla desde otro hilo."""
+        return [(t.id, t.texto, t.completada) for t in self]
+
+    def cargar(self, registros):
+        """Carga masiva sin avisos (la vista se rellena después de una vez). Acepta registros sin id."""
+        self._por_id, self._orden, self._claves, self.completadas = {}, [], {}, 0
+        for registro in registros:
+            id_tarea = registro.get("id") or self._siguiente_id
+            if self._orden and id_tarea <= self._orden[-1]:
+                id_tarea = self._orden[-1] + 1  # ids repetidos o desordenados: se renumera
+            tarea = Tarea(registro["texto"], bool(registro["completada"]), id_tarea)
+            self._por_id[id_tarea] = tarea
+            self._orden.append(id_tarea)
+            self._claves[id_tarea] = normalizar(tarea.texto)
+            self.completadas += tarea.completada
+            self._siguiente_id = max(self._siguiente_id, id_tarea + 1)
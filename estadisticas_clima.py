@@ -0,0 +1,386 @@
+# Estadísticas en línea para series de temperaturas (sensores con millones de lecturas)
+"""
+EstadisticasEnLinea recibe las lecturas una a una (o por lotes) sin guardarlas:
+
+- media y varianza con el algoritmo de Welford (estable, sin sumar cuadrados enormes);
+  dos resúmenes se combinan con la fórmula de Chan, que es lo que usa la carga por bloques;
+- mínimo y máximo;
+- ventana móvil de las últimas `ventana` lecturas: media, desviación, mínimo y máximo en O(1)
+  por lectura (colas monótonas para mínimo y máximo);
+- cuantiles aproximados con un histograma de resolución fija (0.1 °C por defecto): la memoria
+  depende del rango de temperaturas, no del número de lecturas, y el error es como mucho
+  media resolución.
+
+Las lecturas que no son finitas ("nan", "inf": marcas de dato ausente de los sensores) se
+ignoran en todas las entradas.
+
+`cargar_archivo` lee archivos de texto (una lectura por línea) o CSV a través de mmap, por
+bloques, y los convierte con NumPy; sin NumPy se lee línea a línea.
+
+Ejecutar `python estadisticas_clima.py --bench` compara con guardar la lista y usar sum/len.
+"""
+
+import math
+import mmap
+import re
+import warnings
+from collections import deque
+
+# NumPy es opcional: solo acelera la carga de archivos grandes.
+try:
+    import numpy as np
+    NUMPY_DISPONIBLE = True
+except ImportError:
+    NUMPY_DISPONIBLE = False
+
+
+class VentanaMovil:
+    """Estadísticas de las últimas `tamano` lecturas, actualizadas en O(1) por lectura."""
+
+    def __init__(self, tamano):
+        if tamano < 1:
+            raise ValueError("La ventana debe tener al menos una lectura.")
+        self.tamano = tamano
+        self._valores = deque(maxlen=tamano)
+        self._media = 0.0
+        self._m2 = 0.0
+        self._cambios = 0  # reemplazos desde el último recálculo exacto
+        self._recalcular_cada = max(tamano, 65536)
+        self._minimos = deque()  # (posición, valor) con valores crecientes
+        self._maximos = deque()  # (posición, valor) con valores decrecientes
+        self._posicion = 0
+
+    def agregar(self, x):
+        valores = self._valores
+        if len(valores) < self.tamano:
+            # Welford mientras la ventana se llena
+            delta = x - self._media
+            self._media += delta / (len(valores) + 1)
+            self._m2 += delta * (x - self._media)
+        else:
+            # Sale la más antigua y entra x: se actualizan media y M2 sin recorrer la ventana
+            y = valores[0]
+            media_anterior = self._media
+            self._media += (x - y) / self.tamano
+            self._m2 += (x - y) * (x - self._media + y - media_anterior)
+            self._cambios += 1
+        valores.append(x)
+        if self._cambios >= self._recalcular_cada:
+            self._recalcular()  # de vez en cuando, para que el redondeo no se acumule
+
+        posicion = self._posicion
+        self._posicion += 1
+        limite = posicion - self.tamano
+        minimos, maximos = self._minimos, self._maximos
+        while minimos and minimos[-1][1] >= x:
+            minimos.pop()
+        minimos.append((posicion, x))
+        if minimos[0][0] <= limite:
+            minimos.popleft()
+        while maximos and maximos[-1][1] <= x:
+            maximos.pop()
+        maximos.append((posicion, x))
+        if maximos[0][0] <= limite:
+            maximos.popleft()
+
+    def _recalcular(self):
+        n = len(self._valores)
+        self._media = math.fsum(self._valores) / n
+        self._m2 = math.fsum((v - self._media) ** 2 for v in self._valores)
+        self._cambios = 0
+
+    def __len__(self):
+        return len(self._valores)
+
+    @property
+    def media(self):
+        return self._media if self._valores else 0.0
+
+    @property
+    def varianza(self):
+        n = len(self._valores)
+        return max(0.0, self._m2 / (n - 1)) if n > 1 else 0.0
+
+    @property
+    def minimo(self):
+        return self._minimos[0][1] if self._minimos else None
+
+    @property
+    def maximo(self):
+        return self._maximos[0][1] if self._maximos else None
+
+
+class EstadisticasEnLinea:
+    """Media, varianza, mínimo, máximo, ventana móvil y cuantiles de una serie, sin guardarla."""
+
+    def __init__(self, ventana=0, resolucion=0.1):
+        self.cuenta = 0
+        self.media = 0.0
+        self._m2 = 0.0
+        self.minimo = math.inf
+        self.maximo = -math.inf
+        self.resolucion = resolucion
+        self._histograma = {}  # round(x / resolucion) -> lecturas
+        self.ventana = VentanaMovil(ventana) if ventana else None
+
+    # ---------- Entrada ----------
+    def agregar(self, x):
+        if not math.isfinite(x):
+            return  # dato ausente del sensor
+        self.cuenta += 1
+        delta = x - self.media
+        self.media += delta / self.cuenta
+        self._m2 += delta * (x - self.media)
+        if x < self.minimo:
+            self.minimo = x
+        if x > self.maximo:
+            self.maximo = x
+        cubeta = round(x / self.resolucion)
+        self._histograma[cubeta] = self._histograma.get(cubeta, 0) + 1
+        if self.ventana is not None:
+            self.ventana.agregar(x)
+
+    def agregar_varios(self, lecturas):
+        """Igual que llamar a agregar() con cada lectura, con el estado en variables locales."""
+        cuenta, media, m2 = self.cuenta, self.media, self._m2
+        minimo, maximo = self.minimo, self.maximo
+        histograma, resolucion = self._histograma, self.resolucion
+        ventana = self.ventana.agregar if self.ventana is not None else None
+        finito = math.isfinite
+        for x in lecturas:
+            if not finito(x):
+                continue
+            cuenta += 1
+            delta = x - media
+            media += delta / cuenta
+            m2 += delta * (x - media)
+            if x < minimo:
+                minimo = x
+            if x > maximo:
+                maximo = x
+            cubeta = round(x / resolucion)
+            histograma[cubeta] = histograma.get(cubeta, 0) + 1
+            if ventana is not None:
+                ventana(x)
+        self.cuenta, self.media, self._m2 = cuenta, media, m2
+        self.minimo, self.maximo = minimo, maximo
+
+    def agregar_lote(self, valores):
+        """Versión vectorizada de agregar() para un array de NumPy (en el mismo orden)."""
+        finitos = np.isfinite(valores)
+        if not finitos.all():
+            valores = valores[finitos]
+        n = len(valores)
+        if not n:
+            return
+        media = float(valores.mean())
+        self._combinar(n, media, float(((valores - media) ** 2).sum()),
+                       float(valores.min()), float(valores.max()))
+        indices = np.rint(valores / self.resolucion).astype(np.int64)
+        menor = int(indices.min())
+        if int(indices.max()) - menor <= 4 * n + 1024:
+            # Rango acotado (lo normal en temperaturas): bincount, sin ordenar
+            cuentas = np.bincount(indices - menor)
+            cubetas = np.flatnonzero(cuentas)
+            cuentas = cuentas[cubetas]
+            cubetas = cubetas + menor
+        else:  # algún valor muy alejado: bincount reservaría demasiada memoria
+            cubetas, cuentas = np.unique(indices, return_counts=True)
+        histograma = self._histograma
+        for cubeta, cuenta in zip(cubetas.tolist(), cuentas.tolist()):
+            histograma[cubeta] = histograma.get(cubeta, 0) + cuenta
+        if self.ventana is not None:
+            # Solo las últimas lecturas del lote pueden quedar en la ventana
+            for x in valores[-self.ventana.tamano:].tolist():
+                self.ventana.agregar(x)
+
+    def combinar(self, otra):
+        """Suma a este resumen el de otra serie (p. ej. otro sensor o un bloque calculado aparte)."""
+        self._combinar(otra.cuenta, otra.media, otra._m2, otra.minimo, otra.maximo)
+        for cubeta, cuenta in otra._histograma.items():
+            self._histograma[cubeta] = self._histograma.get(cubeta, 0) + cuenta
+
+    def _combinar(self, n, media, m2, minimo, maximo):
+        # Fórmula de Chan et al. para unir dos resúmenes de Welford
+        total = self.cuenta + n
+        delta = media - self.media
+        self._m2 += m2 + delta * delta * self.cuenta * n / total
+        self.media += delta * n / total
+        self.cuenta = total
+        self.minimo = min(self.minimo, minimo)
+        self.maximo = max(self.maximo, maximo)
+
+    # ---------- Consultas ----------
+    @property
+    def varianza(self):
+        """Varianza muestral (n - 1)."""
+        return self._m2 / (self.cuenta - 1) if self.cuenta > 1 else 0.0
+
+    @property
+    def desviacion(self):
+        return math.sqrt(self.varianza)
+
+    def cuantil(self, q):
+        """Cuantil aproximado (q entre 0 y 1), con un error de como mucho media resolución."""
+        if not self.cuenta:
+            return None
+        objetivo = q * (self.cuenta - 1)
+        acumulado = 0
+        for cubeta in sorted(self._histograma):
+            acumulado += self._histograma[cubeta]
+            if objetivo < acumulado:
+                return min(self.maximo, max(self.minimo, cubeta * self.resolucion))
+        return self.maximo
+
+    def resumen(self):
+        datos = {
+            "lecturas": self.cuenta,
+            "media": self.media,
+            "desviacion": self.desviacion,
+            "minimo": self.minimo if self.cuenta else None,
+            "maximo": self.maximo if self.cuenta else None,
+            "mediana": self.cuantil(0.5),
+            "p95": self.cuantil(0.95),
+        }
+        if self.ventana is not None:
+            datos["ventana_media"] = self.ventana.media
+            datos["ventana_minimo"] = self.ventana.minimo
+            datos["ventana_maximo"] = self.ventana.maximo
+        return datos
+
+
+# ---------- Lectura de archivos ----------
+def leer_lecturas(archivo, columna=None, separador=","):
+    """
+    Lecturas de un archivo de texto abierto: una por línea o, con `columna`, la de esa columna
+    de un CSV. Las líneas vacías, las que no son números (como la cabecera) y las lecturas no
+    finitas ("nan", "inf") se saltan.
+    """
+    finito = math.isfinite
+    for linea in archivo:
+        campo = linea if columna is None else (linea.split(separador)[columna:columna + 1] or [""])[0]
+        try:
+            valor = float(campo)
+        except ValueError:
+            continue
+        if finito(valor):
+            yield valor
+
+
+# Dos valores en la misma línea ("3.0 4.0"): leer_lecturas la salta, fromstring leería dos
+_RE_VARIOS_EN_LINEA = re.compile(rb"\S[ \t\f\v]+\S")
+
+
+def _convertir_bloque(bloque, columna, separador):
+    if columna is None:
+        # fromstring separa por cualquier espacio, no por líneas: si alguna línea tiene más de un
+        # valor el bloque se lee línea a línea, como leer_lecturas (sin espacios ni se busca)
+        if (any(espacio in bloque for espacio in (b" ", b"\t", b"\f", b"\v"))
+                and _RE_VARIOS_EN_LINEA.search(bloque)):
+            raise ValueError("Alguna línea tiene más de un valor")
+        # fromstring con separador convierte el texto en C; si algo no es un número solo avisa,
+        # así que el aviso se convierte en error para que el bloque se lea línea a línea
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", DeprecationWarning)
+            try:
+                return np.fromstring(bloque, dtype=np.float64, sep=" ")
+            except DeprecationWarning as e:
+                raise ValueError(str(e)) from None
+    import io
+    return np.loadtxt(io.BytesIO(bloque), delimiter=separador, usecols=columna, ndmin=1, dtype=np.float64)
+
+
+def cargar_archivo(ruta, estadisticas=None, columna=None, separador=",", tamano_bloque=16 * 1024 * 1024):
+    """
+    Añade a `estadisticas` (o a unas nuevas) todas las lecturas del archivo y las devuelve.
+    Con NumPy el archivo se recorre con mmap en bloques de `tamano_bloque` bytes cortados en
+    fin de línea y cada bloque se convierte de una vez; sin NumPy se lee línea a línea.
+    Si la primera línea no es un número se toma como cabecera.
+    """
+    if estadisticas is None:
+        estadisticas = EstadisticasEnLinea()
+    if not NUMPY_DISPONIBLE:
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            estadisticas.agregar_varios(leer_lecturas(archivo, columna, separador))
+        return estadisticas
+
+    with open(ruta, "rb") as archivo:
+        try:
+            memoria = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío: no se puede mapear
+            return estadisticas
+        with memoria:
+            inicio = 0
+            primera = memoria[:memoria.find(b"\n") if memoria.find(b"\n") >= 0 else len(memoria)]
+            if not list(leer_lecturas([primera.decode("utf-8", "replace")], columna, separador)):
+                inicio = len(primera) + 1  # cabecera
+            while inicio < len(memoria):
+                fin = memoria.find(b"\n", min(inicio + tamano_bloque, len(memoria)))
+                fin = len(memoria) if fin < 0 else fin + 1
+                bloque = memoria[inicio:fin]
+                try:
+                    valores = _convertir_bloque(bloque, columna, separador)
+                except ValueError:
+                    # Alguna línea no es un número: este bloque se hace línea a línea
+                    valores = np.fromiter(leer_lecturas(bloque.decode("utf-8", "replace").splitlines(),
+                                                        columna, separador), dtype=np.float64)
+                estadisticas.agregar_lote(valores)
+                inicio = fin
+    return estadisticas
+
+
+# ====== MEDICIÓN ======
+def medir_estadisticas(n=5_000_000):
+    """Archivo de `n` temperaturas: lista + sum/len frente a agregar_varios y cargar_archivo."""
+    import os
+    import random
+    import tempfile
+    import time
+
+    azar = random.Random(17)
+    resultados = {"lecturas": n}
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "temperaturas.txt")
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            archivo.writelines(f"{azar.gauss(18, 7):.1f}\n" for _ in range(n))
+        resultados["archivo_mib"] = round(os.path.getsize(ruta) / 2 ** 20, 1)
+
+        inicio = time.perf_counter()
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            temperaturas = [float(linea) for linea in archivo]
+        media_lista = sum(temperaturas) / len(temperaturas)
+        resultados["lista_sum_len_s"] = round(time.perf_counter() - inicio, 2)
+
+        inicio = time.perf_counter()
+        with open(ruta, "r", encoding="utf-8") as archivo:
+            en_linea = EstadisticasEnLinea(ventana=1000)
+            en_linea.agregar_varios(leer_lecturas(archivo))
+        resultados["en_linea_s"] = round(time.perf_counter() - inicio, 2)
+
+        if NUMPY_DISPONIBLE:
+            inicio = time.perf_counter()
+            masivo = cargar_archivo(ruta, EstadisticasEnLinea(ventana=1000))
+            resultados["mmap_numpy_s"] = round(time.perf_counter() - inicio, 2)
+            assert masivo.cuenta == en_linea.cuenta
+            assert math.isclose(masivo.media, en_linea.media, rel_tol=1e-9)
+            assert math.isclose(masivo.varianza, en_linea.varianza, rel_tol=1e-9)
+            assert masivo.ventana.media == en_linea.ventana.media or \
+                math.isclose(masivo.ventana.media, en_linea.ventana.media, rel_tol=1e-9)
+            exactos = np.percentile(np.array(temperaturas), [50, 95, 99], method="lower")
+            resultados["error_cuantiles"] = round(max(abs(masivo.cuantil(q) - e)
+                                                      for q, e in zip((0.5, 0.95, 0.99), exactos)), 3)
+        resultados["error_media"] = abs(en_linea.media - media_lista)
+    return resultados
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--bench" in sys.argv:
+        print(medir_estadisticas())
+        sys.exit(0)
+
+    estadisticas = EstadisticasEnLinea(ventana=3)
+    estadisticas.agregar_varios([21.0, 23.5, 19.0, 25.0, 22.0, 20.0, 24.0])
+    for clave, valor in estadisticas.resumen().items():
+        print(f"{clave}: {valor:.2f}" if isinstance(valor, float) else f"{clave}: {valor}")